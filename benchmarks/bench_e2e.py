@@ -0,0 +1,177 @@
+"""
+End-to-end step latency of run_orchestrator without a desktop or a GPU model.
+
+  - LLM:     FakeOllamaServer on localhost with scripted planner replies and simulated
+             time-to-first-token / generation speed
+  - screen:  FileCaptureBackend replaying saved screenshots (or synthetic 1080p frames)
+  - input:   ExecutorCore with no-op tools (nothing is clicked or typed)
+
+Each task runs `--steps` tool calls followed by a final_response (with `--batch N`, N calls
+per planner turn as a tool_calls batch). Reports p50/p95 per stage
+(capture, encode, request_build, llm, parse, policy, execute) and per step as JSON.
+
+Usage:
+    python benchmarks/bench_e2e.py [--screenshots DIR] [--tasks 5] [--steps 10]
+                                   [--ttft 0.05] [--tps 0] [--batch 1] [--stream] [--pipelined]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+from PIL import Image
+
+from fake_ollama import FakeOllamaServer
+from src.agent.executor.executor_core import TOOL_DISPATCH_MAP, ExecutorCore
+from src.agent.utils import tracing
+from src.agent.utils.screen_capture import CaptureSettings, FileCaptureBackend
+from src.orchestrator import iterate_steps, run_orchestrator, run_orchestrator_async
+
+SCRIPT = [
+    {"action": "mouse_click", "parameters": {"x": 640, "y": 400, "button": "left"}},
+    {"action": "keyboard_type", "parameters": {"text": "rapor_2024.txt"}},
+    {"action": "keyboard_press", "parameters": {"text": "ENTER"}},
+    {"action": "wait", "parameters": {"seconds": 0}},
+]
+
+
+def _noop_tool(*args, **kwargs):
+    return "noop"
+
+
+def planner_responder(steps: int, batch: int = 1):
+    """
+    Reply for a /api/chat request: the n-th planner call of a task (n = assistant messages
+    already in the request) gets the next scripted tool_call (or `batch` of them as tool_calls),
+    then a final_response once `steps` calls were issued. Summarizer requests get a short memory text.
+    """
+    def respond(body):
+        messages = body["messages"]
+        if "Memory Summarizer" in messages[0].get("content", ""):
+            return "Task: benchmark. Result: success."
+        n = sum(1 for m in messages if m.get("role") == "assistant")
+        thought = f"Adım {n + 1}: ekrandaki alan bulundu, bir sonraki eylem seçildi. " * 3
+        done = n * batch
+        if done >= steps:
+            return json.dumps({"thought": thought, "final_response": "Görev tamamlandı."}, ensure_ascii=False)
+        if batch > 1:
+            calls = [SCRIPT[i % len(SCRIPT)] for i in range(done, min(done + batch, steps))]
+            return json.dumps({"thought": thought, "tool_calls": calls}, ensure_ascii=False)
+        return json.dumps({"thought": thought, "tool_call": SCRIPT[n % len(SCRIPT)]}, ensure_ascii=False)
+    return respond
+
+
+def synthetic_frames(directory: Path, count: int = 4, size=(1920, 1080)):
+    """
+    Desktop-like frames: flat background, a window, and a small region that changes per frame.
+    """
+    rng = np.random.default_rng(0)
+    paths = []
+    for i in range(count):
+        img = np.full((size[1], size[0], 3), 32, dtype=np.uint8)
+        img[100:900, 200:1600] = 235
+        img[100:140, 200:1600] = (40, 90, 200)
+        y = 200 + 60 * i
+        img[y:y + 40, 300:900] = rng.integers(0, 255, (40, 600, 3), dtype=np.uint8)
+        path = directory / f"frame_{i:02d}.png"
+        Image.fromarray(img).save(path)
+        paths.append(path)
+    return paths
+
+
+def run_task(args, frames, stats):
+    executor = ExecutorCore(dispatch_map={name: _noop_tool for name in TOOL_DISPATCH_MAP})
+    kwargs = dict(
+        capture_backend=FileCaptureBackend(frames),
+        capture_settings=CaptureSettings(image_format=args.format),
+        stream=args.stream,
+        executor=executor,
+        settle_seconds=0,
+    )
+    if args.pipelined:
+        steps = iterate_steps(run_orchestrator_async("benchmark görevi", **kwargs))
+    else:
+        steps = run_orchestrator("benchmark görevi", **kwargs)
+
+    last = time.perf_counter()
+    for step in steps:
+        if step["type"] == "thought":
+            now = time.perf_counter()
+            stats["step_s"].append(now - last)
+            last = now
+            if step.get("metrics"):
+                stats["ttft_s"].append(step["metrics"]["ttft_s"])
+                stats["time_to_action_s"].append(step["metrics"]["time_to_action_s"])
+        elif step["type"] == "assistant" and not str(step["content"]).startswith("Görev"):
+            raise SystemExit(f"task failed: {step['content']}")
+
+
+def summary_ms(values):
+    if not values:
+        return None
+    ms = [v * 1000.0 for v in values]
+    return {
+        "count": len(ms),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "p50_ms": round(tracing.percentile(ms, 50), 3),
+        "p95_ms": round(tracing.percentile(ms, 95), 3),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--screenshots", help="directory of screenshots to replay (default: synthetic 1080p frames)")
+    ap.add_argument("--tasks", type=int, default=5)
+    ap.add_argument("--steps", type=int, default=10, help="tool calls per task")
+    ap.add_argument("--ttft", type=float, default=0.05, help="simulated time to first token (s)")
+    ap.add_argument("--tps", type=float, default=0.0, help="simulated tokens/second (0 = instant)")
+    ap.add_argument("--batch", type=int, default=1, help="tool calls per planner turn (tool_calls batch)")
+    ap.add_argument("--format", default="PNG", help="planner image format (PNG/JPEG/WEBP)")
+    ap.add_argument("--stream", action="store_true", help="streamed planner responses")
+    ap.add_argument("--pipelined", action="store_true", help="use run_orchestrator_async")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        frames = FileCaptureBackend(args.screenshots).paths if args.screenshots else synthetic_frames(Path(tmp))
+
+        tracer = tracing.Tracer()
+        stats = {"step_s": [], "ttft_s": [], "time_to_action_s": []}
+        with FakeOllamaServer(planner_responder(args.steps, args.batch), ttft=args.ttft, tokens_per_second=args.tps) as server:
+            os.environ["OLLAMA_HOST"] = server.url
+            previous = tracing.set_tracer(tracer)
+            started = time.perf_counter()
+            # planner / executor progress prints go to stderr; stdout carries only the JSON report
+            try:
+                with contextlib.redirect_stdout(sys.stderr):
+                    for _ in range(args.tasks):
+                        run_task(args, frames, stats)
+            finally:
+                tracing.set_tracer(previous)
+            wall = time.perf_counter() - started
+        frame_size = list(Image.open(frames[0]).size)
+
+    print(json.dumps({
+        "config": {
+            "tasks": args.tasks, "steps": args.steps, "batch": args.batch, "ttft_s": args.ttft, "tps": args.tps,
+            "format": args.format, "stream": args.stream, "pipelined": args.pipelined,
+            "frames": len(frames), "frame_size": frame_size,
+        },
+        "wall_s": round(wall, 3),
+        "llm_requests": server.requests,
+        "step": summary_ms(stats["step_s"]),
+        "ttft": summary_ms(stats["ttft_s"]),
+        "time_to_action": summary_ms(stats["time_to_action_s"]),
+        "stages": tracer.stage_stats(),
+    }, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
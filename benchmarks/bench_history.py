@@ -0,0 +1,85 @@
+"""
+Planner history serialization: re-serializing every entry per step (old
+_serialize_history_for_messages) vs. the append-only pre-serialized MessageHistory.
+
+Simulates a task of N steps; each step appends an assistant tool_call and a tool
+result of `--payload-kb` KB, then builds the message list for the next request.
+
+Usage:
+    python benchmarks/bench_history.py [--steps 50] [--payload-kb 16] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.planner.history import MessageHistory
+
+
+def legacy_serialize(history):
+    msgs = []
+    for e in history:
+        content = e.get("content", "")
+        if isinstance(content, (dict, list)):
+            content = json.dumps(content, ensure_ascii=False)
+        else:
+            content = str(content)
+        msgs.append({"role": e.get("role", "user"), "content": content})
+    return msgs
+
+
+def make_step(i, payload_kb):
+    call = {"thought": f"adım {i}: listeyi oku", "tool_call": {"action": "mouse_click", "params": {"x": i, "y": i, "button": "left"}}}
+    rows = [{"name": f"dosya_{i}_{j}.txt", "size": j * 17, "path": f"C:\\\\Users\\\\kullanıcı\\\\Belgeler\\\\{j}"} for j in range(payload_kb * 10)]
+    return call, {"status": "success", "result": rows}
+
+
+def run_legacy(steps, payload_kb):
+    history = [{"role": "user", "content": "görev"}]
+    t0 = time.perf_counter()
+    for i in range(steps):
+        legacy_serialize(history)
+        call, result = make_step(i, payload_kb)
+        history.append({"role": "assistant", "content": call})
+        history.append({"role": "tool", "content": result})
+    return time.perf_counter() - t0
+
+
+def run_incremental(steps, payload_kb):
+    history = MessageHistory()
+    history.append("user", "görev")
+    t0 = time.perf_counter()
+    for i in range(steps):
+        history.messages()
+        call, result = make_step(i, payload_kb)
+        history.append("assistant", call)
+        history.append("tool", result)
+    return time.perf_counter() - t0, history.token_count
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--steps", type=int, default=50)
+    ap.add_argument("--payload-kb", type=int, default=16, help="approximate tool result size")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    legacy = min(run_legacy(args.steps, args.payload_kb) for _ in range(args.repeat))
+    runs = [run_incremental(args.steps, args.payload_kb) for _ in range(args.repeat)]
+    incremental = min(r[0] for r in runs)
+
+    print(json.dumps({
+        "steps": args.steps,
+        "payload_kb": args.payload_kb,
+        "final_history_tokens_est": runs[0][1],
+        "legacy_s": round(legacy, 4),
+        "incremental_s": round(incremental, 4),
+        "speedup": round(legacy / incremental, 2) if incremental else None,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
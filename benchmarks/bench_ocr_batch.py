@@ -0,0 +1,79 @@
+"""
+Per-box OCR vs. batched mosaic OCR on a directory of saved screenshots.
+
+Detection runs once per screenshot; only the OCR stage is timed.
+
+Usage:
+    python benchmarks/bench_ocr_batch.py <screenshot_dir> [--model best.pt] [--lang tur] [--limit N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import cv2
+
+from src.agent.executor.ocr import MosaicOCR, crop_roi, ocr_single, threshold_roi
+from src.agent.executor.vision_parser import ScreenParser
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("screenshot_dir")
+    ap.add_argument("--model", default="runs/detect/yolo_ui_parser/weights/best.pt")
+    ap.add_argument("--lang", default="tur")
+    ap.add_argument("--limit", type=int, default=0, help="max screenshots (0 = all)")
+    args = ap.parse_args()
+
+    paths = sorted(p for p in Path(args.screenshot_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if args.limit:
+        paths = paths[:args.limit]
+    if not paths:
+        sys.exit(f"no screenshots in {args.screenshot_dir}")
+
+    parser = ScreenParser(model_path=args.model)
+    mosaic = MosaicOCR(lang=args.lang)
+
+    rows = []
+    for path in paths:
+        img = cv2.imread(str(path))
+        results = parser.model(img, conf=0.25, verbose=False)[0]
+        rois = [threshold_roi(crop_roi(img, *map(int, box.xyxy[0]))) for box in results.boxes]
+
+        t0 = time.perf_counter()
+        per_box = [ocr_single(r, args.lang) if r.size else "" for r in rois]
+        t1 = time.perf_counter()
+        batched = mosaic.recognize(rois)
+        t2 = time.perf_counter()
+
+        same = sum(a.split() == b.split() for a, b in zip(per_box, batched))
+        rows.append({
+            "image": path.name,
+            "boxes": len(rois),
+            "per_box_s": round(t1 - t0, 4),
+            "mosaic_s": round(t2 - t1, 4),
+            "speedup": round((t1 - t0) / (t2 - t1), 2) if t2 > t1 else None,
+            "text_agreement": round(same / len(rois), 3) if rois else 1.0,
+        })
+        print(json.dumps(rows[-1], ensure_ascii=False))
+
+    total_box = sum(r["per_box_s"] for r in rows)
+    total_mosaic = sum(r["mosaic_s"] for r in rows)
+    print(json.dumps({
+        "images": len(rows),
+        "boxes": sum(r["boxes"] for r in rows),
+        "per_box_total_s": round(total_box, 3),
+        "mosaic_total_s": round(total_mosaic, 3),
+        "speedup": round(total_box / total_mosaic, 2) if total_mosaic else None,
+        "mean_text_agreement": round(sum(r["text_agreement"] for r in rows) / len(rows), 3),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Policy decisions per second: the old per-call checks (is_path_safe over each allowed root,
+linear is_executable_allowed scan) vs. the compiled PolicyEngine (trie + LRU cache + sets).
+
+The workload is a stream of path checks drawn from a working set of `--distinct` paths
+(agents revisit the same folders and files), half inside and half outside the allowed
+roots, plus executable lookups against a `--apps` entry whitelist.
+
+Usage:
+    python benchmarks/bench_policy.py [--decisions 200000] [--distinct 500] [--roots 8] [--apps 200]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.security.policy import is_executable_allowed, is_path_safe
+from src.agent.security.policy_engine import PolicyConfig, PolicyEngine
+
+
+def workload(base: str, roots: int, distinct: int, decisions: int, seed: int = 0):
+    rng = random.Random(seed)
+    allowed = [os.path.join(base, f"root_{i}") for i in range(roots)]
+    paths = []
+    for i in range(distinct):
+        if i % 2:
+            parent = rng.choice(allowed)
+        else:
+            parent = os.path.join(base, f"outside_{i % 7}")
+        depth = rng.randint(1, 5)
+        parts = [f"klasor_{rng.randint(0, 50)}" for _ in range(depth)]
+        paths.append(os.path.join(parent, *parts, f"dosya_{i}.txt"))
+    stream = [rng.choice(paths) for _ in range(decisions)]
+    return allowed, stream
+
+
+def rate(count: int, seconds: float) -> float:
+    return round(count / seconds, 1) if seconds > 0 else float("inf")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--decisions", type=int, default=200000)
+    ap.add_argument("--distinct", type=int, default=500, help="distinct paths in the working set")
+    ap.add_argument("--roots", type=int, default=8, help="allowed root directories")
+    ap.add_argument("--apps", type=int, default=200, help="executable whitelist size")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as base:
+        roots, stream = workload(base, args.roots, args.distinct, args.decisions)
+        apps = [f"uygulama_{i}.exe" for i in range(args.apps)]
+        app_stream = [f"UYGULAMA_{i % (args.apps * 2)}.EXE" for i in range(args.decisions)]
+
+        t0 = time.perf_counter()
+        legacy = [any(is_path_safe(p, r) for r in roots) for p in stream]
+        legacy_path_s = time.perf_counter() - t0
+
+        engine = PolicyEngine(config=PolicyConfig(allowed_paths=roots), base_roots=(), executables=apps,
+                              cache_size=max(1024, args.distinct * 2))
+        t0 = time.perf_counter()
+        compiled = [engine.check_path(p).allowed for p in stream]
+        engine_path_s = time.perf_counter() - t0
+
+        cold = PolicyEngine(config=PolicyConfig(allowed_paths=roots), base_roots=(), cache_size=1)
+        t0 = time.perf_counter()
+        for p in stream:
+            cold.check_path(p)
+        uncached_path_s = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        legacy_apps = [is_executable_allowed(a, apps) for a in app_stream]
+        legacy_app_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        engine_apps = [engine.check_executable(a).allowed for a in app_stream]
+        engine_app_s = time.perf_counter() - t0
+
+    if legacy != compiled:
+        raise SystemExit("path decisions differ between is_path_safe and PolicyEngine")
+    if legacy_apps != engine_apps:
+        raise SystemExit("executable decisions differ")
+
+    n = args.decisions
+    print(json.dumps({
+        "config": vars(args),
+        "allowed_fraction": round(sum(compiled) / n, 3),
+        "path": {
+            "legacy_per_s": rate(n, legacy_path_s),
+            "engine_per_s": rate(n, engine_path_s),
+            "engine_uncached_per_s": rate(n, uncached_path_s),
+            "speedup": round(legacy_path_s / engine_path_s, 1),
+            "cache_hit_rate": round(engine.hits / n, 3),
+        },
+        "executable": {
+            "legacy_per_s": rate(n, legacy_app_s),
+            "engine_per_s": rate(n, engine_app_s),
+            "speedup": round(legacy_app_s / engine_app_s, 1),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Set-of-marks overlay cost per frame.
+
+A 1080p frame (synthetic, or --image) is scaled once the way CaptureBackend.capture does
+for the encoder (fit_ms, paid by capture whether or not marks are drawn), then
+MarkRenderer.render draws `--elements` UI-like boxes with their id labels onto a copy of
+it `--repeats` times and encodes the marked image (the one encode a marked frame gets,
+see PlannerClient.screen_capture). Reports render, encode and render + encode p50/p95 in ms
+(the render target is < 10 ms) and how many labels could not avoid another label.
+
+Usage:
+    python benchmarks/bench_som_overlay.py [--elements 150] [--repeats 200]
+        [--max-dimension 1280 | --model-resolution 896x896] [--image screenshot.png]
+        [--format PNG|JPEG|WEBP] [--quality 85]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from PIL import Image
+
+from src.agent.utils.frame_transform import fit_image
+from src.agent.utils.screen_capture import CaptureSettings, encode_fitted
+from src.agent.utils.som_overlay import MarkRenderer
+from src.agent.utils.tracing import percentile
+
+
+def ui_elements(count: int, size=(1920, 1080), seed: int = 0):
+    """
+    Buttons / fields / list rows in loose columns, the way a parsed desktop looks.
+    """
+    rng = random.Random(seed)
+    w, h = size
+    elements = []
+    for i in range(count):
+        bw, bh = rng.choice([(90, 28), (240, 30), (32, 32), (400, 24), (140, 40)])
+        x = rng.randrange(0, w - bw, 8)
+        y = rng.randrange(0, h - bh, 4)
+        elements.append({"id": i, "type": "button", "content": "", "bbox": {"x": x, "y": y, "w": bw, "h": bh}})
+    return elements
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--elements", type=int, default=150)
+    ap.add_argument("--repeats", type=int, default=200)
+    ap.add_argument("--max-dimension", type=int, default=1280)
+    ap.add_argument("--model-resolution", default=None, help="WxH, e.g. 896x896 (overrides --max-dimension)")
+    ap.add_argument("--image", default=None, help="screenshot to mark (default: synthetic 1920x1080)")
+    ap.add_argument("--format", default="PNG")
+    ap.add_argument("--quality", type=int, default=85)
+    args = ap.parse_args()
+
+    if args.image:
+        frame = Image.open(args.image).convert("RGB")
+    else:
+        frame = Image.fromarray(np.random.default_rng(0).integers(0, 255, (1080, 1920, 3), dtype=np.uint8))
+    resolution = tuple(int(v) for v in args.model_resolution.lower().split("x")) if args.model_resolution else None
+    elements = ui_elements(args.elements, frame.size)
+
+    t0 = time.perf_counter()
+    scaled, transform = fit_image(frame, resolution, True, args.max_dimension)
+    fit_ms = (time.perf_counter() - t0) * 1000.0
+
+    settings = CaptureSettings(image_format=args.format, quality=args.quality)
+    renderer = MarkRenderer()
+    renderer.render(scaled, elements, transform)   # glyph atlas / label patches
+    times, encode_times, totals = [], [], []
+    for _ in range(args.repeats):
+        t0 = time.perf_counter()
+        marked = renderer.render(scaled, elements, transform)
+        t1 = time.perf_counter()
+        encode_fitted(marked, settings)
+        t2 = time.perf_counter()
+        times.append((t1 - t0) * 1000.0)
+        encode_times.append((t2 - t1) * 1000.0)
+        totals.append((t2 - t0) * 1000.0)
+
+    out = np.array(scaled)
+    marks = [(e["id"], transform.rect_to_model(*MarkRenderer._rect(e))) for e in elements]
+    placed = renderer.draw(out, marks)
+    collisions = sum(
+        1 for i, a in enumerate(placed) if any(
+            a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+            for b in placed[:i])
+    )
+
+    print(json.dumps({
+        "config": vars(args),
+        "frame": list(frame.size),
+        "marked_image": list(scaled.size),
+        "fit_ms": round(fit_ms, 2),
+        "render_p50_ms": round(percentile(times, 50), 3),
+        "render_p95_ms": round(percentile(times, 95), 3),
+        "encode_p50_ms": round(percentile(encode_times, 50), 3),
+        "encode_p95_ms": round(percentile(encode_times, 95), 3),
+        "render_encode_p50_ms": round(percentile(totals, 50), 3),
+        "render_encode_p95_ms": round(percentile(totals, 95), 3),
+        "labels": len(placed),
+        "labels_overlapping": collisions,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+keyboard_type throughput: one raw send_keys of the whole text (old tools.keyboard_type)
+vs. the text-entry engine (escaped chunks for short text, clipboard paste for long text).
+
+Input goes to a RecordingBackend, so nothing is typed: chars/sec is computed from the
+simulated time of each timing profile (keystroke interval, pauses, paste settle). The
+engine's own planning cost (escape + chunking) is measured as real CPU time. `mangled`
+tells whether the old path would have typed the text wrongly (unescaped {}+^%~()).
+
+Usage:
+    python benchmarks/bench_text_entry.py [--sizes 16,64,256,1024,4096] [--profile human] [--repeat 200]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.executor.input_backend import RecordingBackend
+from src.agent.executor.text_entry import SEND_KEYS_SPECIALS, count_keystrokes, plan_text_entry
+
+SAMPLE = "Fatura #2024-117 (KDV %20 dahil): toplam {1.250,00 TL} + kargo ~35 TL\n"
+
+
+def make_text(size: int) -> str:
+    return (SAMPLE * (size // len(SAMPLE) + 1))[:size]
+
+
+def legacy_seconds(text: str, backend: RecordingBackend) -> float:
+    # old path: send_keys(text, with_spaces=True) -> one keystroke per char, one pause
+    profile = backend.profile
+    return profile.key_interval * count_keystrokes(text) + profile.action_pause
+
+
+def engine_seconds(text: str, backend: RecordingBackend) -> float:
+    backend.clear()
+    backend.type_text(text)
+    return backend.elapsed
+
+
+def chars_per_second(chars: int, seconds: float):
+    return round(chars / seconds, 1) if seconds > 0 else None
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="16,64,256,1024,4096", help="comma-separated text lengths")
+    ap.add_argument("--profile", default="human", help="timing profile (instant/fast/human)")
+    ap.add_argument("--repeat", type=int, default=200, help="repetitions for the planning CPU time")
+    args = ap.parse_args()
+
+    backend = RecordingBackend(args.profile)
+    rows = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        text = make_text(size)
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            steps = plan_text_entry(text)
+        plan_s = (time.perf_counter() - t0) / args.repeat
+
+        legacy_s = legacy_seconds(text, backend)
+        engine_s = engine_seconds(text, backend)
+        rows.append({
+            "chars": size,
+            "strategy": "+".join(sorted({s.method for s in steps})),
+            "send_calls": len(steps),
+            "mangled": any(ch in SEND_KEYS_SPECIALS for ch in text),
+            "legacy_chars_per_s": chars_per_second(size, legacy_s),
+            "engine_chars_per_s": chars_per_second(size, engine_s),
+            "speedup": round(legacy_s / engine_s, 2) if engine_s > 0 else None,
+            "plan_us": round(plan_s * 1e6, 2),
+            "plan_chars_per_s": chars_per_second(size, plan_s),
+        })
+
+    print(json.dumps({"profile": args.profile, "results": rows}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Vision parser throughput over a directory of saved screenshots.
+
+Runs ScreenParser.parse_batch (batched YOLO, decode prefetched on a background thread) and
+reports images/sec, per-stage latency (decode, detect, OCR, postprocess; decode_wait is
+the time inference sat waiting for decoded frames) and the peak RSS of the process.
+With --sequential the one-image-at-a-time path (imread + parse) is timed as well, and with
+--incremental the screenshots are parsed in name order as consecutive frames of one session
+(parse_incremental: only changed regions are re-detected; diff is the tile-hash stage).
+
+The OCR cache is off unless --ocr-cache is given, so repeated screenshots and the second
+run do not get free OCR.
+
+Usage:
+    python benchmarks/bench_vision_parser.py <screenshot_dir> [--model best.pt] [--batch 8]
+        [--prefetch 2] [--limit N] [--ocr-workers N] [--sequential] [--incremental] [--ocr-cache]
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.agent.executor.vision_parser import ScreenParser
+from src.agent.utils import tracing
+
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+STAGES = ("decode", "decode_wait", "diff", "detect", "ocr", "postprocess")
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far (MB).
+    """
+    try:
+        import resource
+    except ImportError:
+        # Windows: peak working set
+        import psutil
+        return round(psutil.Process().memory_info().peak_wset / 2 ** 20, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def stage_report(tracer: tracing.Tracer, images: int):
+    report = {}
+    stats = tracer.stage_stats()
+    for name in STAGES:
+        spans = [s for s in tracer.spans if s.name == name]
+        if not spans:
+            continue
+        total = sum(s.duration for s in spans) * 1000.0
+        report[name] = {
+            "total_ms": round(total, 3),
+            "per_image_ms": round(total / images, 3),
+            "calls": len(spans),
+            "p50_ms": stats[name]["p50_ms"],
+            "p95_ms": stats[name]["p95_ms"],
+        }
+    return report
+
+
+def timed(parser: ScreenParser, run, images: int):
+    tracer = tracing.Tracer()
+    previous = tracing.set_tracer(tracer)
+    try:
+        # parser progress prints go to stderr; stdout carries only the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            t0 = time.perf_counter()
+            elements = run()
+            elapsed = time.perf_counter() - t0
+    finally:
+        tracing.set_tracer(previous)
+    return elements, {
+        "wall_s": round(elapsed, 3),
+        "images_per_s": round(images / elapsed, 2) if elapsed > 0 else None,
+        "elements": sum(len(e) for e in elements),
+        "stages": stage_report(tracer, images),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("screenshot_dir")
+    ap.add_argument("--model", default="runs/detect/yolo_ui_parser/weights/best.pt")
+    ap.add_argument("--batch", type=int, default=8, help="images per YOLO call")
+    ap.add_argument("--prefetch", type=int, default=2, help="batches decoded ahead (0 = no decode thread)")
+    ap.add_argument("--limit", type=int, default=0, help="max screenshots (0 = all)")
+    ap.add_argument("--ocr-workers", type=int, default=None, help="OCR worker processes (0 = in-process)")
+    ap.add_argument("--sequential", action="store_true", help="also time imread + parse() per image")
+    ap.add_argument("--incremental", action="store_true", help="also time parse_incremental over the frame sequence")
+    ap.add_argument("--ocr-cache", action="store_true", help="keep the OCR result cache on")
+    args = ap.parse_args()
+
+    paths = sorted(str(p) for p in Path(args.screenshot_dir).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    if args.limit:
+        paths = paths[:args.limit]
+    if not paths:
+        sys.exit(f"no screenshots in {args.screenshot_dir}")
+
+    with contextlib.redirect_stdout(sys.stderr):
+        parser = ScreenParser(model_path=args.model, ocr_workers=args.ocr_workers,
+                              ocr_cache_size=4096 if args.ocr_cache else 0)
+    rss_loaded = peak_rss_mb()
+    try:
+        # warm-up: first YOLO call loads weights onto the device, first OCR call starts the workers
+        with contextlib.redirect_stdout(sys.stderr):
+            parser.parse(paths[0])
+
+        report = {"config": vars(args), "images": len(paths), "peak_rss_after_load_mb": rss_loaded}
+        batched, report["batch"] = timed(
+            parser, lambda: parser.parse_batch(paths, batch_size=args.batch, prefetch=args.prefetch), len(paths))
+        report["batch"]["peak_rss_mb"] = peak_rss_mb()
+        if args.sequential:
+            single, report["sequential"] = timed(parser, lambda: [parser.parse(p) for p in paths], len(paths))
+            report["sequential"]["peak_rss_mb"] = peak_rss_mb()
+            report["speedup"] = round(report["sequential"]["wall_s"] / report["batch"]["wall_s"], 2)
+            same = sum([e["bbox"] for e in a] == [e["bbox"] for e in b] for a, b in zip(batched, single))
+            report["same_boxes_fraction"] = round(same / len(paths), 3)
+        if args.incremental:
+            parser.reset_incremental()
+            _, report["incremental"] = timed(parser, lambda: [parser.parse_incremental(p) for p in paths], len(paths))
+            report["incremental"]["peak_rss_mb"] = peak_rss_mb()
+            # frames that needed YOLO at all (full frame or one batch of dirty crops)
+            detect = report["incremental"]["stages"].get("detect", {"calls": 0})
+            report["incremental"]["detect_calls"] = detect["calls"]
+    finally:
+        parser.close()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Local stand-in for the Ollama HTTP API (POST /api/chat only).
+
+The reply text comes from a `responder(request_json) -> str` callback, so a benchmark can
+script the planner's answers. Latency is simulated as a time-to-first-token delay followed
+by `tokens_per_second` (4-character "tokens"); streaming requests get NDJSON chunks at that
+rate, non-streaming ones a single reply after the full generation time.
+
+    with FakeOllamaServer(responder, ttft=0.05, tokens_per_second=200) as server:
+        os.environ["OLLAMA_HOST"] = server.url
+"""
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+CHARS_PER_TOKEN = 4
+
+
+def _chunk(model: str, content: str, done: bool) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "message": {"role": "assistant", "content": content},
+        "done": done,
+        **({"done_reason": "stop"} if done else {}),
+    }
+
+
+class FakeOllamaServer:
+
+    def __init__(
+        self,
+        responder: Callable[[Dict[str, Any]], str],
+        ttft: float = 0.0,
+        tokens_per_second: float = 0.0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ) -> None:
+        self.responder = responder
+        self.ttft = ttft
+        self.tokens_per_second = tokens_per_second
+        self.requests = 0
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def start(self) -> "FakeOllamaServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fake-ollama", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "FakeOllamaServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def do_POST(self) -> None:
+                if self.path != "/api/chat":
+                    self.send_error(404)
+                    return
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                server.requests += 1
+                model = body.get("model", "fake")
+                # an empty message list is a model-load request (PlannerClient.warm_up)
+                text = server.responder(body) if body.get("messages") else ""
+                tokens = [text[i:i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+                delay = server.token_delay()
+
+                if server.ttft > 0:
+                    time.sleep(server.ttft)
+                if not body.get("stream", True):
+                    if delay:
+                        time.sleep(delay * len(tokens))
+                    payload = json.dumps(_chunk(model, text, True)).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(payload)))
+                    self.end_headers()
+                    self.wfile.write(payload)
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in tokens:
+                        if delay:
+                            time.sleep(delay)
+                        self._write_chunk(json.dumps(_chunk(model, token, False)) + "\n")
+                    self._write_chunk(json.dumps(_chunk(model, "", True)) + "\n")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    # client stopped reading (e.g. streaming parser saw the closing brace)
+                    self.close_connection = True
+
+            def _write_chunk(self, line: str) -> None:
+                data = line.encode("utf-8")
+                self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
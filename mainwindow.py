@@ -12,7 +12,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QColor, QFont
 from PyQt5 import QtWidgets, QtGui, QtCore
 from src.cursor.set_cursor import restore_cursor
-from src.orchestrator import run_orchestrator
+from src.orchestrator import run_orchestrator, run_orchestrator_async, iterate_steps
 
 
 class UiMessage:
@@ -27,9 +27,13 @@ class OrchestratorWorker(QObject):
     step_signal = pyqtSignal(object)
     finished = pyqtSignal()
 
-    def __init__(self, prompt: str):
+    def __init__(self, prompt: str, pipelined: bool = False, stream: bool = False):
         super().__init__()
         self.prompt = prompt
+        # pipelined=True runs the asyncio orchestrator (overlapping capture / LLM / tools)
+        self.pipelined = pipelined
+        # stream=True shows the thought while it is generated and runs the tool_call early
+        self.stream = stream
         self._thread = None
 
     def start(self):
@@ -39,7 +43,11 @@ class OrchestratorWorker(QObject):
 
     def _run(self):
         try:
-            for step in run_orchestrator(self.prompt):
+            if self.pipelined:
+                steps = iterate_steps(run_orchestrator_async(self.prompt, stream=self.stream))
+            else:
+                steps = run_orchestrator(self.prompt, stream=self.stream)
+            for step in steps:
                 # emit each step to the main thread
                 self.step_signal.emit(step)
                 # tiny sleep to allow UI to process events smoothly
@@ -156,6 +164,8 @@ class MainWindow(QMainWindow):
 
         # store worker reference to keep alive
         self._worker = None
+        # thought bubble being filled by thought_delta steps: (item, label)
+        self._live_thought = None
 
     def on_new_chat(self):
         self.conv_list.addItem(f"Conversation {self.conv_list.count()+1}")
@@ -185,16 +195,25 @@ class MainWindow(QMainWindow):
         step has keys: type, content
         types:
           - user_prompt: we already rendered user message; ignore or show brief note
+          - thought_delta: streamed piece of the next thought; grows a live gray bubble
           - thought: show planner 'thought' as gray bubble (content is planner dict)
           - tool_result: show result block
           - assistant: show assistant final response
+          - timing: per-step trace spans (not rendered)
         """
         stype = step.get("type")
         content = step.get("content")
+        if stype == "timing":
+            return
         if stype == "user_prompt":
             # optionally render a small system note
             note = UiMessage(sender="thought", content=f"Prompt submitted: {content}")
             self._append_message(note)
+        elif stype == "thought_delta":
+            if self._live_thought is None:
+                item = self._append_message(UiMessage(sender="thought", content=""))
+                self._live_thought = (item, self.msg_list.itemWidget(item).findChild(QLabel))
+            self._set_live_thought(self._live_thought[1].text() + str(content))
         elif stype == "thought":
             # planner thought is typically a dict with 'thought' and maybe 'tool_call'
             # render the 'thought' string if available, otherwise dump dict
@@ -202,8 +221,13 @@ class MainWindow(QMainWindow):
                 thought_text = content.get("thought") or str(content)
             else:
                 thought_text = str(content)
-            thought_msg = UiMessage(sender="thought", content=str(thought_text))
-            self._append_message(thought_msg)
+            if self._live_thought is not None:
+                # streamed bubble already on screen: settle it on the final text
+                self._set_live_thought(str(thought_text))
+                self._live_thought = None
+            else:
+                thought_msg = UiMessage(sender="thought", content=str(thought_text))
+                self._append_message(thought_msg)
         elif stype == "tool_result":
             # tool result is dict; render as monospaced block
             import json
@@ -229,8 +253,16 @@ class MainWindow(QMainWindow):
         self.msg_list.setItemWidget(item, widget)
         # auto-scroll to bottom
         self.msg_list.scrollToBottom()
+        return item
+
+    def _set_live_thought(self, text: str):
+        item, label = self._live_thought
+        label.setText(text)
+        item.setSizeHint(self.msg_list.itemWidget(item).sizeHint())
+        self.msg_list.scrollToBottom()
 
     def on_worker_finished(self):
+        self._live_thought = None
         self.exitMiniMode()
         pass
 
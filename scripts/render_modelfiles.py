@@ -0,0 +1,69 @@
+"""
+Regenerate the SYSTEM prompt of every Ollama Modelfile in modelfile/.
+
+The SYSTEM block is the planner's react prompt with the tool list, tool names and batch
+limit filled in from the executor's tool registry (TOOL_REGISTRY.render_prompt), the same
+text PlannerClient sends, so the Modelfiles cannot drift from the tools the executor runs.
+FROM / PARAMETER lines and comments are kept as they are.
+
+Usage:
+    python scripts/render_modelfiles.py           # rewrite stale Modelfiles
+    python scripts/render_modelfiles.py --check   # exit 1 if any Modelfile is stale
+"""
+import argparse
+import os
+import re
+import sys
+from pathlib import Path
+from typing import List
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(REPO_ROOT))
+
+from src.agent.executor.executor_core import TOOL_REGISTRY
+
+REACT_PROMPT = REPO_ROOT / "src" / "agent" / "planner" / "react_prompt.txt"
+MODELFILE_DIR = REPO_ROOT / "modelfile"
+
+_SYSTEM_BLOCK = re.compile(r'^SYSTEM """\n.*?\n"""', re.DOTALL | re.MULTILINE)
+
+
+def system_prompt() -> str:
+    return TOOL_REGISTRY.render_prompt(REACT_PROMPT.read_text(encoding="utf-8")).rstrip("\n")
+
+
+def render_modelfile(text: str, prompt: str) -> str:
+    """
+    `text` with its SYSTEM \"\"\"...\"\"\" block replaced by `prompt`.
+    """
+    if '"""' in prompt:
+        raise ValueError('the system prompt must not contain """')
+    if not _SYSTEM_BLOCK.search(text):
+        raise ValueError('no SYSTEM """ block found')
+    return _SYSTEM_BLOCK.sub(lambda _: f'SYSTEM """\n{prompt}\n"""', text, count=1)
+
+
+def stale_modelfiles(directory: Path = MODELFILE_DIR) -> List[Path]:
+    prompt = system_prompt()
+    return [path for path in sorted(directory.glob("*Modelfile*"))
+            if render_modelfile(path.read_text(encoding="utf-8"), prompt) != path.read_text(encoding="utf-8")]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--check", action="store_true", help="only report stale Modelfiles")
+    args = ap.parse_args()
+
+    stale = stale_modelfiles()
+    if args.check:
+        for path in stale:
+            print(f"stale: {os.path.relpath(path, REPO_ROOT)}")
+        sys.exit(1 if stale else 0)
+    prompt = system_prompt()
+    for path in stale:
+        path.write_text(render_modelfile(path.read_text(encoding="utf-8"), prompt), encoding="utf-8")
+        print(f"rendered: {os.path.relpath(path, REPO_ROOT)}")
+
+
+if __name__ == "__main__":
+    main()
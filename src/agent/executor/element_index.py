@@ -0,0 +1,64 @@
+"""
+Spatial index over the latest ScreenParser output.
+
+  - element id -> element / bbox center: dict lookup, O(1)
+  - point -> element: uniform grid of `cell_size` px; each element is registered in every
+    cell its bbox overlaps, so a lookup only inspects the few elements of one cell
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ElementIndex:
+    def __init__(self, cell_size: int = 64) -> None:
+        self.cell_size = cell_size
+        self._by_id: Dict[int, Dict[str, Any]] = {}
+        self._grid: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def update(self, elements: List[Dict[str, Any]]) -> None:
+        """
+        Replace the index with a new element list (ScreenParser.parse output).
+        """
+        by_id: Dict[int, Dict[str, Any]] = {}
+        grid: Dict[Tuple[int, int], List[Dict[str, Any]]] = {}
+        cs = self.cell_size
+        for element in elements:
+            by_id[int(element["id"])] = element
+            b = element["bbox"]
+            if b["w"] <= 0 or b["h"] <= 0:
+                continue
+            for cy in range(b["y"] // cs, (b["y"] + b["h"] - 1) // cs + 1):
+                for cx in range(b["x"] // cs, (b["x"] + b["w"] - 1) // cs + 1):
+                    grid.setdefault((cx, cy), []).append(element)
+        self._by_id, self._grid = by_id, grid
+
+    def clear(self) -> None:
+        self.update([])
+
+    def get(self, element_id: int) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(int(element_id))
+
+    def center(self, element_id: int) -> Tuple[int, int]:
+        """
+        Bbox center of an element. Raises ValueError for an unknown id.
+        """
+        element = self.get(element_id)
+        if element is None:
+            raise ValueError(f"unknown element id: {element_id} (known: {len(self._by_id)} elements)")
+        b = element["bbox"]
+        return b["x"] + b["w"] // 2, b["y"] + b["h"] // 2
+
+    def at(self, x: int, y: int) -> Optional[Dict[str, Any]]:
+        """
+        Smallest element whose bbox contains (x, y), or None.
+        """
+        best, best_area = None, None
+        for element in self._grid.get((int(x) // self.cell_size, int(y) // self.cell_size), ()):
+            b = element["bbox"]
+            if b["x"] <= x < b["x"] + b["w"] and b["y"] <= y < b["y"] + b["h"]:
+                area = b["w"] * b["h"]
+                if best_area is None or area < best_area:
+                    best, best_area = element, area
+        return best
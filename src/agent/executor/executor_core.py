@@ -2,22 +2,48 @@
 import os
 import subprocess
 import traceback
-from typing import Dict, Any
-import pywinauto  # Hata yakalama için import gerekli
-import send2trash   # Hata yakalama için import gerekli
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 # Kendi modüllerimiz
 from . import tools
+from .element_index import ElementIndex
+from .tool_registry import MAX_BATCH_ACTIONS, ToolCallError, ToolRegistry
+from ..utils import tracing
+
+# Kurtarılabilir (planner'a 'error' olarak dönen) hata türleri.
+# pywinauto / send2trash yalnızca Windows'ta kurulu; yoksa (Linux CI, benchmark) ilgili türler atlanır.
+RECOVERABLE_ERRORS = (
+    # Dosya Sistemi Hataları
+    FileNotFoundError, IsADirectoryError, NotADirectoryError,
+    PermissionError, FileExistsError,
+    # Diğer Araç Hataları
+    subprocess.SubprocessError,
+    ValueError, #örn: wait('beş') -> float('beş')
+    TypeError   #örn: read_file() -> parametre eksik
+)
+try:
+    import pywinauto  # UI Otomasyon Hataları
+    RECOVERABLE_ERRORS += (pywinauto.findwindows.WindowNotFoundError,)
+except ImportError:
+    pass
+try:
+    import send2trash
+    RECOVERABLE_ERRORS += (send2trash.exceptions.TrashPermissionError,)
+except ImportError:
+    pass
 
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
-from ..security.policy import is_path_safe, ALLOWED_BASE_PATH
+from ..security.policy import ALLOWED_BASE_PATH
+from ..security.policy_engine import PolicyEngine, get_policy_engine
 
 #
-# --- ARAÇ YÖNLENDİRME HARİTASI (NİHAİ) ---
-# 'action' (string) adını, 'tools.py' içindeki 'aptal' fonksiyona eşler
+# --- ARAÇ KAYDI (NİHAİ) ---
+# 'action' (string) adını, 'tools.py' içindeki 'aptal' fonksiyona eşler.
+# İmzalar import sırasında bir kez okunur: parametreler araç çağrılmadan ÖNCE
+# doğrulanır / dönüştürülür ve sistem istemindeki araç listesi buradan üretilir.
 #
-TOOL_DISPATCH_MAP = {
+TOOL_REGISTRY = ToolRegistry({
     # UI tools (3)
     "mouse_click": tools.mouse_click,
     "mouse_move": tools.mouse_move,
@@ -25,74 +51,92 @@ TOOL_DISPATCH_MAP = {
     "keyboard_type": tools.keyboard_type,
     "keyboard_press": tools.keyboard_press,
     "scroll": tools.scroll,
+
+    # Element tools (2) - vision parser ID'si ile çalışır
+    "click_element": tools.click_element,
+    "type_into_element": tools.type_into_element,
     
-    # Wait tool (1)
+    # Wait tools (3)
     "wait": tools.wait, # JSON döndürmeyen, aptal versiyon
-}
+    "wait_until_stable": tools.wait_until_stable, # ekran durulunca döner
+    "wait_until_changed": tools.wait_until_changed, # ekran değişince döner
+})
+
+# Eski 'action' -> fonksiyon haritası (salt okunur görünüm)
+TOOL_DISPATCH_MAP = TOOL_REGISTRY.functions
+
+# Sonucuna, tıklanan noktadaki eleman eklenen ham koordinat araçları
+POINTER_TOOLS = {"mouse_click", "mouse_double_click"}
 
 
 class ExecutorCore:
-    def __init__(self):
+    def __init__(self, dispatch_map: Optional[Dict[str, Callable[..., Any]]] = None,
+                 policy_engine: Optional[PolicyEngine] = None):
         """
         Executor, politikayı (Policy) başlatır.
         Politika, LLM (Planner) tarafından DEĞİŞTİRİLEMEZ.
+        dispatch_map: 'action' -> araç eşlemesi (varsayılan TOOL_REGISTRY);
+        benchmark / testlerde gerçek girdi göndermeyen araçlar vermek için.
+        policy_engine: configs/policies.yaml'dan derlenmiş politika (varsayılan: süreç genelindeki motor).
         """
+        self.registry = TOOL_REGISTRY if dispatch_map is None else ToolRegistry(dispatch_map)
+        self.dispatch_map = self.registry.functions
         self.policy = {
             # Sadece bu dizin ve alt dizinlerine izin ver
             "base_path": ALLOWED_BASE_PATH, 
-            
-            # Sadece bu uygulamaların başlatılmasına izin ver
-            "app_whitelist": [
-                "notepad.exe",
-                "calc.exe",
-                "mspaint.exe",
-                "Spotify.exe"
-            ], # POWERSHELL.EXE YOK.
+            # uygulama beyaz listesi: configs/policies.yaml (allowed_executables), policy_engine uygular
         }
+        self.policy_engine = policy_engine if policy_engine is not None else get_policy_engine()
+        # Son ScreenParser çıktısının uzamsal indeksi (ID -> bbox merkezi, nokta -> eleman)
+        self.element_index = ElementIndex()
+        # Araçların keyword-only (LLM'e gösterilmeyen) parametrelerine enjekte edilen nesneler
+        self.injectables = {"index": self.element_index}
         print(f"--- ExecutorCore başlatıldı. Güvenli Kök Dizin: {self.policy['base_path']} ---")
 
-    def execute_command(self, tool_call: Dict[str, Any]) -> Dict[str, Any]:
+    def update_elements(self, elements) -> None:
+        """
+        Vision parser'ın son eleman listesini indekse yükler (click_element / type_into_element için).
+        """
+        self.element_index.update(elements)
+
+    def execute_command(self, tool_call: Dict[str, Any], check_policy: bool = True) -> Dict[str, Any]:
         """
         Planner'dan (LLM) 'tool_call' JSON'unu alır,
         1. Politikayı uygular (Güvenlik)
         2. Aracı çalıştırır (İş)
         3. Hataları yakalar (Sağlamlık)
         4. Planner'a 'status' JSON'unu döndürür.
+        check_policy=False yalnızca politikası önceden kontrol edilmiş çağrılar içindir (execute_batch).
         """
         action = tool_call.get("action")
-        parameters = tool_call.get("parameters", {})
 
-        if not action:
-            return {"status": "error", "error": "JSON'da 'action' anahtarı eksik."}
-
-        if action not in TOOL_DISPATCH_MAP:
-            return {"status": "error", "error": f"Bilinmeyen eylem (action): '{action}'"}
+        parameters, error = self._bind_call(tool_call)
+        if error:
+            return {"status": "error", "error": error}
 
         try:
             # 1. GÜVENLİK: Politikayı uygula (Çağırmadan ÖNCE)
-            self._enforce_policy(action, parameters)
+            if check_policy:
+                with tracing.span("policy"):
+                    self._enforce_policy(action, parameters)
 
             # 2. İŞ: "Aptal" aracı çağır
-            tool_function = TOOL_DISPATCH_MAP[action]
-            result = tool_function(**parameters)
+            spec = self.registry.get(action)
+            injected = {name: self.injectables[name] for name in spec.injected}
+            with tracing.span("execute", action=action):
+                result = spec.func(**parameters, **injected)
             
             # 3. BAŞARI: Başarılı sonucu JSON'a paketle
             print(f"--- EXECUTOR BAŞARILI (Action: {action}) ---\nSonuç: {result}\n--- END RESULT ---")
-            return {"status": "success", "result": result}
+            response = {"status": "success", "result": result}
+            if action in POINTER_TOOLS:
+                hit = self._element_at(parameters)
+                if hit is not None:
+                    response["element"] = hit
+            return response
         
         # 4. HATA YÖNETİMİ (Sağlamlık)
-        except (
-            # Dosya Sistemi Hataları
-            FileNotFoundError, IsADirectoryError, NotADirectoryError,
-            PermissionError, FileExistsError,
-            # UI Otomasyon Hataları
-            pywinauto.findwindows.WindowNotFoundError,
-            # Diğer Araç Hataları
-            send2trash.exceptions.TrashPermissionError,
-            subprocess.SubprocessError,
-            ValueError, #örn: wait('beş') -> float('beş')
-            TypeError   #örn: read_file() -> parametre eksik
-        ) as e:
+        except RECOVERABLE_ERRORS as e:
             # Öngörülen, kurtarılabilir hatalar
             error_type = type(e).__name__
             return {"status": "error", "error": f"{error_type}: {e}"}
@@ -102,33 +146,104 @@ class ExecutorCore:
             print(f"--- FATAL EXECUTOR ERROR (Action: {action}) ---\n{traceback.format_exc()}\n--- END TRACE ---")
             return {"status": "fatal", "error": f"Executor iç hatası: {error_type}: {e}"}
 
+    def execute_batch(self, tool_calls: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Planner'ın tek turda gönderdiği 'tool_calls' listesini (en fazla MAX_BATCH_ACTIONS eylem) çalıştırır.
+        1. Tüm liste ÖNCE doğrulanır ve politikadan geçirilir; tek bir ihlal bile varsa
+           hiçbir eylem çalıştırılmaz.
+        2. Eylemler sırayla çalıştırılır; ilk başarısız eylemde durulur, kalanlar 'skipped' olur.
+        Dönüş: {"status", "results": [eylem başına sonuç], "completed": başarılı eylem sayısı}
+        """
+        if not isinstance(tool_calls, list) or not tool_calls:
+            return {"status": "error", "error": "'tool_calls' boş olmayan bir liste olmalı.", "results": [], "completed": 0}
+        if len(tool_calls) > MAX_BATCH_ACTIONS:
+            # istemdeki sınır (MAX_BATCH_ACTIONS) burada da uygulanır
+            return self._batch_rejected(tool_calls, MAX_BATCH_ACTIONS,
+                                        f"bir batch en fazla {MAX_BATCH_ACTIONS} eylem içerebilir ({len(tool_calls)} gönderildi).")
+
+        with tracing.span("policy", batch=len(tool_calls)):
+            for i, tool_call in enumerate(tool_calls):
+                if not isinstance(tool_call, dict):
+                    return self._batch_rejected(tool_calls, i, "tool_call bir JSON nesnesi olmalı.")
+                parameters, error = self._bind_call(tool_call)
+                if error:
+                    return self._batch_rejected(tool_calls, i, error)
+                try:
+                    self._enforce_policy(tool_call["action"], parameters)
+                except (PermissionError, ValueError) as e:
+                    return self._batch_rejected(tool_calls, i, f"{type(e).__name__}: {e}")
+
+        results: List[Dict[str, Any]] = []
+        status = "success"
+        for tool_call in tool_calls:
+            if status != "success":
+                results.append({"status": "skipped", "action": tool_call["action"]})
+                continue
+            result = self.execute_command(tool_call, check_policy=False)
+            results.append({"action": tool_call["action"], **result})
+            status = result.get("status", "error")
+        completed = sum(1 for r in results if r["status"] == "success")
+        return {"status": status, "results": results, "completed": completed}
+
+    def _batch_rejected(self, tool_calls: List[Any], index: int, error: str) -> Dict[str, Any]:
+        """
+        Ön kontrolden geçemeyen batch: hiçbir eylem çalıştırılmadı.
+        """
+        return {
+            "status": "error",
+            "error": f"tool_calls[{index}] reddedildi, hiçbir eylem çalıştırılmadı: {error}",
+            "results": [{"status": "skipped"} for _ in tool_calls],
+            "completed": 0,
+        }
+
+    def _bind_call(self, tool_call: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Araç imzasına göre doğrulanmış / dönüştürülmüş parametreler ve hata mesajı (geçerliyse None).
+        Eksik / bilinmeyen 'action', bilinmeyen veya eksik parametre, yanlış tip ('x': "abc")
+        ve geçersiz enum ('button': "sol") burada, hiçbir girdi gönderilmeden reddedilir.
+        """
+        action = tool_call.get("action")
+        if not action:
+            return {}, "JSON'da 'action' anahtarı eksik."
+        if action not in self.registry:
+            return {}, f"Bilinmeyen eylem (action): '{action}'"
+        try:
+            return self.registry.bind(action, tool_call.get("parameters", {})), None
+        except ToolCallError as e:
+            return {}, str(e)
+
+    def _element_at(self, params: Dict[str, Any]):
+        """
+        Ham tıklamanın isabet ettiği elemanın kısa özeti (yoksa None).
+        """
+        try:
+            element = self.element_index.at(int(params["x"]), int(params["y"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+        if element is None:
+            return None
+        return {"id": element["id"], "type": element.get("type"), "content": element.get("content", "")}
+
     def _enforce_policy(self, action: str, params: Dict[str, Any]):
         """
         LLM'in GÜVENEMEYECEĞİ statik politika kontrolleri.
         İhlal durumunda 'PermissionError' fırlatır.
         """
         
-        # 1. Dosya Sistemi Politikası (Tüm ilgili araçlar için)
-        paths_to_check = []
-        if "path" in params: paths_to_check.append(params["path"])
-        if "src" in params: paths_to_check.append(params["src"])
-        if "dst" in params: paths_to_check.append(params["dst"])
-        
-        for path in paths_to_check:
-            # 'is_path_safe', 'policy_rules.py' dosyasından gelir
-            if not is_path_safe(path, self.policy["base_path"]):
-                # Bu hata Executor'ın try...catch bloğunda yakalanır
-                raise PermissionError(f"Yol '{path}' güvenli temel dizin '{self.policy['base_path']}' içinde değil.")
+        # 1. Dosya Sistemi + Komut Politikası (Tüm ilgili araçlar için)
+        # path / src / dst: izinli kök dizinler (trie) + dosya türleri; command / cmd: yasaklı komutlar;
+        # app_name: uygulama beyaz listesi.
+        # Kurallar configs/policies.yaml'dan derlenir; yol kararları önbelleklenir.
+        # Bu hata (PermissionError) Executor'ın try...catch bloğunda yakalanır
+        self.policy_engine.enforce(action, params)
 
         # 2. Uygulama Politikası
         if action == "start_application_safe":
             app_name = params.get("app_name") # LLM'in istediği uygulama
             if not app_name:
                 raise ValueError("'start_application_safe' için 'app_name' gereklidir.")
-            # 'is_executable_allowed', 'policy_rules.py' dosyasından gelir
-            """
-            if not is_executable_allowed(app_name, self.policy["app_whitelist"]):
-                raise PermissionError(f"Uygulama '{app_name}' beyaz listede (whitelist) değil.")"""
+            # beyaz liste (configs/policies.yaml: allowed_executables) yukarıda
+            # policy_engine.enforce içinde 'app_name' parametresi için uygulandı
         
         # 3. YASAKLI ARAÇLAR (Eğer 'TOOL_DISPATCH_MAP'e yanlışlıkla eklenseler bile)
         if action == "run_process_safe":
@@ -0,0 +1,290 @@
+"""
+Input backends behind the UI tools (mouse_click, mouse_move, mouse_double_click,
+keyboard_type, keyboard_press, scroll).
+
+  - DesktopInputBackend: real input (pyautogui for the mouse, pywinauto send_keys for keys,
+    pyperclip for pasted text)
+  - RecordingBackend: records events instead of sending them (tests / benchmarks on Linux)
+
+Both take a timing profile. "human" reproduces the old hardcoded 0.8 s pointer glide,
+"fast" keeps a short glide (some apps ignore a click on a cursor that teleported in),
+"instant" sends everything without delays.
+
+Typed text goes through text_entry.plan_text_entry: escaped send_keys chunks for short
+text, one clipboard paste for long text.
+
+The tools use the process-wide backend: get_input_backend() / set_input_backend().
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .text_entry import CHUNK_SIZE, PASTE_THRESHOLD, count_keystrokes, plan_text_entry, unescape_send_keys
+
+
+# lower bound for TimingProfile.restore_delay: a timing profile must not make a paste wrong
+MIN_PASTE_SETTLE = 0.05
+
+
+@dataclass(frozen=True)
+class TimingProfile:
+    name: str
+    move_duration: float      # pointer glide before move / click (seconds)
+    click_interval: float     # between the clicks of a double click
+    key_interval: float       # between typed characters
+    action_pause: float       # after each input action
+    paste_settle: float = 0.0  # before the clipboard is restored after a paste (at least MIN_PASTE_SETTLE)
+
+    @property
+    def restore_delay(self) -> float:
+        """
+        Wait between a paste and the clipboard restore. Never below MIN_PASTE_SETTLE, whatever
+        the profile: restoring earlier can make the target paste the old clipboard.
+        """
+        return max(self.paste_settle, MIN_PASTE_SETTLE)
+
+
+PROFILES: Dict[str, TimingProfile] = {
+    "instant": TimingProfile("instant", 0.0, 0.0, 0.0, 0.0),
+    "fast": TimingProfile("fast", 0.1, 0.05, 0.0, 0.02, 0.05),
+    "human": TimingProfile("human", 0.8, 0.1, 0.05, 0.1, 0.1),
+}
+
+DEFAULT_PROFILE = "human"
+
+# key name -> pywinauto send_keys code (everything else: single chars as-is, others as {NAME})
+SPECIAL_KEYS = {
+    "CTRL": "^",
+    "ALT": "%",
+    "SHIFT": "+",
+    "ENTER": "{ENTER}",
+    "TAB": "{TAB}",
+    "ESC": "{ESC}",
+    "SPACE": " ",
+    "BACKSPACE": "{BACKSPACE}",
+    "DELETE": "{DELETE}",
+    "UP": "{UP}",
+    "DOWN": "{DOWN}",
+    "LEFT": "{LEFT}",
+    "RIGHT": "{RIGHT}",
+}
+
+BUTTONS = ("left", "right", "middle")
+
+
+def get_profile(profile: Union[str, TimingProfile]) -> TimingProfile:
+    if isinstance(profile, TimingProfile):
+        return profile
+    try:
+        return PROFILES[profile]
+    except KeyError:
+        raise ValueError(f"unknown timing profile {profile!r} (known: {', '.join(PROFILES)})") from None
+
+
+def keys_to_send_keys(keys: List[str]) -> str:
+    """
+    ["CTRL", "S"] -> "^S" (pywinauto send_keys syntax).
+    """
+    sequence = ""
+    for key in keys:
+        upper = key.upper()
+        if upper in SPECIAL_KEYS:
+            sequence += SPECIAL_KEYS[upper]
+        elif len(key) == 1:
+            # tek karakter tuşlar normal yazılır: "A", "s", "1" vs.
+            sequence += key
+        else:
+            # F1, F2, HOME gibi tuşlar
+            sequence += f"{{{upper}}}"
+    return sequence
+
+
+class InputBackend:
+    """
+    Interface used by the UI tools. Coordinates are virtual-desktop pixels.
+    """
+
+    paste_threshold = PASTE_THRESHOLD
+    chunk_size = CHUNK_SIZE
+
+    def __init__(self, profile: Union[str, TimingProfile] = DEFAULT_PROFILE) -> None:
+        self.profile = get_profile(profile)
+
+    def move(self, x: int, y: int) -> None:
+        raise NotImplementedError
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1) -> None:
+        raise NotImplementedError
+
+    def scroll(self, amount: int) -> None:
+        raise NotImplementedError
+
+    def type_text(self, text: str) -> None:
+        """
+        Type `text` literally, as escaped keystroke chunks or a single paste.
+        """
+        for step in plan_text_entry(text, self.paste_threshold, self.chunk_size):
+            if step.method == "paste":
+                self.paste(step.payload)
+            else:
+                self.send_keys(step.payload)
+
+    def send_keys(self, sequence: str) -> None:
+        """
+        Send a pywinauto send_keys sequence (already escaped).
+        """
+        raise NotImplementedError
+
+    def paste(self, text: str) -> None:
+        raise NotImplementedError
+
+    def press(self, keys: List[str]) -> None:
+        """
+        Press a key combination, e.g. ["CTRL", "SHIFT", "ESC"] or ["ENTER"].
+        """
+        raise NotImplementedError
+
+
+class DesktopInputBackend(InputBackend):
+    """
+    Real input: pyautogui for the mouse, pywinauto.keyboard.send_keys for the keyboard.
+    Both are imported on first use.
+    """
+
+    def __init__(self, profile: Union[str, TimingProfile] = DEFAULT_PROFILE) -> None:
+        super().__init__(profile)
+        self._pyautogui = None
+        self._keyboard = None
+
+    @property
+    def pyautogui(self):
+        if self._pyautogui is None:
+            import pyautogui
+            # pyautogui's own 0.1 s pause after every call is replaced by the profile's action_pause
+            pyautogui.PAUSE = self.profile.action_pause
+            self._pyautogui = pyautogui
+        return self._pyautogui
+
+    @property
+    def keyboard(self):
+        if self._keyboard is None:
+            from pywinauto import keyboard
+            self._keyboard = keyboard
+        return self._keyboard
+
+    def move(self, x: int, y: int) -> None:
+        self.pyautogui.moveTo(x, y, duration=self.profile.move_duration)
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1) -> None:
+        self.pyautogui.click(x=x, y=y, button=button, clicks=clicks,
+                             interval=self.profile.click_interval, duration=self.profile.move_duration)
+
+    def scroll(self, amount: int) -> None:
+        self.pyautogui.scroll(amount)
+
+    def send_keys(self, sequence: str) -> None:
+        self.keyboard.send_keys(sequence, with_spaces=True, pause=self.profile.key_interval)
+        self._pause()
+
+    def paste(self, text: str) -> None:
+        import pyperclip
+        try:
+            previous = pyperclip.paste()
+        except pyperclip.PyperclipException:
+            previous = None
+        pyperclip.copy(text)
+        self.keyboard.send_keys("^v")
+        if previous is not None:
+            # the target reads the clipboard while handling the paste; restore it only afterwards
+            time.sleep(self.profile.restore_delay)
+            pyperclip.copy(previous)
+        self._pause()
+
+    def press(self, keys: List[str]) -> None:
+        self.keyboard.send_keys(keys_to_send_keys(keys), pause=self.profile.key_interval)
+        self._pause()
+
+    def _pause(self) -> None:
+        if self.profile.action_pause > 0:
+            time.sleep(self.profile.action_pause)
+
+
+@dataclass
+class InputEvent:
+    kind: str                     # move / click / scroll / keys / paste / press
+    args: Tuple[Any, ...]
+    at: float = field(default=0.0)  # simulated time (seconds since the first event)
+
+
+class RecordingBackend(InputBackend):
+    """
+    Records events instead of sending them. No display is needed and nothing sleeps;
+    `elapsed` is the time the events would have taken with the profile.
+    """
+
+    def __init__(self, profile: Union[str, TimingProfile] = "instant") -> None:
+        super().__init__(profile)
+        self.events: List[InputEvent] = []
+        self.elapsed = 0.0
+        self.position: Tuple[int, int] = (0, 0)
+
+    def _record(self, kind: str, *args: Any, cost: float = 0.0) -> None:
+        self.events.append(InputEvent(kind, args, self.elapsed))
+        self.elapsed += cost + self.profile.action_pause
+
+    def move(self, x: int, y: int) -> None:
+        self.position = (x, y)
+        self._record("move", x, y, cost=self.profile.move_duration)
+
+    def click(self, x: int, y: int, button: str = "left", clicks: int = 1) -> None:
+        self.position = (x, y)
+        self._record("click", x, y, button, clicks,
+                     cost=self.profile.move_duration + self.profile.click_interval * (clicks - 1))
+
+    def scroll(self, amount: int) -> None:
+        self._record("scroll", amount)
+
+    def send_keys(self, sequence: str) -> None:
+        self._record("keys", sequence, cost=self.profile.key_interval * count_keystrokes(sequence))
+
+    def paste(self, text: str) -> None:
+        self._record("paste", text, cost=self.profile.restore_delay)
+
+    def typed_text(self) -> str:
+        """
+        Text the recorded keys / paste events would produce (send_keys escapes undone).
+        """
+        return "".join(unescape_send_keys(e.args[0]) if e.kind == "keys" else e.args[0]
+                       for e in self.events if e.kind in ("keys", "paste"))
+
+    def press(self, keys: List[str]) -> None:
+        self._record("press", tuple(keys))
+
+    def kinds(self) -> List[str]:
+        return [e.kind for e in self.events]
+
+    def clear(self) -> None:
+        self.events.clear()
+        self.elapsed = 0.0
+
+
+_backend: Optional[InputBackend] = None
+
+
+def get_input_backend() -> InputBackend:
+    """
+    The process-wide backend; a DesktopInputBackend with the default profile unless set.
+    """
+    global _backend
+    if _backend is None:
+        _backend = DesktopInputBackend()
+    return _backend
+
+
+def set_input_backend(backend: Optional[InputBackend]) -> Optional[InputBackend]:
+    """
+    Install `backend` for all tools (None restores the lazy desktop default). Returns the previous one.
+    """
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
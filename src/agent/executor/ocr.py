@@ -0,0 +1,250 @@
+"""
+Batched OCR for ScreenParser.
+
+Instead of one `pytesseract.image_to_string` call (= one tesseract process) per detected box,
+all thresholded ROIs are packed into a few mosaic images with a background gutter between them,
+each mosaic is OCRed once with word-level boxes (`image_to_data`), and every word is mapped back
+to the ROI whose slot contains the word's center.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+import pytesseract
+
+from .ocr_cache import roi_key
+
+ROI_PAD = 5          # pixels added around each detection before OCR
+THRESHOLD = 180      # binary threshold used to clean up text
+
+
+@dataclass
+class Placement:
+    """Slot of ROI `index` inside mosaic number `mosaic`."""
+    index: int
+    mosaic: int
+    x: int
+    y: int
+    w: int
+    h: int
+
+    def contains(self, px: float, py: float) -> bool:
+        return self.x <= px < self.x + self.w and self.y <= py < self.y + self.h
+
+
+@dataclass
+class Word:
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+
+    @property
+    def center(self) -> Tuple[float, float]:
+        return self.left + self.width / 2.0, self.top + self.height / 2.0
+
+
+def crop_roi(img: np.ndarray, x1: int, y1: int, x2: int, y2: int, pad: int = ROI_PAD) -> np.ndarray:
+    """
+    Cut the padded box out of a BGR frame (view, no copy).
+    """
+    h_img, w_img = img.shape[:2]
+    return img[max(0, y1 - pad):min(h_img, y2 + pad), max(0, x1 - pad):min(w_img, x2 + pad)]
+
+
+def threshold_roi(roi: np.ndarray) -> np.ndarray:
+    """
+    Grayscale + inverted binary threshold (same preprocessing as the per-box OCR).
+    """
+    if roi.size == 0:
+        return np.zeros((0, 0), dtype=np.uint8)
+    roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY) if roi.ndim == 3 else roi
+    _, roi_thresh = cv2.threshold(roi_gray, THRESHOLD, 255, cv2.THRESH_BINARY_INV)
+    return roi_thresh
+
+
+def pack_shelves(
+    sizes: Sequence[Tuple[int, int]],
+    max_width: int = 2048,
+    max_height: int = 2048,
+    gutter: int = 16,
+) -> Tuple[List[Placement], List[Tuple[int, int]]]:
+    """
+    Shelf-pack (w, h) boxes into as few mosaics as possible.
+    Boxes are placed tallest first, left to right, with `gutter` pixels around each one.
+    A box larger than the limits still gets a slot; its shelf/mosaic grows to fit it.
+    Returns (placements in input order, [(width, height)] per mosaic).
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    placements: List[Placement] = [None] * len(sizes)  # type: ignore[list-item]
+    mosaics: List[Tuple[int, int]] = []
+
+    mosaic = -1
+    cursor_x = cursor_y = shelf_h = used_w = 0
+    for i in order:
+        w, h = sizes[i]
+        if mosaic >= 0 and cursor_x + w + gutter > max_width and cursor_x > gutter:
+            # next shelf
+            cursor_y += shelf_h + gutter
+            cursor_x, shelf_h = gutter, 0
+        if mosaic < 0 or cursor_y + h + gutter > max_height and cursor_y > gutter:
+            # next mosaic
+            if mosaic >= 0:
+                mosaics.append((used_w, cursor_y + (shelf_h + gutter if cursor_x > gutter else 0)))
+            mosaic += 1
+            cursor_x = cursor_y = gutter
+            shelf_h = used_w = 0
+
+        placements[i] = Placement(i, mosaic, cursor_x, cursor_y, w, h)
+        cursor_x += w + gutter
+        shelf_h = max(shelf_h, h)
+        used_w = max(used_w, cursor_x)
+
+    if mosaic >= 0:
+        mosaics.append((used_w, cursor_y + shelf_h + gutter))
+    return placements, mosaics
+
+
+def render_mosaic(rois: Sequence[np.ndarray], placements: Sequence[Placement], size: Tuple[int, int], background: int = 0) -> np.ndarray:
+    """
+    Paste single-channel ROIs into a (height, width) canvas filled with `background`.
+    """
+    width, height = size
+    canvas = np.full((height, width), background, dtype=np.uint8)
+    for p in placements:
+        canvas[p.y:p.y + p.h, p.x:p.x + p.w] = rois[p.index]
+    return canvas
+
+
+def assign_words(words: Sequence[Word], placements: Sequence[Placement]) -> Dict[int, str]:
+    """
+    Map OCR words of one mosaic back to ROIs by word center, and join each ROI's words
+    in reading order (top to bottom by line, then left to right).
+    """
+    buckets: Dict[int, List[Word]] = {}
+    for word in words:
+        cx, cy = word.center
+        for p in placements:
+            if p.contains(cx, cy):
+                buckets.setdefault(p.index, []).append(word)
+                break
+
+    texts = {}
+    for index, ws in buckets.items():
+        ws.sort(key=lambda w: w.top)
+        lines: List[List[Word]] = []
+        for w in ws:
+            if lines and abs(w.center[1] - lines[-1][0].center[1]) < max(w.height, lines[-1][0].height) / 2.0:
+                lines[-1].append(w)
+            else:
+                lines.append([w])
+        texts[index] = " ".join(w.text for line in lines for w in sorted(line, key=lambda w: w.left))
+    return texts
+
+
+def tesseract_words(image: np.ndarray, lang: str = "tur", psm: int = 11) -> List[Word]:
+    """
+    One pytesseract call (= one tesseract process) with word-level boxes.
+    """
+    data = pytesseract.image_to_data(image, lang=lang, config=f"--psm {psm}",
+                                     output_type=pytesseract.Output.DICT)
+    words = []
+    for text, conf, left, top, width, height in zip(
+        data["text"], data["conf"], data["left"], data["top"], data["width"], data["height"]
+    ):
+        text = text.strip()
+        if text and float(conf) >= 0:
+            words.append(Word(text, int(left), int(top), int(width), int(height)))
+    return words
+
+
+class MosaicOCR:
+    """
+    Batched OCR stage: `recognize(rois)` returns one string per ROI using a handful of
+    tesseract calls instead of one per ROI.
+
+    With a `pool` (OCRWorkerPool) the mosaics are OCRed in parallel by warm engines, and the
+    mosaic height is capped so the work is split across roughly one mosaic per worker.
+    With a `cache` (OCRCache) ROIs seen before are answered from the cache and never packed.
+    """
+
+    def __init__(self, lang: str = "tur", max_width: int = 2048, max_height: int = 2048,
+                 gutter: int = 16, psm: int = 11, pool=None, cache=None) -> None:
+        self.lang = lang
+        self.max_width = max_width
+        self.max_height = max_height
+        self.gutter = gutter
+        # psm 11 (sparse text) finds the scattered snippets of a mosaic without layout analysis
+        self.psm = psm
+        self.pool = pool
+        self.cache = cache
+
+    def _mosaic_height_limit(self, sizes: Sequence[Tuple[int, int]]) -> int:
+        if self.pool is None or self.pool.workers <= 1:
+            return self.max_height
+        area = sum((w + self.gutter) * (h + self.gutter) for w, h in sizes)
+        tallest = max(h for _, h in sizes) + 2 * self.gutter
+        per_worker = area / float(self.max_width * self.pool.workers)
+        return int(min(self.max_height, max(tallest, per_worker + tallest)))
+
+    def recognize(self, rois: Sequence[np.ndarray]) -> List[str]:
+        """
+        rois: thresholded single-channel images (see threshold_roi).
+        """
+        texts = [""] * len(rois)
+        usable = [i for i, r in enumerate(rois) if r.size]
+
+        keys = {}
+        if self.cache is not None:
+            pending = []
+            for i in usable:
+                keys[i] = roi_key(rois[i], self.lang)
+                cached = self.cache.get(keys[i])
+                if cached is None:
+                    pending.append(i)
+                else:
+                    texts[i] = cached
+            usable = pending
+        if not usable:
+            return texts
+
+        sizes = [(rois[i].shape[1], rois[i].shape[0]) for i in usable]
+        placements, mosaics = pack_shelves(sizes, self.max_width, self._mosaic_height_limit(sizes), self.gutter)
+        subset = [rois[i] for i in usable]
+        slots = [[p for p in placements if p.mosaic == m] for m in range(len(mosaics))]
+        images = [render_mosaic(subset, slots[m], size) for m, size in enumerate(mosaics)]
+
+        if self.pool is not None:
+            words_per_mosaic = self.pool.words(images)
+        else:
+            words_per_mosaic = [self.ocr_words(image) for image in images]
+
+        failed = set()
+        for m, words in enumerate(words_per_mosaic):
+            if words is None:
+                # pool timeout / worker failure: leave "" and do not cache it
+                failed.update(usable[p.index] for p in slots[m])
+                continue
+            for local_index, text in assign_words(words, slots[m]).items():
+                texts[usable[local_index]] = text
+
+        if self.cache is not None:
+            for i in usable:
+                if i not in failed:
+                    self.cache.put(keys[i], texts[i])
+        return texts
+
+    def ocr_words(self, image: np.ndarray) -> List[Word]:
+        """
+        One tesseract call with word-level boxes.
+        """
+        return tesseract_words(image, self.lang, self.psm)
+
+
+def ocr_single(roi_thresh: np.ndarray, lang: str = "tur") -> str:
+    """
+    Per-box OCR (one tesseract process per call). Kept as the reference path for benchmarks.
+    """
+    return pytesseract.image_to_string(roi_thresh, lang=lang).strip().replace('\n', ' ')
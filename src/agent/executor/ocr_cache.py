@@ -0,0 +1,104 @@
+"""
+Content-addressed OCR result cache.
+
+Taskbar buttons, menu bars and ribbon labels look the same from one step to the next,
+so their OCR text is cached under a hash of the thresholded ROI (shape + bytes) and
+the OCR language. The cache is a bounded LRU with hit/miss counters and can be
+persisted to a JSON file between sessions.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+
+
+def roi_key(roi: np.ndarray, lang: str) -> str:
+    """
+    Hash of a thresholded ROI plus the OCR language (hex string).
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{lang}|{roi.shape}|".encode("utf-8"))
+    h.update(np.ascontiguousarray(roi).data)
+    return h.hexdigest()
+
+
+class OCRCache:
+    """
+    Bounded LRU: key -> OCR text.
+    """
+
+    def __init__(self, max_entries: int = 4096, path: Optional[Union[str, Path]] = None) -> None:
+        self.max_entries = max_entries
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+
+    def put(self, key: str, text: str) -> None:
+        with self._lock:
+            self._entries[key] = text
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    def load(self) -> None:
+        """
+        Load entries from `path` (oldest first). A missing or corrupt file is ignored.
+        """
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            for key, text in data.get("entries", []):
+                self._entries[key] = text
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self) -> None:
+        """
+        Write entries to `path` in LRU order (atomic replace).
+        """
+        if self.path is None:
+            return
+        with self._lock:
+            payload = {"version": 1, "entries": list(self._entries.items())}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp, self.path)
@@ -0,0 +1,244 @@
+"""
+Warm OCR engine pool for the vision parser.
+
+Every `pytesseract` call starts a tesseract process that loads the `tur` language model
+from scratch. This pool keeps one initialized engine resident per worker process
+(tesserocr's PyTessBaseAPI when available, pytesseract otherwise), so the model is
+loaded once per worker instead of once per call.
+
+  - workers start lazily on the first submit
+  - images go in as numpy buffers, results come back with a per-call timeout
+  - a pool idle for `idle_timeout` seconds is shut down (engines released) and
+    transparently restarted by the next submit; workers are also recycled after
+    `max_tasks_per_worker` tasks (Python 3.11+)
+  - a failed or timed-out image retires the executor: new calls get a fresh one, and the
+    old one is shut down once the last words() call still using it has returned, so one bad
+    image never costs concurrent callers (e.g. parse_monitors' threads) their results
+"""
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ocr import Word, tesseract_words
+
+# Worker-process globals (one engine per process)
+_ENGINE = None
+_LANG = "tur"
+_PSM = 11
+
+
+def _init_worker(lang: str, psm: int, tessdata: Optional[str]) -> None:
+    global _ENGINE, _LANG, _PSM
+    _LANG, _PSM = lang, psm
+    try:
+        import tesserocr
+        kwargs = {"lang": lang, "psm": psm}
+        if tessdata:
+            kwargs["path"] = tessdata
+        _ENGINE = tesserocr.PyTessBaseAPI(**kwargs)
+    except Exception:
+        # no tesserocr: fall back to pytesseract (one process per call, but still parallel)
+        _ENGINE = None
+
+
+def _ocr_task(image: np.ndarray) -> List[Tuple[str, int, int, int, int]]:
+    """
+    Runs inside a worker. Returns (text, left, top, width, height) per word.
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    if _ENGINE is None:
+        return [(w.text, w.left, w.top, w.width, w.height) for w in tesseract_words(image, _LANG, _PSM)]
+
+    from tesserocr import RIL, iterate_level
+
+    height, width = image.shape[:2]
+    channels = 1 if image.ndim == 2 else image.shape[2]
+    _ENGINE.SetImageBytes(image.tobytes(), width, height, channels, width * channels)
+    _ENGINE.Recognize()
+    words = []
+    iterator = _ENGINE.GetIterator()
+    if iterator is None:
+        return words
+    for r in iterate_level(iterator, RIL.WORD):
+        text = (r.GetUTF8Text(RIL.WORD) or "").strip()
+        box = r.BoundingBox(RIL.WORD)
+        if text and box and r.Confidence(RIL.WORD) >= 0:
+            x1, y1, x2, y2 = box
+            words.append((text, x1, y1, x2 - x1, y2 - y1))
+    return words
+
+
+class OCRWorkerPool:
+    """
+    Pool of OCR worker processes with resident engines.
+
+    words(images) submits every image, waits for all of them (bounded by `timeout`
+    seconds in total) and returns a list of Word lists in input order. An image that
+    times out or fails yields None and causes the pool to be recycled (after the other
+    calls in flight on it have finished).
+    """
+
+    def __init__(self, lang: str = "tur", psm: int = 11, workers: Optional[int] = None,
+                 timeout: float = 15.0, idle_timeout: float = 120.0,
+                 max_tasks_per_worker: int = 1000, tessdata: Optional[str] = None,
+                 task: Callable[[np.ndarray], List[Tuple[str, int, int, int, int]]] = _ocr_task) -> None:
+        """
+        task: the per-image function run in the workers (default: the resident engine's OCR).
+        It must be a picklable module-level function returning (text, left, top, width, height)
+        tuples; tests pass fakes to exercise scheduling, recycling and timeouts without tesseract.
+        """
+        self.task = task
+        self.lang = lang
+        self.psm = psm
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.tessdata = tessdata or os.environ.get("TESSDATA_PREFIX")
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # every executor gets a new generation; words() calls per generation, and retired
+        # executors that are shut down when their last call returns
+        self._generation = 0
+        self._users: Dict[int, int] = {}
+        self._retired: Dict[int, ProcessPoolExecutor] = {}
+        self._lock = threading.Lock()
+        self._last_used = time.monotonic()
+        self._reaper: Optional[threading.Thread] = None
+        self._in_flight = 0
+        self._closed = False
+
+    @property
+    def running(self) -> bool:
+        return self._executor is not None
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            return self._ensure_executor_locked()
+
+    def _ensure_executor_locked(self) -> ProcessPoolExecutor:
+        if self._closed:
+            raise RuntimeError("OCRWorkerPool is shut down")
+        self._last_used = time.monotonic()
+        if self._executor is None:
+            kwargs = {}
+            if sys.version_info >= (3, 11):
+                kwargs["max_tasks_per_child"] = self.max_tasks_per_worker
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.lang, self.psm, self.tessdata),
+                **kwargs,
+            )
+            self._generation += 1
+            self._start_reaper()
+        return self._executor
+
+    def _start_reaper(self) -> None:
+        if self.idle_timeout <= 0 or (self._reaper is not None and self._reaper.is_alive()):
+            return
+        self._reaper = threading.Thread(target=self._reap_idle, name="ocr-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_idle(self) -> None:
+        interval = max(0.05, self.idle_timeout / 4.0)
+        while True:
+            time.sleep(interval)
+            with self._lock:
+                if self._executor is None:
+                    return
+                if self._in_flight == 0 and time.monotonic() - self._last_used >= self.idle_timeout:
+                    self._stop_locked(wait=False)
+                    return
+
+    def _stop_locked(self, wait: bool) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            self._shutdown_executor(executor, wait=wait)
+
+    def _retire_locked(self, generation: int) -> None:
+        # detach the failed executor; the last words() call using it shuts it down
+        if self._executor is not None and generation == self._generation:
+            self._retired[generation], self._executor = self._executor, None
+
+    def _release_locked(self, generation: int) -> None:
+        self._users[generation] -= 1
+        if self._users[generation] == 0:
+            del self._users[generation]
+            if generation in self._retired:
+                self._shutdown_executor(self._retired.pop(generation), wait=False, kill=True)
+
+    @staticmethod
+    def _shutdown_executor(executor: ProcessPoolExecutor, wait: bool, kill: bool = False) -> None:
+        terminate = getattr(executor, "terminate_workers", None)
+        if kill and terminate is not None:
+            # Python 3.14+: a hung tesseract never returns, so its worker is terminated;
+            # before that the worker exits once its task returns
+            terminate()
+        elif sys.version_info >= (3, 9):
+            executor.shutdown(wait=wait, cancel_futures=True)
+        else:
+            # words() has already cancelled its own pending futures
+            executor.shutdown(wait=wait)
+
+    def submit(self, image: np.ndarray) -> Future:
+        """
+        Queue one image (HxW or HxWxC uint8 array) and return a Future of raw word tuples.
+        """
+        return self._ensure_executor().submit(self.task, image)
+
+    def words(self, images: Sequence[np.ndarray], timeout: Optional[float] = None) -> List[Optional[List[Word]]]:
+        if not images:
+            return []
+        with self._lock:
+            executor = self._ensure_executor_locked()
+            generation = self._generation
+            self._users[generation] = self._users.get(generation, 0) + 1
+            self._in_flight += 1
+        failed = False
+        try:
+            futures = [executor.submit(self.task, image) for image in images]
+            deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+
+            results: List[Optional[List[Word]]] = []
+            for future in futures:
+                try:
+                    raw = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                    results.append([Word(*w) for w in raw])
+                except Exception:  # timeout, worker crash, OCR error
+                    future.cancel()
+                    failed = True
+                    results.append(None)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._last_used = time.monotonic()
+                if failed:
+                    self._retire_locked(generation)
+                self._release_locked(generation)
+        return results
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            self._closed = True
+            self._stop_locked(wait=wait)
+            # calls still in flight on a retired executor lose their remaining results
+            for executor in self._retired.values():
+                self._shutdown_executor(executor, wait=wait, kill=True)
+            self._retired.clear()
+
+    def __enter__(self) -> "OCRWorkerPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
@@ -0,0 +1,85 @@
+"""
+Text entry planning for keyboard_type.
+
+send_keys treats {}+^%~() as syntax, so raw text containing them is mistyped (or
+presses modifiers). Short text is escaped and sent as keystrokes in chunks; long text
+(or text send_keys cannot type, e.g. characters outside the BMP) is pasted through the
+clipboard in one step, which costs the same for 100 or 10 000 characters.
+"""
+import re
+from dataclasses import dataclass
+from typing import List
+
+SEND_KEYS_SPECIALS = frozenset("{}+^%~()")
+CONTROL_KEYS = {"\n": "{ENTER}", "\t": "{TAB}"}
+
+PASTE_THRESHOLD = 64     # characters; at or above this the clipboard is used
+CHUNK_SIZE = 32          # characters per send_keys call on the keystroke path
+
+# one keystroke of a send_keys sequence: {{}, {}}, {ENTER}, {F4 2}-style groups, or a single char
+_KEYSTROKE = re.compile(r"\{(?:[{}]|[^{}]+)\}|.", re.DOTALL)
+
+
+@dataclass(frozen=True)
+class TextStep:
+    method: str    # "keys" (payload is a send_keys sequence) | "paste" (payload is raw text)
+    payload: str
+    chars: int     # characters of the original text covered by this step
+
+
+def escape_char(ch: str) -> str:
+    if ch in SEND_KEYS_SPECIALS:
+        return "{" + ch + "}"
+    return CONTROL_KEYS.get(ch, ch)
+
+
+def escape_send_keys(text: str) -> str:
+    """
+    "a+b {x}" -> "a{+}b {{}x{}}" (typed literally by send_keys(..., with_spaces=True)).
+    """
+    return "".join(escape_char(ch) for ch in normalize_newlines(text))
+
+
+def unescape_send_keys(sequence: str) -> str:
+    """
+    Inverse of escape_send_keys (used to check what a recorded sequence would type).
+    """
+    typed = {v: k for k, v in CONTROL_KEYS.items()}
+    out = []
+    for token in _KEYSTROKE.findall(sequence):
+        if len(token) == 3 and token[0] == "{" and token[1] in SEND_KEYS_SPECIALS:
+            out.append(token[1])
+        else:
+            out.append(typed.get(token, token))
+    return "".join(out)
+
+
+def count_keystrokes(sequence: str) -> int:
+    return len(_KEYSTROKE.findall(sequence))
+
+
+def normalize_newlines(text: str) -> str:
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def needs_paste(text: str) -> bool:
+    """
+    True for text send_keys cannot type one key at a time (surrogate pairs: emoji etc.).
+    """
+    return any(ord(ch) > 0xFFFF for ch in text)
+
+
+def plan_text_entry(text: str, paste_threshold: int = PASTE_THRESHOLD, chunk_size: int = CHUNK_SIZE) -> List[TextStep]:
+    """
+    Split `text` into entry steps: one "paste" step for long / untypeable text, otherwise
+    "keys" steps of at most `chunk_size` characters (escapes never straddle a chunk).
+    """
+    text = normalize_newlines(text)
+    if not text:
+        return []
+    if len(text) >= paste_threshold or needs_paste(text):
+        return [TextStep("paste", text, len(text))]
+    return [
+        TextStep("keys", "".join(escape_char(ch) for ch in text[i:i + chunk_size]), len(text[i:i + chunk_size]))
+        for i in range(0, len(text), chunk_size)
+    ]
@@ -0,0 +1,249 @@
+"""
+Tool registry: signatures of the executor tools, introspected once at import.
+
+For every tool a list of parameter specs is compiled from its signature and type hints:
+  - int / float / str parameters get a coercer (LLMs send "640", 640.0 or 640 for x)
+  - Literal[...] parameters (e.g. tools.Button) get an enum check
+  - Optional[...] / List[...] wrap the inner coercer
+  - keyword-only parameters without a default (e.g. `index`) are injected by the executor
+    and never exposed to the planner
+
+`bind()` turns the planner's parameters into validated keyword arguments or raises
+ToolCallError before anything is sent to the desktop. `prompt_block()` renders the tool
+list for the system prompt from the same specs, so the prompt and the executor cannot drift.
+"""
+import inspect
+import json
+import typing
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+Coercer = Callable[[Any], Any]
+
+TOOL_LIST_MARKER = "{{TOOL_LIST}}"
+TOOL_NAMES_MARKER = "{{TOOL_NAMES}}"
+MAX_BATCH_MARKER = "{{MAX_BATCH_ACTIONS}}"
+
+# Longest "tool_calls" batch the executor runs in one step (also rendered into the prompt)
+MAX_BATCH_ACTIONS = 5
+
+
+class ToolCallError(ValueError):
+    """
+    The planner's parameters do not fit the tool's signature.
+    """
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f"tam sayı bekleniyordu, {value!r} geldi")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(round(value))
+    if isinstance(value, str):
+        try:
+            return int(round(float(value.strip())))
+        except ValueError:
+            pass
+    raise ValueError(f"tam sayı bekleniyordu, {value!r} geldi")
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"sayı bekleniyordu, {value!r} geldi")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"sayı bekleniyordu, {value!r} geldi")
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError(f"metin bekleniyordu, {value!r} geldi")
+
+
+def _passthrough(value: Any) -> Any:
+    return value
+
+
+def _enum(options: Tuple[Any, ...]) -> Coercer:
+    lookup = {str(o).lower(): o for o in options}
+
+    def coerce(value: Any) -> Any:
+        found = lookup.get(str(value).strip().lower())
+        if found is None:
+            raise ValueError(f"{value!r} geçersiz; şunlardan biri olmalı: {', '.join(map(str, options))}")
+        return found
+    return coerce
+
+
+def _optional(inner: Coercer) -> Coercer:
+    def coerce(value: Any) -> Any:
+        return None if value is None else inner(value)
+    return coerce
+
+
+def _list_of(inner: Coercer) -> Coercer:
+    def coerce(value: Any) -> List[Any]:
+        if not isinstance(value, (list, tuple)):
+            raise ValueError(f"liste bekleniyordu, {value!r} geldi")
+        return [inner(v) for v in value]
+    return coerce
+
+
+_SCALARS = {int: (_to_int, "int"), float: (_to_float, "float"), str: (_to_str, "str")}
+
+
+def compile_coercer(annotation: Any) -> Tuple[Coercer, str]:
+    """
+    (coercer, prompt type text) for a type annotation.
+    """
+    if annotation is inspect.Parameter.empty or annotation is Any:
+        return _passthrough, ""
+    if annotation in _SCALARS:
+        return _SCALARS[annotation]
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+    if origin is typing.Literal:
+        return _enum(args), "|".join(f'"{a}"' for a in args)
+    if origin is typing.Union:
+        rest = [a for a in args if a is not type(None)]
+        if len(rest) == 1 and len(args) == 2:
+            inner, text = compile_coercer(rest[0])
+            return _optional(inner), text
+        return _passthrough, ""
+    if origin in (list, List) and args:
+        inner, text = compile_coercer(args[0])
+        return _list_of(inner), f"[{text}, ...]" if text else "list"
+    return _passthrough, ""
+
+
+@dataclass(frozen=True)
+class ParamSpec:
+    name: str
+    coerce: Coercer
+    type_text: str
+    required: bool
+    default: Any = None
+
+    def render(self) -> str:
+        text = self.name
+        if self.type_text:
+            text += f": {self.type_text}"
+        if not self.required:
+            # defaults in JSON spelling ("left", 5.0, null), as the planner writes them
+            try:
+                text += f" = {json.dumps(self.default, ensure_ascii=False)}"
+            except TypeError:
+                text += f" = {self.default!r}"
+        return text
+
+
+@dataclass(frozen=True)
+class ToolSpec:
+    name: str
+    func: Callable[..., Any]
+    params: Tuple[ParamSpec, ...]
+    injected: Tuple[str, ...]     # keyword-only parameters supplied by the executor
+    open_kwargs: bool             # **kwargs: any parameter is passed through unchecked
+
+    def bind(self, parameters: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Validate and coerce the planner's parameters. Raises ToolCallError.
+        """
+        if not isinstance(parameters, Mapping):
+            raise ToolCallError("'parameters' bir JSON nesnesi olmalı.")
+        known = {p.name: p for p in self.params}
+        kwargs: Dict[str, Any] = {}
+        for key, value in parameters.items():
+            spec = known.get(key)
+            if spec is None:
+                if not self.open_kwargs or key in self.injected:
+                    allowed = ", ".join(known) or "yok"
+                    raise ToolCallError(f"'{self.name}' için bilinmeyen parametre '{key}' (geçerli parametreler: {allowed}).")
+                kwargs[key] = value
+                continue
+            try:
+                kwargs[key] = spec.coerce(value)
+            except (TypeError, ValueError) as e:
+                raise ToolCallError(f"'{self.name}' parametresi '{key}': {e}") from None
+        missing = [p.name for p in self.params if p.required and p.name not in kwargs]
+        if missing:
+            raise ToolCallError(f"'{self.name}' için eksik parametre: {', '.join(missing)}.")
+        return kwargs
+
+    def render(self) -> str:
+        return f"{self.name}({', '.join(p.render() for p in self.params)})"
+
+
+def introspect(name: str, func: Callable[..., Any]) -> ToolSpec:
+    signature = inspect.signature(func)
+    try:
+        hints = typing.get_type_hints(func)
+    except (NameError, TypeError):
+        hints = {}
+    params: List[ParamSpec] = []
+    injected: List[str] = []
+    open_kwargs = False
+    for p in signature.parameters.values():
+        if p.kind is inspect.Parameter.VAR_KEYWORD:
+            open_kwargs = True
+            continue
+        if p.kind is inspect.Parameter.VAR_POSITIONAL:
+            continue
+        if p.kind is inspect.Parameter.KEYWORD_ONLY and p.default is inspect.Parameter.empty:
+            injected.append(p.name)
+            continue
+        coerce, type_text = compile_coercer(hints.get(p.name, p.annotation))
+        required = p.default is inspect.Parameter.empty
+        params.append(ParamSpec(p.name, coerce, type_text, required, None if required else p.default))
+    return ToolSpec(name, func, tuple(params), tuple(injected), open_kwargs)
+
+
+class ToolRegistry:
+    """
+    action name -> ToolSpec, built once from an action -> function map.
+    """
+
+    def __init__(self, tools: Mapping[str, Callable[..., Any]]) -> None:
+        self.specs: Dict[str, ToolSpec] = {name: introspect(name, func) for name, func in tools.items()}
+        # plain action -> function view (the old TOOL_DISPATCH_MAP shape)
+        self.functions: Dict[str, Callable[..., Any]] = {name: spec.func for name, spec in self.specs.items()}
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.specs
+
+    def __iter__(self):
+        return iter(self.specs)
+
+    def __len__(self) -> int:
+        return len(self.specs)
+
+    def get(self, name: str) -> Optional[ToolSpec]:
+        return self.specs.get(name)
+
+    def bind(self, name: str, parameters: Mapping[str, Any]) -> Dict[str, Any]:
+        spec = self.specs.get(name)
+        if spec is None:
+            raise ToolCallError(f"Bilinmeyen eylem (action): '{name}'")
+        return spec.bind(parameters)
+
+    def prompt_block(self, indent: str = "   ") -> str:
+        return "\n".join(f"{indent}- {spec.render()}" for spec in self.specs.values())
+
+    def render_prompt(self, template: str) -> str:
+        """
+        Fill the tool list / tool name / batch size markers of a system prompt template.
+        """
+        return (template
+                .replace(TOOL_LIST_MARKER, self.prompt_block())
+                .replace(TOOL_NAMES_MARKER, ", ".join(self.specs))
+                .replace(MAX_BATCH_MARKER, str(MAX_BATCH_ACTIONS)))
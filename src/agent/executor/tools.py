@@ -1,27 +1,15 @@
 import time
-import pyautogui
-from pywinauto import keyboard
+from typing import List, Literal, Optional
 
 
-SPECIAL_KEYS = {
-    "CTRL": "^",
-    "ALT": "%",
-    "SHIFT": "+",
-    "ENTER": "{ENTER}",
-    "TAB": "{TAB}",
-    "ESC": "{ESC}",
-    "SPACE": " ",
-    "BACKSPACE": "{BACKSPACE}",
-    "DELETE": "{DELETE}",
-    "UP": "{UP}",
-    "DOWN": "{DOWN}",
-    "LEFT": "{LEFT}",
-    "RIGHT": "{RIGHT}",
-}
+from .input_backend import get_input_backend
+from ..utils.screen_settle import ScreenWatcher, get_frame_source, get_region_source, parse_region
 
+# Mouse buttons accepted by the pointer tools (checked by the tool registry before dispatch)
+Button = Literal["left", "right", "middle"]
 
 
-# --- Wait tool (1) ---
+# --- Wait tools (3) ---
 def wait(seconds: float) -> float:
     """
     Sadece bekler. VEYA 'ValueError/TypeError' fırlatır.
@@ -32,19 +20,35 @@ def wait(seconds: float) -> float:
     time.sleep(s)
     return s # JSON DEĞIL, HAM VERİ (FLOAT) DÖNDÜRÜR
 
+def wait_until_stable(timeout: float = 5.0, region: Optional[List[int]] = None) -> str:
+    """
+    Wait until the screen (or region [x, y, w, h]) stops changing, at most `timeout` seconds.
+    Returns how long it actually waited; a timeout is reported, not raised.
+    """
+    result = ScreenWatcher(get_frame_source(), region_source=get_region_source()).wait_until_stable(float(timeout), parse_region(region))
+    state = "stable" if result.settled else "still-changing"
+    return f"screen-{state}:{result.elapsed:.2f}s"
+
+def wait_until_changed(timeout: float = 5.0, region: Optional[List[int]] = None) -> str:
+    """
+    Wait until the screen (or region [x, y, w, h]) changes, at most `timeout` seconds.
+    Returns how long it actually waited; a timeout is reported, not raised.
+    """
+    result = ScreenWatcher(get_frame_source(), region_source=get_region_source()).wait_until_changed(float(timeout), parse_region(region))
+    state = "changed" if result.settled else "unchanged"
+    return f"screen-{state}:{result.elapsed:.2f}s"
+
 # ... (diğer import'ların yanına 'from typing import List, Dict, Any, Optional' ekle) ...
 
 
-def mouse_click(x: int, y: int, button: str = "left") -> str:
+def mouse_click(x: int, y: int, button: Button = "left") -> str:
     """
     Perform a raw mouse click at (x, y) screen coordinates.
     - button: "left"|"right"|"middle"
     Returns a short confirmation string.
     Raises on underlying errors (no try/except here).
     """
-    # pywinauto.mouse.click expects integer coordinates
-
-    pyautogui.click(x=int(x), y=int(y), button=button, duration=0.8)
+    get_input_backend().click(int(x), int(y), button)
     return f"clicked:{int(x)},{int(y)}:{button}"
 
 def keyboard_type(text: str) -> str:
@@ -53,8 +57,7 @@ def keyboard_type(text: str) -> str:
     Returns a short confirmation string.
     Raises on underlying errors (no try/except here).
     """
-    from pywinauto import keyboard
-    keyboard.send_keys(text, with_spaces=True)
+    get_input_backend().type_text(text)
     return f"typed-text:{text}"
 
 def mouse_move(x: int, y: int) -> str:
@@ -63,42 +66,49 @@ def mouse_move(x: int, y: int) -> str:
     Returns a short confirmation string.
     Raises on underlying errors (no try/except here).
     """
-    pyautogui.moveTo(int(x), int(y), duration=0.8)
+    get_input_backend().move(int(x), int(y))
     return f"moved-mouse:{int(x)},{int(y)}"
 
-def mouse_double_click(x: int, y: int, button: str = "left") -> str:
+def mouse_double_click(x: int, y: int, button: Button = "left") -> str:
     """
     Perform a raw mouse double-click at (x, y) screen coordinates.
     - button: "left"|"right"|"middle"
     Returns a short confirmation string.
     Raises on underlying errors (no try/except here).
     """
-    pyautogui.doubleClick(x=int(x), y=int(y), button=button, duration=0.8)
+    get_input_backend().click(int(x), int(y), button, clicks=2)
     return f"double-clicked:{int(x)},{int(y)}:{button}"
 
 def keyboard_press(text: str = "ENTER") -> str:
     """
-    Simulate keyboard key presses using pywinauto.send_keys.
+    Simulate keyboard key presses (send_keys syntax on the desktop backend).
     Supports combos like: CTRL+S, CTRL+SHIFT+ESC, ALT+F4, etc.
     """
 
-    parts = text.split("+")
-    sequence = ""
-
-    for p in parts:
-        p_upper = p.upper()
+    get_input_backend().press(text.split("+"))
+    return f"pressed-keys:{text}"
 
-        if p_upper in SPECIAL_KEYS:
-            sequence += SPECIAL_KEYS[p_upper]
-        elif len(p) == 1:
-            # tek karakter tuşlar normal yazılır: "A", "s", "1" vs.
-            sequence += p
-        else:
-            # F1, F2, HOME gibi tuşlar
-            sequence += f"{{{p_upper}}}"
+def click_element(element_id: int, button: Button = "left", *, index) -> str:
+    """
+    Click the center of a UI element detected by the vision parser.
+    - element_id: id from the latest element table
+    - index: ElementIndex injected by the executor (not an LLM parameter)
+    Raises ValueError for an unknown id.
+    """
+    x, y = index.center(element_id)
+    mouse_click(x, y, button)
+    return f"clicked-element:{int(element_id)}@{x},{y}:{button}"
 
-    keyboard.send_keys(sequence)
-    return f"pressed-keys:{text}"
+def type_into_element(element_id: int, text: str, *, index) -> str:
+    """
+    Click a UI element (to focus it) and type the text into it.
+    - index: ElementIndex injected by the executor (not an LLM parameter)
+    Raises ValueError for an unknown id.
+    """
+    x, y = index.center(element_id)
+    mouse_click(x, y)
+    keyboard_type(text)
+    return f"typed-into-element:{int(element_id)}:{text}"
 
 def scroll(amount: int) -> str:
     """
@@ -108,6 +118,6 @@ def scroll(amount: int) -> str:
     Returns a short confirmation string.
     Raises on underlying errors (no try/except here).
     """
-    pyautogui.scroll(amount)
+    get_input_backend().scroll(int(amount))
     return f"scrolled-mouse:{amount}"
 
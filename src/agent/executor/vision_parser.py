@@ -1,97 +1,396 @@
 import cv2
 import json
-import pytesseract
-from ultralytics import YOLO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import mss
 import numpy as np
 
+from ..utils import tracing
+from ..utils.frame_diff import FrameChangeDetector
+from .ocr import MosaicOCR, crop_roi, ocr_single, threshold_roi
+from .ocr_pool import OCRWorkerPool
+from .ocr_cache import OCRCache
+
+
+def _rect(element):
+    b = element["bbox"]
+    return (b["x"], b["y"], b["w"], b["h"])
+
+
+def _intersects(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def _union(a, b):
+    x1, y1 = min(a[0], b[0]), min(a[1], b[1])
+    x2, y2 = max(a[0] + a[2], b[0] + b[2]), max(a[1] + a[3], b[1] + b[3])
+    return (x1, y1, x2 - x1, y2 - y1)
+
+
+def _merge_rects(rects):
+    # Çakışan dikdörtgenleri birleşimleriyle değiştir (birleşim yeni çakışma doğurabilir, tekrar et)
+    rects = list(rects)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                if _intersects(rects[i], rects[j]):
+                    rects[i] = _union(rects[i], rects.pop(j))
+                    merged = True
+                    break
+            if merged:
+                break
+    return rects
+
+
 class ScreenParser:
-    def __init__(self, model_path='runs/detect/yolo_ui_parser/weights/best.pt'):
+    def __init__(self, model_path='runs/detect/yolo_ui_parser/weights/best.pt', batch_ocr=True, ocr_workers=None,
+                 ocr_cache_size=4096, ocr_cache_path=None, model=None, incremental=False, incremental_margin=32,
+                 max_dirty_ratio=0.5):
         # Model Yolu: Kendi eğitimin sonucundaki best.pt yolunu buraya ver
         print("Model ve Tesseract ayarları yükleniyor...")
-        self.model = YOLO(model_path) 
+        if model is None:
+            from ultralytics import YOLO
+            model = YOLO(model_path)
+        self.model = model
         self.lang = 'tur' 
+        # batch_ocr=False: eski kutu başına pytesseract çağrısı (karşılaştırma için)
+        self.batch_ocr = batch_ocr
+        # Sıcak OCR motor havuzu: çekirdek başına bir işçi (None), 0 = havuz yok (aynı süreçte pytesseract)
+        # İşçiler ilk OCR çağrısında başlatılır, boşta kalınca kapatılır.
+        self.ocr_pool = OCRWorkerPool(lang=self.lang, workers=ocr_workers) if ocr_workers != 0 else None
+        # ROI hash -> metin önbelleği (LRU); ocr_cache_path verilirse oturumlar arasında diske yazılır
+        self.ocr_cache = OCRCache(max_entries=ocr_cache_size, path=ocr_cache_path) if ocr_cache_size else None
+        self.ocr = MosaicOCR(lang=self.lang, pool=self.ocr_pool, cache=self.ocr_cache)
+        # Debug çizimi için tek iş parçacıklı havuz (ilk render_debug_async çağrısında oluşturulur)
+        self._render_executor = None
+        # Monitör başına OCR/son işlem havuzu (ilk parse_monitors çağrısında oluşturulur)
+        self._monitor_executor = None
+        # Monitör numarası -> (FrameChangeDetector, o monitörün son eleman listesi)
+        self._monitor_cache = {}
+        # incremental=True: parse() yalnızca değişen bölgeleri yeniden tespit eder (bkz. parse_incremental)
+        self.incremental = incremental
+        self.incremental_margin = incremental_margin
+        # Değişen alan karenin bu oranını aşarsa tam ayrıştırma yapılır (kırpıntılar daha pahalıya gelir)
+        self.max_dirty_ratio = max_dirty_ratio
+        self._change_detector = FrameChangeDetector()
+        self._last_elements = None
+
+    @staticmethod
+    def _grab(sct, monitor):
+        sct_img = sct.grab(monitor)
+        # mss tamponunu kopyalamadan görüntüle; BGR'ye çevirme tek yeni tamponu ayırır
+        bgra = np.frombuffer(sct_img.raw, dtype=np.uint8).reshape(sct_img.height, sct_img.width, 4)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR)
 
-    def screen_capture(self):
+    def screen_capture(self, monitor=1):
+        """
+        monitor: mss numarası (0 = tüm sanal masaüstü, 1 = birincil monitör, 2... = diğerleri).
+        """
         with mss.mss() as sct:
-            monitor = sct.monitors[1]
-            sct_img = sct.grab(monitor)
-            img = np.array(sct_img)
-            img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+            img = self._grab(sct, sct.monitors[monitor])
         return img  
 
-    def parse_and_visualize(self, image_source=None):
-        img = None
-        
-        # --- GÖRÜNTÜ YAKALAMA ---
-        if image_source is None:
+    @staticmethod
+    def monitors(indices=None):
+        """
+        Bağlı monitörler: [{"index", "left", "top", "width", "height"}, ...].
+        left/top sanal masaüstü koordinatlarıdır (birincil monitörün sol üstü 0,0; solda/üstte
+        kalan monitörlerde negatif) ve pyautogui'nin tıkladığı koordinatlarla aynıdır.
+        indices: None = hepsi, yoksa mss numaraları (1 = birincil).
+        """
+        with mss.mss() as sct:
+            available = sct.monitors[1:]
+        chosen = range(1, len(available) + 1) if indices is None else indices
+        result = []
+        for i in chosen:
+            if not 1 <= i <= len(available):
+                raise ValueError(f"Monitör bulunamadı: {i} (bağlı monitör sayısı: {len(available)})")
+            m = available[i - 1]
+            result.append({"index": i, "left": m["left"], "top": m["top"], "width": m["width"], "height": m["height"]})
+        return result
+
+    def capture_monitors(self, indices=None):
+        """
+        Seçilen monitörleri tek mss oturumunda yakalar: [(monitor, BGR kare), ...].
+        """
+        monitors = self.monitors(indices)
+        with tracing.span("capture", monitors=len(monitors)):
             with mss.mss() as sct:
-                monitor = sct.monitors[1]
-                sct_img = sct.grab(monitor)
-                img = np.array(sct_img)
-                img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
-                print("Canlı ekran görüntüsü alındı.")
+                return [(m, self._grab(sct, m)) for m in monitors]
+
+    def load_image(self, image_source=None):
+        """
+        image_source: None = canlı ekran görüntüsü, str = dosya yolu, np.ndarray = hazır BGR kare (kopyalanmaz),
+        PIL.Image = RGB kare (ör. PlannerClient.last_frame.image), BGR'ye çevrilir.
+        """
+        if image_source is None:
+            img = self.screen_capture()
+            print("Canlı ekran görüntüsü alındı.")
+            return img
+        if isinstance(image_source, np.ndarray):
+            return image_source
+        if hasattr(image_source, "convert"):
+            return cv2.cvtColor(np.asarray(image_source.convert("RGB")), cv2.COLOR_RGB2BGR)
+        img = cv2.imread(image_source)
+        if img is None: raise ValueError(f"Resim bulunamadı: {image_source}")
+        return img
+
+    def parse(self, image_source=None):
+        """
+        Üretim yolu: YOLO + OCR, eleman listesini döndürür.
+        Kareyi kopyalamaz ve çizim yapmaz (bkz. render_debug).
+        """
+        img = self.load_image(image_source)
+        return self.parse_incremental(img) if self.incremental else self._parse_frame(img)
+
+    def parse_incremental(self, image_source=None):
+        """
+        Kareyi bir önceki incremental karesiyle karşılaştırır (karo hash'leri, bkz. FrameChangeDetector):
+          - değişiklik yoksa önceki eleman listesi döner (YOLO/OCR çalışmaz)
+          - değişen bölgeler incremental_margin kadar genişletilir, dokundukları önceki elemanları
+            tamamen kapsayacak şekilde büyütülür; YOLO + OCR yalnızca bu kırpıntılarda (tek yığın) çalışır
+            ve sonuçlar, dokunulmayan bölgelerdeki önceki elemanlarla birleştirilir
+          - ilk kare, boyut değişimi veya değişen alan > max_dirty_ratio ise tam ayrıştırma
+        Elemanlar okuma sırasına (y, x) dizilir ve "id"ler yeniden numaralanır.
+        """
+        img = self.load_image(image_source)
+        with tracing.span("diff"):
+            change = self._change_detector.update(img)
+        previous = self._last_elements
+        if previous is not None and not change.changed:
+            return [dict(e) for e in previous]
+
+        height, width = img.shape[:2]
+        rects = None
+        if previous is not None and not change.first_frame:
+            rects = self._dirty_rects(change.regions, previous, width, height)
+            if sum(r[2] * r[3] for r in rects) > self.max_dirty_ratio * width * height:
+                rects = None
+
+        if rects is None:
+            elements = self._parse_frame(img)
         else:
-            img = cv2.imread(image_source)
-            if img is None: raise ValueError(f"Resim bulunamadı: {image_source}")
+            kept = [e for e in previous if not any(_intersects(_rect(e), r) for r in rects)]
+            crops = [img[y:y + h, x:x + w] for x, y, w, h in rects]
+            with tracing.span("detect", images=len(crops)):
+                results = self.model(crops, conf=0.25, verbose=False)
+            elements = kept
+            for (x, y, _, _), crop, result in zip(rects, crops, results):
+                for e in self._elements_from_result(crop, result):
+                    b = e["bbox"]
+                    elements.append(dict(e, bbox={"x": b["x"] + x, "y": b["y"] + y, "w": b["w"], "h": b["h"]}))
 
-        # Görselleştirme için kopyasını al (Orjinal resmi bozmayalım)
-        debug_img = img.copy()
+        elements = sorted(elements, key=lambda e: (e["bbox"]["y"], e["bbox"]["x"]))
+        self._last_elements = [dict(e, id=i) for i, e in enumerate(elements)]
+        return [dict(e) for e in self._last_elements]
+
+    def _dirty_rects(self, regions, elements, width, height):
+        """
+        Değişen bölgeler -> yeniden tespit edilecek kırpıntılar (x, y, w, h): kenar payı eklenir,
+        kareye kırpılır, bölgeye değen önceki elemanlar tamamen içeri alınır (eleman yarım kesilmez)
+        ve çakışanlar birleştirilir.
+        """
+        m = self.incremental_margin
+
+        def padded(x, y, w, h):
+            x1, y1 = max(0, x - m), max(0, y - m)
+            return (x1, y1, min(width, x + w + m) - x1, min(height, y + h + m) - y1)
 
+        rects = [padded(*r) for r in regions]
+        # elemanlar da kenar payıyla alınır: YOLO bağlamı ve OCR dolgusu tam karedekiyle aynı kalır
+        boxes = [(_rect(e), padded(*_rect(e))) for e in elements]
+        grown = True
+        while grown:
+            rects = _merge_rects(rects)
+            grown = False
+            for box, box_padded in boxes:
+                for i, r in enumerate(rects):
+                    if _intersects(box, r) and _union(box_padded, r) != r:
+                        rects[i] = _union(box_padded, r)
+                        grown = True
+        return rects
+
+    def reset_incremental(self):
+        """
+        Bir sonraki parse_incremental çağrısını tam ayrıştırmaya zorlar (ör. model/OCR değişince).
+        """
+        self._change_detector.reset()
+        self._last_elements = None
+
+    def parse_batch(self, image_sources, batch_size=8, prefetch=2):
+        """
+        Birden çok kareyi ayrıştırır (her kaynak load_image'ın kabul ettiği türden: yol, BGR dizi, PIL).
+        YOLO'ya batch_size'lık gerçek yığınlar verilir; sonraki `prefetch` yığının okunması/çözülmesi
+        arka plan iş parçacığında çıkarımla örtüşür (prefetch=0: aynı iş parçacığında, sırayla).
+        Kaynak sırasıyla kare başına eleman listelerini döndürür. Bellekte en fazla
+        (prefetch + 1) * batch_size kare tutulur.
+        """
+        sources = list(image_sources)
+        batch_size = max(1, batch_size)
+        chunks = [sources[i:i + batch_size] for i in range(0, len(sources), batch_size)]
+        parsed = []
+        if prefetch <= 0:
+            for chunk in chunks:
+                parsed.extend(self._parse_chunk(self._decode_chunk(chunk)))
+            return parsed
+
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="parser-decode")
+        pending = deque()
+        try:
+            pending.extend(pool.submit(self._decode_chunk, c) for c in chunks[:prefetch])
+            next_chunk = len(pending)
+            while pending:
+                # decode_wait: çıkarımın, kod çözmeyi beklediği süre (örtüşme yetmiyorsa büyür)
+                with tracing.span("decode_wait"):
+                    imgs = pending.popleft().result()
+                if next_chunk < len(chunks):
+                    pending.append(pool.submit(self._decode_chunk, chunks[next_chunk]))
+                    next_chunk += 1
+                parsed.extend(self._parse_chunk(imgs))
+        finally:
+            # hata/erken çıkışta bekleyen kod çözmeler iptal edilir (cancel_futures Python 3.9+ olduğundan elle)
+            for future in pending:
+                future.cancel()
+            pool.shutdown(wait=True)
+        return parsed
+
+    def _decode_chunk(self, sources):
+        with tracing.span("decode", images=len(sources)):
+            return [self.load_image(s) for s in sources]
+
+    def _parse_chunk(self, imgs):
+        # Tek model çağrısı, yığındaki her kare için bir sonuç
+        with tracing.span("detect", images=len(imgs)):
+            results = self.model(list(imgs), conf=0.25, verbose=False)
+        return [self._elements_from_result(img, r) for img, r in zip(imgs, results)]
+
+    def _parse_frame(self, img):
         # --- YOLO TESPİTİ ---
-        results = self.model(img, conf=0.25)[0]
-        parsed_elements = []
+        with tracing.span("detect", images=1):
+            results = self.model(img, conf=0.25)[0]
+        return self._elements_from_result(img, results)
 
+    def _elements_from_result(self, img, results):
         print(f"Tespit edilen nesne sayısı: {len(results.boxes)}")
 
-        
-        for box in results.boxes:
-            # Koordinatlar
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
+        # --- OCR İŞLEMİ (Padding + Thresholding, tek seferde mozaik OCR) ---
+        # Tüm kutular önce toplanır; OCR kutu başına değil, birkaç mozaik görüntü üzerinde bir kez çalışır.
+        with tracing.span("ocr", boxes=len(results.boxes)):
+            boxes = [tuple(map(int, box.xyxy[0])) for box in results.boxes]
+            rois = [threshold_roi(crop_roi(img, *b)) for b in boxes]
+            if self.batch_ocr:
+                try:
+                    texts = self.ocr.recognize(rois)
+                except Exception:
+                    texts = [""] * len(rois)
+            else:
+                texts = []
+                for roi_thresh in rois:
+                    try:
+                        texts.append(ocr_single(roi_thresh, self.lang))
+                    except Exception:
+                        texts.append("")
+
+        with tracing.span("postprocess"):
+            return self._build_elements(results, boxes, texts)
+
+    def _build_elements(self, results, boxes, texts):
+        parsed_elements = []
+        for element_id, (box, (x1, y1, x2, y2), detected_text) in enumerate(zip(results.boxes, boxes, texts)):
             cls_id = int(box.cls[0])
             confidence = float(box.conf[0])
             
             # Sınıf ismini al (Eğer names dict yüklü değilse ID kullan)
             label_name = self.model.names.get(cls_id, f"Class_{cls_id}")
 
-            # --- OCR İŞLEMİ (Padding + Thresholding Düzeltmesi) ---
-            # Kutuyu biraz genişlet (Padding) - OCR başarısı için kritik
-            pad = 5
-            h_img, w_img, _ = img.shape
-            roi_x1 = max(0, x1 - pad)
-            roi_y1 = max(0, y1 - pad)
-            roi_x2 = min(w_img, x2 + pad)
-            roi_y2 = min(h_img, y2 + pad)
-
-            roi = img[roi_y1:roi_y2, roi_x1:roi_x2]
-
-            try:
-                roi_gray = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
-                # Binary Thresholding (Metni netleştirme)
-                _, roi_thresh = cv2.threshold(roi_gray, 180, 255, cv2.THRESH_BINARY_INV)
-                
-                detected_text = pytesseract.image_to_string(
-                    roi_thresh, lang=self.lang
-                ).strip().replace('\n', ' ')
-            except Exception:
-                detected_text = ""
-
             # --- VERİ YAPILANDIRMA ---
+            # "id": bu karedeki benzersiz eleman numarası (LLM -> object_id -> bbox), "class_id": YOLO sınıfı
             element_data = {
                 "type": label_name,
-                "id": cls_id,
+                "id": element_id,
+                "class_id": cls_id,
                 "confidence": round(confidence, 2),
                 "bbox": {"x": x1, "y": y1, "w": x2-x1, "h": y2-y1},
                 "content": detected_text
             }
             parsed_elements.append(element_data)
 
+        return parsed_elements
+
+    def parse_monitors(self, indices=None, frames=None, use_cache=True):
+        """
+        Birden çok monitörü ayrıştırır ve tek eleman listesi döndürür.
+          - indices: None = tüm monitörler, yoksa mss numaraları (bkz. monitors())
+          - frames: hazır [(monitor, BGR kare), ...] (verilmezse capture_monitors(indices))
+          - use_cache: değişmeyen monitörün (kare karo hash'leri aynı) önceki sonucu yeniden kullanılır
+        Değişen monitörlerin kareleri YOLO'ya tek yığın olarak verilir, OCR/son işlem monitör başına
+        paralel çalışır. bbox'lar sanal masaüstü koordinatlarına kaydırılır (pyautogui ile doğrudan
+        tıklanabilir), her elemana "monitor" numarası eklenir ve "id"ler tüm ekranlar boyunca yeniden
+        numaralanır.
+        """
+        if frames is None:
+            frames = self.capture_monitors(indices)
+
+        per_monitor = [None] * len(frames)
+        dirty = []
+        for slot, (monitor, img) in enumerate(frames):
+            detector, cached = self._monitor_cache.get(monitor["index"], (None, None))
+            if detector is None:
+                detector = FrameChangeDetector()
+            change = detector.update(img)
+            if use_cache and cached is not None and not change.changed:
+                per_monitor[slot] = cached
+            else:
+                dirty.append(slot)
+            self._monitor_cache[monitor["index"]] = (detector, per_monitor[slot])
+
+        if dirty:
+            imgs = [frames[slot][1] for slot in dirty]
+            with tracing.span("detect", images=len(imgs)):
+                results = self.model(imgs, conf=0.25, verbose=False)
+            if self._monitor_executor is None:
+                self._monitor_executor = ThreadPoolExecutor(thread_name_prefix="parser-monitor")
+            futures = [self._monitor_executor.submit(self._elements_from_result, img, r) for img, r in zip(imgs, results)]
+            for slot, future in zip(dirty, futures):
+                monitor = frames[slot][0]
+                elements = [self._to_desktop(e, monitor) for e in future.result()]
+                per_monitor[slot] = elements
+                self._monitor_cache[monitor["index"]] = (self._monitor_cache[monitor["index"]][0], elements)
+
+        merged = []
+        for elements in per_monitor:
+            for e in elements:
+                merged.append(dict(e, id=len(merged)))
+        return merged
+
+    @staticmethod
+    def _to_desktop(element, monitor):
+        bbox = element["bbox"]
+        return dict(element, monitor=monitor["index"],
+                    bbox={"x": bbox["x"] + monitor["left"], "y": bbox["y"] + monitor["top"], "w": bbox["w"], "h": bbox["h"]})
+
+    def render_debug(self, elements, img):
+        """
+        Eleman listesini karenin bir kopyası üzerine çizer ve kopyayı döndürür (orijinal kare bozulmaz).
+        Yalnızca istendiğinde çağrılır; parse() bu maliyeti ödemez.
+        """
+        # Görselleştirme için kopyasını al (Orjinal resmi bozmayalım)
+        debug_img = img.copy()
+
+        for element in elements:
+            bbox = element["bbox"]
+            x1, y1 = bbox["x"], bbox["y"]
+            x2, y2 = x1 + bbox["w"], y1 + bbox["h"]
+            detected_text = element.get("content", "")
+
             # --- GÖRSEL ÇİZİM (DEBUGGING) ---
             # 1. Kutuyu çiz (Yeşil)
             cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 2)
 
             # 2. Label yaz (Kırmızı - Kutunun Üstüne)
-            label_str = f"{label_name} ({confidence:.2f})"
+            label_str = f"{element['type']} ({element['confidence']:.2f})"
             cv2.putText(debug_img, label_str, (x1, y1 - 10), 
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
 
@@ -100,8 +399,38 @@ class ScreenParser:
                 cv2.putText(debug_img, f"OCR: {detected_text}", (x1, y2 + 15), 
                             cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 0, 0), 2)
 
+        return debug_img
+
+    def render_debug_async(self, elements, img):
+        """
+        render_debug'ı arka plan iş parçacığında çalıştırır, Future döndürür.
+        Çizim bitene kadar `img` değiştirilmemelidir.
+        """
+        if self._render_executor is None:
+            self._render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="parser-debug")
+        return self._render_executor.submit(self.render_debug, elements, img)
+
+    def parse_and_visualize(self, image_source=None, visualize=False):
+        """
+        Geriye dönük uyumluluk: varsayılan olarak parse() ile aynıdır (yalnızca eleman listesi).
+        visualize=True ise (elements, debug_img) döndürür.
+        """
+        img = self.load_image(image_source)
+        parsed_elements = self.parse_incremental(img) if self.incremental else self._parse_frame(img)
+        if visualize:
+            return parsed_elements, self.render_debug(parsed_elements, img)
         return parsed_elements
 
+    def close(self):
+        if self._render_executor is not None:
+            self._render_executor.shutdown(wait=True)
+        if self._monitor_executor is not None:
+            self._monitor_executor.shutdown(wait=True)
+        if self.ocr_pool is not None:
+            self.ocr_pool.shutdown()
+        if self.ocr_cache is not None:
+            self.ocr_cache.save()
+
     def save_json(self, data, output_path):
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
@@ -115,7 +444,7 @@ if __name__ == "__main__":
     
     try:
         # Analiz et
-        json_data, visual_img = parser.parse_and_visualize() # Parametre boş = Canlı Screenshot
+        json_data, visual_img = parser.parse_and_visualize(visualize=True) # Parametre boş = Canlı Screenshot
         
         # 1. JSON Kaydet
         parser.save_json(json_data, "debug_data.json")
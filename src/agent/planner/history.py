@@ -0,0 +1,97 @@
+"""
+Append-only planner history with pre-serialized messages.
+
+Each entry is serialized to an LLM message ({'role', 'content': str}) exactly once, when it
+is appended, together with a rough token estimate. Building the request for a step then
+only reuses the cached messages instead of re-running json.dumps over the whole history.
+The only non-append edit is replace_head(), which swaps the oldest records for a summary.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Sequence
+
+# Rough chars-per-token ratio for the estimate (no tokenizer dependency)
+CHARS_PER_TOKEN = 4
+# Per-message overhead of the chat template (role markers etc.)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + MESSAGE_OVERHEAD_TOKENS
+
+
+def serialize_content(content: Any) -> str:
+    """
+    Dict-like contents are JSON-dumped, everything else is str()'d.
+    """
+    if isinstance(content, (dict, list)):
+        return json.dumps(content, ensure_ascii=False)
+    return str(content)
+
+
+@dataclass(frozen=True)
+class HistoryRecord:
+    role: str
+    content: Any                 # original entry as appended (dict, list or str)
+    message: Dict[str, str]      # {'role': ..., 'content': <serialized str>}
+    tokens: int                  # estimated tokens of `message`
+
+
+def _make_record(role: str, content: Any) -> HistoryRecord:
+    text = serialize_content(content)
+    return HistoryRecord(role, content, {"role": role, "content": text}, estimate_tokens(text))
+
+
+class MessageHistory:
+    """
+    Ordered list of HistoryRecord with a cached message list and a running token total.
+    """
+
+    def __init__(self) -> None:
+        self._records: List[HistoryRecord] = []
+        self._messages: List[Dict[str, str]] = []
+        self.token_count = 0
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[HistoryRecord]:
+        return iter(self._records)
+
+    @property
+    def records(self) -> List[HistoryRecord]:
+        return list(self._records)
+
+    def append(self, role: str, content: Any) -> HistoryRecord:
+        record = _make_record(role, content)
+        self._records.append(record)
+        self._messages.append(record.message)
+        self.token_count += record.tokens
+        return record
+
+    def messages(self) -> List[Dict[str, str]]:
+        """
+        Serialized messages in order. The message dicts are shared with the records;
+        callers must not mutate them.
+        """
+        return list(self._messages)
+
+    def replace_head(self, head: Sequence[HistoryRecord], role: str, content: Any) -> bool:
+        """
+        Replace the leading records `head` with a single new record (e.g. a summary of them).
+        Entries appended after `head` was taken are kept. Returns False (and changes nothing)
+        if `head` is no longer the start of the history, e.g. because it was cleared meanwhile.
+        """
+        n = len(head)
+        if n == 0 or n > len(self._records) or any(a is not b for a, b in zip(head, self._records)):
+            return False
+        record = _make_record(role, content)
+        self._records[:n] = [record]
+        self._messages[:n] = [record.message]
+        self.token_count += record.tokens - sum(r.tokens for r in head)
+        return True
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._messages.clear()
+        self.token_count = 0
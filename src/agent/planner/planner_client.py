@@ -1,10 +1,21 @@
-from typing import List, Dict, Optional, Any
+from typing import Callable, List, Dict, Optional, Any
 from pathlib import Path
+import dataclasses
 import json
 import re
-import pyautogui
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 import ollama  # Lütfen 'pip install ollama' ile kütüphaneyi yükleyin.
 
+from ..utils.frame_transform import FrameTransform
+from ..utils.screen_capture import (CaptureBackend, CaptureSettings, CapturedFrame, PyAutoGUICaptureBackend,
+                                    encode_captured)
+from ..utils.som_overlay import MAX_DIMENSION as SOM_MAX_DIMENSION, MarkRenderer
+from ..utils.frame_diff import FrameChange, FrameChangeDetector
+from ..utils import tracing
+from .history import HistoryRecord, MessageHistory
+from .stream_parser import StreamingJSONParser
+
 class PlannerClient:
     """
     Lightweight planner client skeleton that talks to an LLM (e.g. Ollama).
@@ -14,46 +25,239 @@ class PlannerClient:
       - get the next single-step from the planner LLM
       - add executor/tool responses to history
       - ask the summarizer LLM to reduce history into a short memory and replace history
+      - keep the history inside a token budget by summarizing its oldest entries in the background
     """
     
-    def __init__(self, react_prompt_path: str, summarizer_prompt_path: str) -> None:
-        self.react_prompt = self._load_prompt(react_prompt_path)
+    def __init__(
+        self,
+        react_prompt_path: str,
+        summarizer_prompt_path: str,
+        capture_backend: Optional[CaptureBackend] = None,
+        capture_settings: Optional[CaptureSettings] = None,
+        skip_unchanged_frames: bool = True,
+        host: Optional[str] = None,
+        context_budget_tokens: int = 12000,
+        context_hard_limit_tokens: int = 20000,
+        keep_recent_entries: int = 6,
+        stream: bool = False,
+        tool_registry=None,
+        set_of_marks: bool = False,
+    ) -> None:
+        # The tool list / tool names in the react prompt are rendered from the executor's
+        # tool registry ({{TOOL_LIST}} / {{TOOL_NAMES}}), so prompt and executor cannot drift.
+        if tool_registry is None:
+            from ..executor.executor_core import TOOL_REGISTRY as tool_registry
+        self.tool_registry = tool_registry
+        self.react_prompt = tool_registry.render_prompt(self._load_prompt(react_prompt_path))
         self.summarizer_prompt = self._load_prompt(summarizer_prompt_path)
-        self._history: List[Dict[str, Any]] = []  # list of dicts: {'role':..., 'content':...}
+        # Append-only; every entry is serialized once when added (see history.MessageHistory)
+        self._history = MessageHistory()
         self.model = "windows-agent:gemma"
+        # One client (and HTTP connection pool) per planner; host=None uses OLLAMA_HOST / localhost
+        self.client = ollama.Client(host=host)
+        # Screenshots are encoded in memory and passed to the LLM as bytes (no file round-trip)
+        self.capture_backend = capture_backend or PyAutoGUICaptureBackend()
+        self.capture_settings = capture_settings or CaptureSettings()
+        self.last_frame: Optional[CapturedFrame] = None
+        # Tile-hash diff against the previous frame; when nothing moved the previous encoded image
+        # is re-attached instead of encoding the same pixels again
+        self.frame_detector = FrameChangeDetector()
+        self.skip_unchanged_frames = skip_unchanged_frames
+        self.last_frame_change: Optional[FrameChange] = None
+        # Compact JSON table of the UI elements detected on the current frame (see set_ui_elements)
+        self.ui_elements_table: Optional[str] = None
+        self._ui_element_rows: List[Dict[str, Any]] = []
+        self._ui_elements: List[Dict[str, Any]] = []
+        # set_of_marks=True: the element ids are also drawn onto the sent image (see som_overlay)
+        self.mark_renderer = MarkRenderer() if set_of_marks else None
+        if set_of_marks and self.capture_settings.model_resolution is None and self.capture_settings.max_dimension is None:
+            # marks are drawn on the scaled frame: never on (and never sent as) a full-resolution one
+            self.capture_settings = dataclasses.replace(self.capture_settings, max_dimension=SOM_MAX_DIMENSION)
+        # Screen -> image mapping of the last image sent; the planner answers in image pixels
+        # (see CaptureSettings.model_resolution), callers map its coordinates back with it
+        self.last_transform: Optional[FrameTransform] = None
+        # Rolling context (num_ctx is 32768 in the Modelfiles; system prompt + image need the rest):
+        # past `context_budget_tokens` the oldest entries are summarized in a background thread,
+        # past `context_hard_limit_tokens` the next step waits for that summary.
+        # The last `keep_recent_entries` entries always stay verbatim.
+        self.context_budget_tokens = context_budget_tokens
+        self.context_hard_limit_tokens = context_hard_limit_tokens
+        self.keep_recent_entries = keep_recent_entries
+        self._compactor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-summarizer")
+        self._compaction: Optional[Future] = None
+        self._compaction_head: List[HistoryRecord] = []
+        # stream=True reads the completion token by token (see _call_ollama_stream)
+        self.stream = stream
+        # Per-step latency: ttft_s (first token), time_to_action_s (tool_call / final_response complete), total_s
+        self.last_step_metrics: Dict[str, Any] = {}
+        # Last request summary (history size, screen message text, image sent?) and raw completion
+        self.last_request: Dict[str, Any] = {}
+        self.last_response_text: Optional[str] = None
 
     def _load_prompt(self, path: str) -> str:
         p = Path(path)
         return p.read_text(encoding="utf-8") if p.exists() else ""
     
-    def screen_capture(self):
-        pyautogui.screenshot('screenshot.png')
-        
+    def screen_capture(self) -> CapturedFrame:
+        """
+        Grab and encode the current screen with the configured backend.
+        The frame is kept in `last_frame`, its diff against the previous frame
+        in `last_frame_change`, and the frame is returned.
+        With set_of_marks a changed frame is returned unencoded: it is encoded once, with
+        the marks, by set_ui_elements (or without them by get_next_step if no parser ran).
+        """
+        previous = self.last_frame
+        frame = self.capture_backend.capture(self.capture_settings, encode=False)
+        self.last_frame_change = self.frame_detector.update(frame.image)
+        if (self.skip_unchanged_frames and not self.last_frame_change.changed
+                and previous is not None and previous.data and previous.transform == frame.transform):
+            # pixel-identical screen: re-attach the bytes the planner already saw (marks included)
+            # instead of encoding the same image again
+            frame = dataclasses.replace(frame, data=previous.data, marked=previous.marked)
+        elif self.mark_renderer is None:
+            frame = encode_captured(frame, self.capture_settings)
+        elif not self.last_frame_change.changed:
+            # same screen, same elements: nobody re-parses it, so mark it here
+            frame = self._mark_frame(frame)
+        self.last_frame = frame
+        return frame
+
+    def _mark_frame(self, frame: CapturedFrame) -> CapturedFrame:
+        """
+        Copy of `frame` whose payload carries the current elements' ids (set-of-marks),
+        encoded from the marked image. Without elements an unencoded frame is encoded as is.
+        """
+        if not self._ui_elements or frame.model_image is None:
+            return frame if frame.data else encode_captured(frame, self.capture_settings)
+        with tracing.span("marks", elements=len(self._ui_elements)):
+            marked = self.mark_renderer.render(frame.model_image, self._ui_elements, frame.transform)
+        return dataclasses.replace(encode_captured(frame, self.capture_settings, image=marked), marked=True)
+
+    def warm_up(self) -> bool:
+        """
+        Open the HTTP connection to Ollama and make sure the model is loaded,
+        so the first real planner call does not pay for either.
+        An empty chat request only loads the model. Best-effort: returns False on failure.
+        """
+        try:
+            self.client.chat(model=self.model, messages=[])
+            return True
+        except Exception:
+            return False
+
+    def set_ui_elements(self, elements: Optional[List[Dict[str, Any]]]) -> None:
+        """
+        Attach the vision parser's elements for the current frame to the next screen message,
+        so the planner can target them by id (click_element / type_into_element).
+        With set_of_marks the ids are also drawn onto the current frame's image.
+        None or an empty list removes the table.
+        """
+        self._ui_elements = list(elements or [])
+        if not elements:
+            self.ui_elements_table = None
+            self._ui_element_rows = []
+            return
+        rows = []
+        for e in elements:
+            b = e["bbox"]
+            rows.append({"id": e["id"], "type": e.get("type"), "text": e.get("content", ""),
+                         "bbox": [b["x"], b["y"], b["w"], b["h"]]})
+        self._ui_element_rows = rows
+        self.ui_elements_table = json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+        if self.mark_renderer is not None and self.last_frame is not None:
+            self.last_frame = self._mark_frame(self.last_frame)
+
+    def _elements_table_for(self, transform: Optional[FrameTransform]) -> Optional[str]:
+        # ui_elements_table stays in screen pixels; the prompt gets it in the sent image's pixels
+        if not self.ui_elements_table or transform is None or transform.is_identity:
+            return self.ui_elements_table
+        rows = [dict(r, bbox=list(transform.rect_to_model(*r["bbox"]))) for r in self._ui_element_rows]
+        return json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+
+    def _build_screen_message(self, frame: CapturedFrame, change: Optional[FrameChange]) -> Dict[str, Any]:
+        """
+        Build the trailing user message that carries the screen observation.
+        The image is always attached: history never keeps images, so this is the only
+        screenshot the planner sees on this step.
+        - unchanged screen (and skip_unchanged_frames): the previous image, noted as unchanged
+        - changed screen: image + list of changed regions in screen pixels
+        - detected UI elements (if any): id table appended to the text
+        When the frame was scaled for the model (frame.transform), all coordinates are given
+        in pixels of the sent image instead, the space the planner answers in.
+        """
+        transform = frame.transform
+        scaled = transform is not None and not transform.is_identity
+        units = "image pixels" if scaled else "screen pixels"
+        elements = ""
+        table = self._elements_table_for(transform)
+        if table:
+            elements = f" Detected UI elements as [x, y, w, h] in {units}: {table}"
+            if frame.marked:
+                elements = " Numbered labels on the image mark the detected UI elements by id." + elements
+
+        if change is not None and not change.changed and self.skip_unchanged_frames:
+            content = "The screen has not changed since the previous screenshot (no pixel changed after the last action); here it is again."
+            return {"role": "user", "content": content + elements, "images": [frame.data]}
+
+        content = "Here is the current screen image."
+        if change is not None and not change.first_frame:
+            rects = change.regions
+            if scaled:
+                # regions are in frame pixels; the transform maps screen pixels (frame + origin)
+                ox, oy = transform.origin
+                rects = [transform.rect_to_model(x + ox, y + oy, w, h) for x, y, w, h in rects]
+            regions = ", ".join(f"[{x}, {y}, {w}, {h}]" for x, y, w, h in rects)
+            content += f" Changed regions since the previous screenshot as [x, y, w, h] in {units}: {regions}."
+        return {"role": "user", "content": content + elements, "images": [frame.data]}
 
     def _serialize_history_for_messages(self) -> List[Dict[str, str]]:
         """
         Convert internal history entries into a list of messages suitable for LLM input.
         Each entry becomes {'role': <role>, 'content': <string>}. Dict-like contents are JSON-dumped.
+        Entries are serialized once on append, so this only copies the cached message list.
         """
-        msgs: List[Dict[str, str]] = []
-        for e in self._history:
-            role = e.get("role", "user")
-            content = e.get("content", "")
-            if isinstance(content, (dict, list)):
-                content = json.dumps(content, ensure_ascii=False)
-            else:
-                content = str(content)
-            msgs.append({"role": role, "content": content})
-        return msgs
+        return self._history.messages()
+
+    def _summarize_records(self, records: List[HistoryRecord]) -> str:
+        messages = [{"role": "system", "content": self.summarizer_prompt}] + [r.message for r in records]
+        return self._call_ollama(self.summarizer_prompt, messages)
 
-    def _call_ollama(self, system_prompt: str, messages: List[Dict[str, str]], images = False) -> str:
+    def _maybe_compact_history(self) -> None:
+        """
+        Start a background summary of the oldest entries when the history is over budget, and
+        apply it once finished. Over the hard limit the summary is awaited so the request stays
+        inside num_ctx. A failed summary is dropped; the entries stay verbatim and are retried
+        on a later step.
+        """
+        if self._compaction is None and self._history.token_count > self.context_budget_tokens:
+            records = self._history.records
+            head = records[:max(0, len(records) - self.keep_recent_entries)]
+            # a lone memory entry is already a summary
+            if len(head) >= 2 or (head and head[0].role != "memory"):
+                self._compaction_head = head
+                self._compaction = self._compactor.submit(self._summarize_records, head)
+
+        if self._compaction is None:
+            return
+        if not self._compaction.done() and self._history.token_count <= self.context_hard_limit_tokens:
+            return
+        future, head = self._compaction, self._compaction_head
+        self._compaction, self._compaction_head = None, []
+        try:
+            summary = future.result()
+        except Exception:
+            return
+        self._history.replace_head(head, "memory", summary)
+
+    def _call_ollama(self, system_prompt: str, messages: List[Dict[str, Any]]) -> str:
         """
         Call Ollama chat endpoint and return raw assistant text.
 
         Expects 'ollama' python package to be installed. Uses:
           ollama.chat(model='llama3', messages=messages)
 
-        The 'messages' argument should be a list of {"role": "...", "content": "..."} dicts.
+        The 'messages' argument should be a list of {"role": "...", "content": "..."} dicts
+        (messages may also carry an "images" list of encoded image bytes).
         This function is robust about ensuring the system prompt is included and about
         extracting the assistant text from common response shapes.
 
@@ -65,13 +269,10 @@ class PlannerClient:
         if not msgs or msgs[0].get("role") != "system":
             # Prepend system prompt to be explicit
             msgs = [{"role": "system", "content": system_prompt}] + msgs
-        
-        if images is True:
-            msgs.append({"role": "user", "content": "Here is the current screen image.", "images": ["D:\\Software\\Python\\windows-os-agent\\screenshot.png"]})
 
         try:
             # Call Ollama. The exact signature/return shape may vary by version; handle common shapes below.
-            resp = ollama.chat(model=self.model , messages=msgs, format="json")  
+            resp = self.client.chat(model=self.model, messages=msgs, format="json")
         except Exception as e:
             raise RuntimeError("ollama.chat call failed", e) from e
 
@@ -88,7 +289,65 @@ class PlannerClient:
         # Normalize to string
         return str(assistant_text)
 
-    def _extract_json_block(self, text: str) -> str:
+    def _call_ollama_stream(
+        self,
+        system_prompt: str,
+        messages: List[Dict[str, Any]],
+        on_event: Optional[Callable[[str, Any], None]] = None,
+    ) -> str:
+        """
+        Streaming variant of _call_ollama. Tokens are fed into a StreamingJSONParser and reported
+        through on_event(kind, value) while the completion is still being generated:
+          - ("thought_delta", str) for each new piece of the "thought" text
+          - (<key>, value) for each top-level field as soon as its value is complete,
+            e.g. ("tool_call", {...}) the moment that object closes
+        Reading stops when the top-level object closes; trailing tokens (format="json" tends to
+        pad with whitespace) are not waited for. Timings go to `last_step_metrics`.
+        Returns the raw assistant text. Raises RuntimeError on failure.
+        """
+        msgs = list(messages or [])
+        if not msgs or msgs[0].get("role") != "system":
+            msgs = [{"role": "system", "content": system_prompt}] + msgs
+
+        parser = StreamingJSONParser()
+        started = time.perf_counter()
+        ttft = time_to_action = None
+        try:
+            stream = self.client.chat(model=self.model, messages=msgs, format="json", stream=True)
+            for chunk in stream:
+                piece = chunk.get("message", {}).get("content") or ""
+                if not piece:
+                    continue
+                if ttft is None:
+                    ttft = time.perf_counter() - started
+                for kind, value in parser.feed(piece):
+                    if kind == "field":
+                        key, value = value
+                        if time_to_action is None and key in ("tool_call", "final_response"):
+                            time_to_action = time.perf_counter() - started
+                        if on_event is not None:
+                            on_event(key, value)
+                    elif kind == "thought_delta" and on_event is not None:
+                        on_event(kind, value)
+                if parser.done:
+                    break
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()  # drops the HTTP response, which stops generation on the server
+        except Exception as e:
+            raise RuntimeError("ollama.chat call failed", e) from e
+
+        total = time.perf_counter() - started
+        self.last_step_metrics = {
+            "streamed": True,
+            "ttft_s": round(ttft if ttft is not None else total, 4),
+            "time_to_action_s": round(time_to_action if time_to_action is not None else total, 4),
+            "total_s": round(total, 4),
+        }
+        return parser.text
+
+    @staticmethod
+    def _extract_json_block(text: str) -> str:
         """
         Robustly extract the first JSON object/array from a noisy assistant text.
         Strategy:
@@ -122,59 +381,116 @@ class PlannerClient:
 
         raise ValueError("no valid JSON block found in assistant text")
 
-    def get_next_step(self, user_input: Optional[str] = None) -> Dict:
+    @staticmethod
+    def parse_response(assistant_text: str) -> Any:
+        """
+        Parse a raw planner completion into its JSON step (no history side effects; also used
+        to re-parse recorded completions offline). Raises ValueError / JSONDecodeError.
+        """
+        return json.loads(PlannerClient._extract_json_block(assistant_text))
+
+    @staticmethod
+    def is_step(parsed: Any) -> bool:
+        """
+        True for a tool_call, a tool_calls batch or a final_response.
+        """
+        return isinstance(parsed, dict) and any(k in parsed for k in ("tool_call", "tool_calls", "final_response"))
+
+    def get_next_step(
+        self,
+        user_input: Optional[str] = None,
+        capture: bool = True,
+        on_event: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict:
         """
         Send current history + optional user_input to the ReAct planner prompt,
-        expect a single JSON object (tool_call OR final_response). Append assistant result to history
+        expect a single JSON object (tool_call, tool_calls batch OR final_response). Append assistant result to history
         and return the parsed JSON as a dict.
+
+        With capture=False the frame already taken by screen_capture() (`last_frame`) is used,
+        which lets a caller capture ahead of time (see run_orchestrator_async).
+        With stream=True, on_event receives thought deltas and completed fields while the
+        response is generated (see _call_ollama_stream), e.g. to dispatch tool_call early.
         """
         if user_input:
-            self._history.append({"role": "user", "content": user_input})
-
-        messages = self._serialize_history_for_messages()
-        # Prepend system prompt as a message for the LLM
-        system_message = {"role": "system", "content": self.react_prompt}
-        full_messages = [system_message] + messages
-
-        self.screen_capture()
-        assistant_text = self._call_ollama(self.react_prompt, full_messages, True)
+            self._history.append("user", user_input)
+
+        self.last_response_text = None
+        frame = self.screen_capture() if capture or self.last_frame is None else self.last_frame
+        if not frame.data:
+            # set_of_marks frame that no element list was set for
+            frame = self.last_frame = encode_captured(frame, self.capture_settings)
+        with tracing.span("request_build"):
+            self._maybe_compact_history()
+            with tracing.span("history"):
+                messages = self._serialize_history_for_messages()
+            # Prepend system prompt as a message for the LLM
+            system_message = {"role": "system", "content": self.react_prompt}
+            full_messages = [system_message] + messages
+            screen_message = self._build_screen_message(frame, self.last_frame_change)
+            full_messages.append(screen_message)
+            if "images" in screen_message:
+                self.last_transform = frame.transform
+            # what this request carried besides the history (for session recording)
+            self.last_request = {
+                "history_entries": len(messages),
+                "history_tokens": self._history.token_count,
+                "screen": screen_message["content"],
+                "image": "images" in screen_message,
+                "ui_elements": self.ui_elements_table,
+                "transform": self.last_transform.to_dict() if self.last_transform is not None else None,
+            }
+        with tracing.span("llm"):
+            if self.stream:
+                assistant_text = self._call_ollama_stream(self.react_prompt, full_messages, on_event)
+            else:
+                started = time.perf_counter()
+                assistant_text = self._call_ollama(self.react_prompt, full_messages)
+                total = round(time.perf_counter() - started, 4)
+                # without streaming nothing is visible before the whole completion arrives
+                self.last_step_metrics = {"streamed": False, "ttft_s": total, "time_to_action_s": total, "total_s": total}
+        self.last_response_text = assistant_text
         # Expect assistant_text to be a single JSON object string per protocol
         try:
-            parsed = json.loads(self._extract_json_block(assistant_text))
+            with tracing.span("parse"):
+                parsed = self.parse_response(assistant_text)
         except Exception as exc:
             # Keep a short failure entry in history and re-raise for the integrator to handle
-            self._history.append({"role": "assistant", "content": {"status": "error", "error": f"invalid-json: {str(exc)}"}})
+            self._history.append("assistant", {"status": "error", "error": f"invalid-json: {str(exc)}"})
             raise
 
-        # Validate that the parsed JSON is either a tool_call or a final_response
-        if not isinstance(parsed, dict) or ("tool_call" not in parsed and "final_response" not in parsed):
-            self._history.append({"role": "assistant", "content": {"status": "error", "error": "invalid-response", "note": "missing tool_call and final_response"}})
+        # Validate that the parsed JSON is a tool_call, a tool_calls batch or a final_response
+        if not self.is_step(parsed):
+            self._history.append("assistant", {"status": "error", "error": "invalid-response", "note": "missing tool_call and final_response"})
             raise ValueError("LLM'in yanıtı ne tool_call ne de final_response içeriyor.")
 
         # Store assistant response (the tool_call or final_response) in history
-        self._history.append({"role": "assistant", "content": parsed})
+        self._history.append("assistant", parsed)
         return parsed
 
     def add_tool_response(self, result_json: Dict) -> None:
         """
-        Add executor/tool result (e.g. {"status":"success", ...} or {"status":"error", ...})
-        to history so the planner can observe it on the next get_next_step call.
+        Add executor/tool result (e.g. {"status":"success", ...} or {"status":"error", ...};
+        for a tool_calls batch {"status", "results": [...], "completed"}) to history so the planner can observe it on the next get_next_step call.
         """
-        self._history.append({"role": "tool", "content": result_json})
+        self._history.append("tool", result_json)
 
     def summarize_and_clear_history(self) -> None:
         """
         Send full history + summarizer prompt to the Summarizer LLM, receive a short summary string,
         clear history and store only the summary as the single memory entry so next get_next_step sees it.
         """
+        # a pending partial summary is superseded by the full one
+        self._compaction, self._compaction_head = None, []
         messages = self._serialize_history_for_messages()
         system_message = {"role": "system", "content": self.summarizer_prompt}
         full_messages = [system_message] + messages
 
-        summary_text = self._call_ollama(self.summarizer_prompt, full_messages, False)
+        with tracing.span("summarize"):
+            summary_text = self._call_ollama(self.summarizer_prompt, full_messages)
         # Ensure we keep only short memory (string). Do not preserve raw logs.
         self._history.clear()
-        self._history.append({"role": "memory", "content": summary_text})
+        self._history.append("memory", summary_text)
         return None
     
     def _call_gemini(self, system_prompt: str, messages: List[Dict[str, str]]) -> str:
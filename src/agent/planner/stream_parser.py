@@ -0,0 +1,158 @@
+"""
+Incremental parser for a streamed planner response (one top-level JSON object).
+
+Chunks of the completion are fed in as they arrive; the parser tracks nesting and string
+state character by character and emits events without waiting for the end of the stream:
+
+  ("thought_delta", str)  decoded text of the "thought" value as it arrives
+  ("field", (key, value)) a top-level key/value pair, the moment its value is complete
+                          (e.g. ("tool_call", {...}) as soon as that object closes)
+  ("done", dict)          the top-level object closed
+
+Anything before the first '{' (and after the closing '}') is ignored.
+"""
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+Event = Tuple[str, Any]
+
+# a trailing escape that may still be incomplete: "\", "\u", "\u12", ... or a lone high surrogate
+_PARTIAL_ESCAPE = re.compile(r'(\\u[dD][89abAB][0-9a-fA-F]{2}(\\u?[0-9a-fA-F]{0,3})?|\\u[0-9a-fA-F]{0,3}|\\)$')
+
+
+class StreamingJSONParser:
+
+    def __init__(self, stream_keys: Tuple[str, ...] = ("thought",)) -> None:
+        self.stream_keys = stream_keys
+        self.buffer: List[str] = []
+        self.result: Optional[Dict[str, Any]] = None
+
+        self._pos = 0                # absolute index of the next char
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._done = False
+        self._expect_key = True      # at depth 1: next string is a key
+        self._key: Optional[str] = None
+        self._key_start = -1
+        self._value_start = -1
+        self._fields: Dict[str, Any] = {}
+        # streamed string value: raw (still escaped) chars not emitted yet
+        self._streaming = False
+        self._raw_pending = ""
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    @property
+    def text(self) -> str:
+        return "".join(self.buffer)
+
+    def feed(self, chunk: str) -> List[Event]:
+        events: List[Event] = []
+        if not chunk or self._done:
+            return events
+        self.buffer.append(chunk)
+        raw = None  # joined buffer, built lazily when a value completes
+
+        for ch in chunk:
+            i = self._pos
+            self._pos += 1
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._in_string:
+                if self._streaming:
+                    self._raw_pending += ch
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        raw = raw if raw is not None else self.text
+                        if self._expect_key:
+                            self._key = json.loads(raw[self._key_start:i + 1])
+                        else:
+                            if self._streaming:
+                                self._raw_pending = self._raw_pending[:-1]
+                                self._flush_stream(events, final=True)
+                            self._complete_value(raw, i + 1, events)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    if self._expect_key:
+                        self._key_start = i
+                    else:
+                        self._value_start = i
+                        if self._key in self.stream_keys:
+                            self._streaming = True
+                            self._raw_pending = ""
+            elif ch in "{[":
+                if self._depth == 1 and not self._expect_key:
+                    self._value_start = i
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 1:
+                    raw = raw if raw is not None else self.text
+                    self._complete_value(raw, i + 1, events)
+                elif self._depth == 0:
+                    raw = raw if raw is not None else self.text
+                    if self._value_start >= 0:
+                        # primitive value right before the closing brace
+                        self._complete_value(raw, i, events)
+                    self._done = True
+                    self.result = self._fields
+                    events.append(("done", self._fields))
+                    break
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect_key = False
+                elif ch == ",":
+                    if self._value_start >= 0:
+                        raw = raw if raw is not None else self.text
+                        self._complete_value(raw, i, events)
+                    self._expect_key = True
+                elif not self._expect_key and self._value_start < 0 and not ch.isspace():
+                    self._value_start = i  # number / true / false / null
+
+        if self._streaming and self._in_string:
+            self._flush_stream(events, final=False)
+        return events
+
+    def _complete_value(self, raw: str, end: int, events: List[Event]) -> None:
+        if self._value_start < 0 or self._key is None:
+            return
+        value = json.loads(raw[self._value_start:end])
+        self._fields[self._key] = value
+        events.append(("field", (self._key, value)))
+        self._value_start = -1
+        self._key = None
+
+    def _flush_stream(self, events: List[Event], final: bool) -> None:
+        pending = self._raw_pending
+        hold = ""
+        if not final:
+            m = _PARTIAL_ESCAPE.search(pending)
+            if m:
+                # the matched backslash only starts an escape if it is not itself escaped
+                head = pending[:m.start() + 1]
+                if (len(head) - len(head.rstrip("\\"))) % 2 == 1:
+                    pending, hold = pending[:m.start()], pending[m.start():]
+        if pending:
+            delta = json.loads('"' + pending + '"')
+            if delta:
+                events.append(("thought_delta", delta))
+        self._raw_pending = hold
+        if final:
+            self._streaming = False
@@ -79,4 +79,21 @@ def is_executable_allowed(app_name: str, whitelist: List[str]) -> bool:
         if app_basename == allowed_app.lower():
             return True
             
-    return False
\ No newline at end of file
+    return False
+
+
+def is_path_allowed(path: str, allowed_paths: List[str]) -> bool:
+    """
+    'path', 'allowed_paths' köklerinden birinin içinde mi? (policy_engine trie'si ile)
+    """
+    from .policy_engine import PolicyConfig, PolicyEngine
+    engine = PolicyEngine(config=PolicyConfig(allowed_paths=list(allowed_paths)), base_roots=())
+    return engine.check_path(path).allowed
+
+
+def is_file_type_allowed(filename: str, allowed_file_types: List[str]) -> bool:
+    """
+    Dosya uzantısı izin listesinde mi? ('.txt' veya '*.tar.gz' gibi desenler)
+    """
+    from .policy_engine import FileTypeMatcher
+    return FileTypeMatcher(allowed_file_types).matches(filename)
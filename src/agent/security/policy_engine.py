@@ -0,0 +1,431 @@
+"""
+Compiled security policy for the executor.
+
+configs/policies.yaml and the `agent.security` block of configs/agent.yaml are loaded
+once and compiled into:
+  - a prefix trie over normalized path components for the allowed roots
+    ("C:\\Users" allows that directory and everything below it, "C:\\Users\\*" only
+    what is below it, "*" / "?" / "[...]" match inside a single component)
+  - suffix sets plus one combined regex for allowed / disallowed file types
+  - hashed sets for disallowed commands and allowed executables
+
+The sandbox is the `base_roots` trie (the user's home directory by default, see
+policy.ALLOWED_BASE_PATH). Configured roots only narrow it: a path must be inside a base
+root AND, if any root is configured, inside one of those too. Widening the sandbox
+(e.g. to C:\\Program Files) takes an explicit `base_roots` argument in code, never the
+YAML files alone.
+
+Path decisions are cached per normalized path (LRU), so the trie walk runs once per
+distinct target; a changed environment variable or working directory yields a new key. The config files are re-read when their mtime
+changes (checked at most every `reload_interval` seconds); a reload swaps the compiled
+policy and clears the cache.
+"""
+import fnmatch
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import yaml
+
+from .policy import ALLOWED_BASE_PATH
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_POLICY_FILES = (REPO_ROOT / "configs" / "policies.yaml", REPO_ROOT / "configs" / "agent.yaml")
+
+PATH_PARAMS = ("path", "src", "dst")
+COMMAND_PARAMS = ("command", "cmd")
+EXECUTABLE_PARAMS = ("app_name",)
+EXECUTABLE_SUFFIXES = (".exe", ".com", ".bat", ".cmd")
+
+_GLOB_CHARS = frozenset("*?[")
+_WINDOWS_DRIVE = re.compile(r"^[A-Za-z]:[\\/]")
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    reason: str = ""
+
+
+@dataclass
+class PolicyConfig:
+    """
+    Raw policy lists as read from the YAML files.
+    """
+    enabled: bool = True
+    allowed_paths: List[str] = field(default_factory=list)
+    allowed_file_types: List[str] = field(default_factory=list)
+    disallowed_file_types: List[str] = field(default_factory=list)
+    disallowed_commands: List[str] = field(default_factory=list)
+    allowed_executables: List[str] = field(default_factory=list)
+
+
+def load_policy_config(files: Iterable[Union[str, Path]] = DEFAULT_POLICY_FILES) -> PolicyConfig:
+    """
+    Merge the policy files (missing files are skipped). Top-level keys and an
+    `agent.security` block are both understood.
+    """
+    config = PolicyConfig()
+    for path in files:
+        path = Path(path)
+        if not path.is_file():
+            continue
+        data = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+        sections = [data]
+        security = (data.get("agent") or {}).get("security") if isinstance(data.get("agent"), dict) else None
+        if isinstance(security, dict):
+            sections.append(security)
+            if security.get("enable_security") is False:
+                config.enabled = False
+        for section in sections:
+            for key in ("allowed_paths", "allowed_file_types", "disallowed_file_types",
+                        "disallowed_commands", "allowed_executables"):
+                getattr(config, key).extend(str(v) for v in section.get(key) or [])
+    return config
+
+
+def normalize_path(path: str, path_module: Any = os.path) -> str:
+    """
+    path_module: os.path of the target OS (ntpath to evaluate a Windows policy elsewhere).
+    """
+    pm = path_module
+    return pm.normcase(pm.abspath(pm.expandvars(pm.expanduser(path))))
+
+
+def path_components(normalized: str) -> List[str]:
+    return [part for part in re.split(r"[\\/]", normalized) if part]
+
+
+class _TrieNode:
+    __slots__ = ("children", "globs", "pattern")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.globs: List[Tuple[Any, "_TrieNode"]] = []
+        self.pattern: Optional[str] = None   # set on nodes that end an allowed root
+
+
+class PathTrie:
+    """
+    Allowed roots keyed by normalized path components.
+    """
+
+    def __init__(self, path_module: Any = os.path) -> None:
+        self.root = _TrieNode()
+        self.patterns: List[str] = []
+        self.path_module = path_module
+
+    def add(self, pattern: str) -> None:
+        node = self.root
+        for part in path_components(normalize_path(pattern, self.path_module)):
+            if part == "**":
+                part = "*"
+            if _GLOB_CHARS.intersection(part):
+                for regex, child in node.globs:
+                    if regex.pattern == fnmatch.translate(part):
+                        node = child
+                        break
+                else:
+                    child = _TrieNode()
+                    node.globs.append((re.compile(fnmatch.translate(part)), child))
+                    node = child
+            else:
+                node = node.children.setdefault(part, _TrieNode())
+        node.pattern = pattern
+        self.patterns.append(pattern)
+
+    def match(self, parts: Sequence[str]) -> Optional[str]:
+        """
+        The allowed root that covers `parts`, or None.
+        """
+        stack = [(self.root, 0)]
+        while stack:
+            node, i = stack.pop()
+            if node.pattern is not None:
+                return node.pattern
+            if i == len(parts):
+                continue
+            for regex, child in node.globs:
+                if regex.match(parts[i]):
+                    stack.append((child, i + 1))
+            child = node.children.get(parts[i])
+            if child is not None:
+                stack.append((child, i + 1))
+        return None
+
+
+class FileTypeMatcher:
+    """
+    Plain extensions (".txt", ".tar.gz") go into a set checked against every dotted
+    suffix of the file name; anything with glob characters into one combined regex.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.suffixes = set()
+        globs = []
+        for pattern in patterns:
+            pattern = os.path.normcase(pattern.strip())
+            if not pattern:
+                continue
+            if _GLOB_CHARS.intersection(pattern):
+                globs.append(fnmatch.translate(pattern))
+            else:
+                self.suffixes.add(pattern if pattern.startswith(".") else "." + pattern)
+        self.regex = re.compile("|".join(f"(?:{g})" for g in globs)) if globs else None
+
+    def __bool__(self) -> bool:
+        return bool(self.suffixes) or self.regex is not None
+
+    def matches(self, filename: str) -> bool:
+        name = os.path.normcase(os.path.basename(filename))
+        i = name.find(".", 1)
+        while i != -1:
+            if name[i:] in self.suffixes:
+                return True
+            i = name.find(".", i + 1)
+        return bool(self.regex and self.regex.match(name))
+
+
+def command_name(command: str) -> str:
+    """
+    "C:\\Windows\\shutdown.exe /s" -> "shutdown"
+    """
+    token = command.strip().split()[0] if command and command.strip() else ""
+    name = os.path.basename(token.strip("\"'").replace("\\", "/")).lower()
+    for suffix in EXECUTABLE_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+class CompiledPolicy:
+
+    def __init__(self, config: PolicyConfig, base_roots: Sequence[str] = (ALLOWED_BASE_PATH,),
+                 executables: Iterable[str] = (), path_module: Any = os.path) -> None:
+        """
+        base_roots: the sandbox every path must stay inside (empty = configured roots only).
+        """
+        self.enabled = config.enabled
+        self.path_module = path_module
+        self.base = PathTrie(path_module)
+        for root in base_roots:
+            self.base.add(root)
+        self.roots = PathTrie(path_module)
+        self.skipped_roots: List[str] = []
+        for pattern in config.allowed_paths:
+            # a drive-letter root cannot match anything on a POSIX system
+            if path_module.sep == "/" and _WINDOWS_DRIVE.match(pattern):
+                self.skipped_roots.append(pattern)
+                continue
+            self.roots.add(pattern)
+        self.allowed_types = FileTypeMatcher(config.allowed_file_types)
+        self.disallowed_types = FileTypeMatcher(config.disallowed_file_types)
+        self.disallowed_commands = {command_name(c) for c in config.disallowed_commands}
+        self.executables = {os.path.basename(e).lower() for e in list(config.allowed_executables) + list(executables)}
+
+    def check_path(self, path: str) -> Decision:
+        if not self.enabled:
+            return Decision(True)
+        try:
+            normalized = normalize_path(path, self.path_module)
+        except (TypeError, ValueError) as e:
+            return Decision(False, f"geçersiz yol: {e}")
+        return self.check_normalized(normalized)
+
+    def check_normalized(self, normalized: str) -> Decision:
+        if not self.enabled:
+            return Decision(True)
+        parts = path_components(normalized)
+        # yapılandırılmış kökler yalnızca daraltır: yol hem temel kökün hem (varsa) bir izinli kökün içinde olmalı
+        base = self.base.match(parts) if self.base.patterns else None
+        if self.base.patterns and base is None:
+            return Decision(False, f"'{normalized}' güvenli temel dizinin dışında")
+        if not self.roots.patterns:
+            return Decision(base is not None, base or "izin verilen kök dizin yok")
+        root = self.roots.match(parts)
+        if root is None:
+            return Decision(False, f"'{normalized}' izin verilen dizinlerin dışında")
+        return Decision(True, root)
+
+    def check_file_type(self, path: str) -> Decision:
+        if not self.enabled:
+            return Decision(True)
+        name = os.path.basename(str(path).replace("\\", "/"))
+        if self.disallowed_types.matches(name):
+            return Decision(False, f"'{name}' dosya türü yasak")
+        # dosya uzantısı olmayan yollar (klasörler) için izin listesi uygulanmaz
+        if self.allowed_types and "." in name.lstrip(".") and not self.allowed_types.matches(name):
+            return Decision(False, f"'{name}' dosya türü izin listesinde değil")
+        return Decision(True)
+
+    def check_command(self, command: str) -> Decision:
+        if not self.enabled:
+            return Decision(True)
+        name = command_name(command)
+        if name in self.disallowed_commands:
+            return Decision(False, f"'{name}' komutu yasak")
+        return Decision(True)
+
+    def check_executable(self, app_name: str) -> Decision:
+        if not self.enabled:
+            return Decision(True)
+        if not app_name:
+            return Decision(False, "uygulama adı boş")
+        if os.path.basename(app_name.replace("\\", "/")).lower() in self.executables:
+            return Decision(True)
+        return Decision(False, f"'{app_name}' beyaz listede değil")
+
+
+class PolicyEngine:
+    """
+    Thread-safe front end: hot reload of the config files and an LRU cache of path decisions.
+    """
+
+    def __init__(
+        self,
+        files: Optional[Iterable[Union[str, Path]]] = DEFAULT_POLICY_FILES,
+        config: Optional[PolicyConfig] = None,
+        base_roots: Sequence[str] = (ALLOWED_BASE_PATH,),
+        executables: Iterable[str] = (),
+        cache_size: int = 4096,
+        reload_interval: float = 1.0,
+        path_module: Any = os.path,
+    ) -> None:
+        """
+        files: YAML files to load (watched for changes); config: use this instead of files.
+        base_roots: the sandbox; configured roots are intersected with it. Anything broader
+        than the home directory has to be passed here explicitly.
+        path_module: ntpath / posixpath to evaluate another OS's paths (default: this OS).
+        """
+        self.files = [Path(f) for f in files] if files is not None and config is None else []
+        self.base_roots = tuple(base_roots)
+        self.executables = tuple(executables)
+        self.path_module = path_module
+        self.cache_size = cache_size
+        self.reload_interval = reload_interval
+        self.hits = 0
+        self.misses = 0
+        self._config = config
+        self._cache: "OrderedDict[Any, Decision]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._mtimes: Dict[Path, Optional[float]] = {}
+        self._next_check = 0.0
+        self.policy = self._compile()
+
+    def _stat(self) -> Dict[Path, Optional[float]]:
+        mtimes = {}
+        for path in self.files:
+            try:
+                mtimes[path] = path.stat().st_mtime
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def _compile(self) -> CompiledPolicy:
+        self._mtimes = self._stat()
+        config = self._config if self._config is not None else load_policy_config(self.files)
+        return CompiledPolicy(config, self.base_roots, self.executables, self.path_module)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Recompile if a config file changed (or `force`). Returns True if the policy was replaced.
+        """
+        if not force and (not self.files or self._stat() == self._mtimes):
+            return False
+        policy = self._compile()
+        with self._lock:
+            self.policy = policy
+            self._cache.clear()
+        return True
+
+    def _current(self) -> CompiledPolicy:
+        if self.files:
+            now = time.monotonic()
+            if now >= self._next_check:
+                self._next_check = now + self.reload_interval
+                self.reload()
+        return self.policy
+
+    def check_path(self, path: str) -> Decision:
+        policy = self._current()
+        if not isinstance(path, str) or not path:
+            return Decision(False, "yol boş veya metin değil")
+        # anahtar normalize edilmiş yol: ortam değişkeni / çalışma dizini değişince eski karar kullanılmaz
+        try:
+            key = normalize_path(path, self.path_module)
+        except (TypeError, ValueError) as e:
+            return Decision(False, f"geçersiz yol: {e}")
+        with self._lock:
+            decision = self._cache.get(key)
+            if decision is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return decision
+        decision = policy.check_normalized(key)
+        with self._lock:
+            if policy is self.policy:
+                self.misses += 1
+                self._cache[key] = decision
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return decision
+
+    def check_file_type(self, path: str) -> Decision:
+        return self._current().check_file_type(path)
+
+    def check_command(self, command: str) -> Decision:
+        return self._current().check_command(command)
+
+    def check_executable(self, app_name: str) -> Decision:
+        return self._current().check_executable(app_name)
+
+    def enforce(self, action: str, params: Dict[str, Any]) -> None:
+        """
+        Raise PermissionError for the first parameter the policy rejects.
+        """
+        for name in PATH_PARAMS:
+            if name in params:
+                for check in (self.check_path, self.check_file_type):
+                    decision = check(params[name])
+                    if not decision.allowed:
+                        raise PermissionError(f"Yol '{params[name]}' reddedildi: {decision.reason}.")
+        for name in COMMAND_PARAMS:
+            if name in params:
+                decision = self.check_command(str(params[name]))
+                if not decision.allowed:
+                    raise PermissionError(f"Komut '{params[name]}' reddedildi: {decision.reason}.")
+        for name in EXECUTABLE_PARAMS:
+            if name in params:
+                decision = self.check_executable(str(params[name]))
+                if not decision.allowed:
+                    raise PermissionError(f"Uygulama '{params[name]}' reddedildi: {decision.reason}.")
+        decision = self.check_command(action)
+        if not decision.allowed:
+            raise PermissionError(f"Eylem '{action}' reddedildi: {decision.reason}.")
+
+
+_engine: Optional[PolicyEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_policy_engine() -> PolicyEngine:
+    """
+    The process-wide engine, compiled from DEFAULT_POLICY_FILES on first use.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = PolicyEngine()
+        return _engine
+
+
+def set_policy_engine(engine: Optional[PolicyEngine]) -> Optional[PolicyEngine]:
+    global _engine
+    with _engine_lock:
+        previous, _engine = _engine, engine
+    return previous
@@ -0,0 +1,133 @@
+"""
+Tile-hash change detection between consecutive screen frames.
+
+The frame is cut into square tiles and every tile is reduced to a 64-bit hash.
+Only the hash grid of the previous frame is kept; comparing two grids tells
+which tiles changed, and neighbouring dirty tiles are merged into rectangles.
+"""
+from collections import deque
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+Region = Tuple[int, int, int, int]  # (x, y, w, h) in frame pixels
+
+
+@dataclass
+class FrameChange:
+    """
+    Result of comparing a frame with the previous one.
+      - changed: False only when every tile hash matched
+      - regions: merged dirty rectangles (x, y, w, h); the whole frame for the first frame
+      - first_frame: True when there was nothing to compare against
+    """
+    changed: bool
+    regions: List[Region] = field(default_factory=list)
+    dirty_tiles: int = 0
+    total_tiles: int = 0
+    first_frame: bool = False
+
+    @property
+    def changed_ratio(self) -> float:
+        return self.dirty_tiles / self.total_tiles if self.total_tiles else 1.0
+
+
+class FrameChangeDetector:
+    """
+    Keeps the tile-hash grid of the last frame and reports dirty regions for the next one.
+
+    Tile hashes are a random-weight linear hash over the tile's raw bytes viewed as
+    uint64 lanes (wrapping arithmetic). That is a single vectorized multiply-sum per
+    frame, several times faster than a cryptographic hash per tile, and two different
+    tiles collide with negligible probability.
+    """
+
+    def __init__(self, tile_size: int = 32, max_regions: int = 16, seed: int = 0x5EED) -> None:
+        if tile_size <= 0 or tile_size % 4:
+            raise ValueError("tile_size must be a positive multiple of 4")
+        self.tile_size = tile_size
+        self.max_regions = max_regions
+        self._rng = np.random.default_rng(seed)
+        self._weights: Optional[np.ndarray] = None
+        self._hashes: Optional[np.ndarray] = None
+        self._frame_size: Optional[Tuple[int, int]] = None
+
+    def reset(self) -> None:
+        self._hashes = None
+        self._frame_size = None
+
+    def tile_hashes(self, frame) -> np.ndarray:
+        """
+        Return the (rows, cols) uint64 hash grid of `frame` (PIL image or HxW[xC] uint8 array).
+        """
+        arr = np.asarray(frame, dtype=np.uint8)
+        if arr.ndim == 2:
+            arr = arr[:, :, None]
+        h, w, c = arr.shape
+        ts = self.tile_size
+        rows, cols = -(-h // ts), -(-w // ts)
+        if rows * ts != h or cols * ts != w:
+            arr = np.pad(arr, ((0, rows * ts - h), (0, cols * ts - w), (0, 0)))
+
+        tiles = np.ascontiguousarray(arr.reshape(rows, ts, cols, ts, c).transpose(0, 2, 1, 3, 4))
+        lanes = tiles.reshape(rows * cols, -1).view(np.uint64)
+
+        if self._weights is None or self._weights.shape[0] != lanes.shape[1]:
+            self._weights = self._rng.integers(1, 2 ** 63, size=lanes.shape[1], dtype=np.uint64) | np.uint64(1)
+        return (lanes * self._weights).sum(axis=1, dtype=np.uint64).reshape(rows, cols)
+
+    def update(self, frame) -> FrameChange:
+        """
+        Hash `frame`, compare it with the previous frame and remember it for the next call.
+        """
+        arr = np.asarray(frame)
+        size = (arr.shape[1], arr.shape[0])
+        hashes = self.tile_hashes(arr)
+        previous, previous_size = self._hashes, self._frame_size
+        self._hashes, self._frame_size = hashes, size
+
+        if previous is None or previous_size != size or previous.shape != hashes.shape:
+            return FrameChange(True, [(0, 0, size[0], size[1])], hashes.size, hashes.size, first_frame=True)
+
+        dirty = hashes != previous
+        count = int(dirty.sum())
+        if count == 0:
+            return FrameChange(False, [], 0, hashes.size)
+        return FrameChange(True, self._merge_regions(dirty, size), count, hashes.size)
+
+    def _merge_regions(self, dirty: np.ndarray, size: Tuple[int, int]) -> List[Region]:
+        """
+        Group 4-connected dirty tiles and return their bounding boxes in pixels.
+        If there are more groups than max_regions, a single enclosing box is returned.
+        """
+        ts = self.tile_size
+        width, height = size
+        seen = np.zeros_like(dirty)
+        boxes = []
+        for r0, c0 in zip(*np.nonzero(dirty)):
+            if seen[r0, c0]:
+                continue
+            seen[r0, c0] = True
+            queue = deque([(r0, c0)])
+            rmin = rmax = r0
+            cmin = cmax = c0
+            while queue:
+                r, c = queue.popleft()
+                rmin, rmax = min(rmin, r), max(rmax, r)
+                cmin, cmax = min(cmin, c), max(cmax, c)
+                for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                    if 0 <= nr < dirty.shape[0] and 0 <= nc < dirty.shape[1] and dirty[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        queue.append((nr, nc))
+            boxes.append((rmin, cmin, rmax, cmax))
+
+        if len(boxes) > self.max_regions:
+            boxes = [(min(b[0] for b in boxes), min(b[1] for b in boxes),
+                      max(b[2] for b in boxes), max(b[3] for b in boxes))]
+
+        regions = []
+        for rmin, cmin, rmax, cmax in boxes:
+            x, y = int(cmin) * ts, int(rmin) * ts
+            regions.append((x, y, min(width, (int(cmax) + 1) * ts) - x, min(height, (int(rmax) + 1) * ts) - y))
+        return regions
@@ -0,0 +1,153 @@
+"""
+Screen <-> model image coordinate mapping for the frames sent to the planner.
+
+A frame is resized (and optionally letterboxed) to the vision model's native resolution
+before it is encoded, so the model sees exactly the pixels it reasons about. The model then
+answers in coordinates of that image; FrameTransform records the mapping
+
+    model = (screen - origin) * scale + pad
+
+so coordinates in the prompt (changed regions, element table) can be written in image
+pixels and every coordinate parameter the planner returns can be mapped back to screen
+pixels before the executor runs the tool. `origin` is the screen position of the captured
+frame's top-left: (0, 0) for the primary monitor, negative for a virtual desktop capture
+that reaches left of / above it.
+"""
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from PIL import Image
+
+# tool parameters holding screen coordinates: a point (x, y) and [x, y, w, h] regions
+POINT_PARAMS = ("x", "y")
+RECT_PARAMS = ("region",)
+
+
+@dataclass(frozen=True)
+class FrameTransform:
+    source_size: Tuple[int, int]    # captured screen (w, h)
+    size: Tuple[int, int]           # image sent to the model (w, h), letterbox padding included
+    scale_x: float = 1.0
+    scale_y: float = 1.0
+    pad_x: int = 0
+    pad_y: int = 0
+    origin: Tuple[int, int] = (0, 0)  # screen position of the captured frame's (0, 0)
+
+    @classmethod
+    def identity(cls, size: Tuple[int, int]) -> "FrameTransform":
+        return cls(tuple(size), tuple(size))
+
+    @property
+    def is_identity(self) -> bool:
+        return (self.scale_x == 1.0 and self.scale_y == 1.0 and self.pad_x == 0 and self.pad_y == 0
+                and tuple(self.origin) == (0, 0))
+
+    def to_model(self, x: float, y: float) -> Tuple[int, int]:
+        ox, oy = self.origin
+        return round((x - ox) * self.scale_x + self.pad_x), round((y - oy) * self.scale_y + self.pad_y)
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        """
+        Model image point -> screen pixel, clamped to the screen (a point on the letterbox
+        padding lands on the nearest screen edge).
+        """
+        w, h = self.source_size
+        ox, oy = self.origin
+        sx = round((x - self.pad_x) / self.scale_x)
+        sy = round((y - self.pad_y) / self.scale_y)
+        return ox + min(max(sx, 0), w - 1), oy + min(max(sy, 0), h - 1)
+
+    def rect_to_model(self, x: float, y: float, w: float, h: float) -> Tuple[int, int, int, int]:
+        x1, y1 = self.to_model(x, y)
+        x2, y2 = self.to_model(x + w, y + h)
+        return x1, y1, x2 - x1, y2 - y1
+
+    def rect_to_screen(self, x: float, y: float, w: float, h: float) -> Tuple[int, int, int, int]:
+        x1, y1 = self.to_screen(x, y)
+        x2, y2 = self.to_screen(x + w, y + h)
+        return x1, y1, x2 - x1, y2 - y1
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FrameTransform":
+        return cls(tuple(data["source_size"]), tuple(data["size"]), data["scale_x"], data["scale_y"],
+                   data["pad_x"], data["pad_y"], tuple(data.get("origin", (0, 0))))
+
+
+def fit_image(image: Image.Image, model_resolution: Optional[Tuple[int, int]] = None, letterbox: bool = True,
+              max_dimension: Optional[int] = None) -> Tuple[Image.Image, FrameTransform]:
+    """
+    Resize `image` for the model and return it with its transform.
+      - model_resolution (w, h): scale to fit inside it, aspect ratio kept; with letterbox the
+        rest is padded black (centered) so the image is exactly the model resolution
+      - otherwise max_dimension caps the longest side (no upscaling)
+    """
+    w, h = image.size
+    if model_resolution:
+        mw, mh = model_resolution
+        scale = min(mw / float(w), mh / float(h))
+    elif max_dimension and max(w, h) > max_dimension:
+        mw = mh = None
+        scale = max_dimension / float(max(w, h))
+    else:
+        return image, FrameTransform.identity(image.size)
+
+    new_size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    if new_size != image.size:
+        image = image.resize(new_size, Image.BILINEAR)
+    pad_x = pad_y = 0
+    if model_resolution and letterbox and new_size != (mw, mh):
+        pad_x, pad_y = (mw - new_size[0]) // 2, (mh - new_size[1]) // 2
+        canvas = Image.new(image.mode if image.mode in ("RGB", "L") else "RGB", (mw, mh))
+        canvas.paste(image, (pad_x, pad_y))
+        image = canvas
+    return image, FrameTransform((w, h), image.size, new_size[0] / float(w), new_size[1] / float(h), pad_x, pad_y)
+
+
+def _number(value: Any) -> float:
+    if isinstance(value, bool):
+        raise ValueError(value)
+    return float(value)
+
+
+def remap_tool_call(tool_call: Any, transform: Optional[FrameTransform]) -> Any:
+    """
+    Copy of a planner tool_call with its coordinate parameters mapped from model image
+    pixels to screen pixels. Values that are not numbers are left for the tool registry
+    to reject.
+    """
+    if transform is None or transform.is_identity or not isinstance(tool_call, dict):
+        return tool_call
+    params = tool_call.get("parameters")
+    if not isinstance(params, dict):
+        return tool_call
+    mapped = dict(params)
+    if all(k in mapped for k in POINT_PARAMS):
+        try:
+            mapped["x"], mapped["y"] = transform.to_screen(_number(mapped["x"]), _number(mapped["y"]))
+        except (TypeError, ValueError):
+            pass
+    for key in RECT_PARAMS:
+        rect = mapped.get(key)
+        if isinstance(rect, (list, tuple)) and len(rect) == 4:
+            try:
+                mapped[key] = list(transform.rect_to_screen(*(_number(v) for v in rect)))
+            except (TypeError, ValueError):
+                pass
+    return dict(tool_call, parameters=mapped)
+
+
+def remap_step(parsed: Any, transform: Optional[FrameTransform]) -> Any:
+    """
+    remap_tool_call over a planner step's tool_call or tool_calls batch.
+    """
+    if transform is None or transform.is_identity or not isinstance(parsed, dict):
+        return parsed
+    out = dict(parsed)
+    if "tool_call" in out:
+        out["tool_call"] = remap_tool_call(out["tool_call"], transform)
+    if isinstance(out.get("tool_calls"), list):
+        out["tool_calls"] = [remap_tool_call(c, transform) for c in out["tool_calls"]]
+    return out
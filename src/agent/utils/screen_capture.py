@@ -0,0 +1,280 @@
+"""
+Screen capture backends for the planner.
+
+A backend grabs a frame (PIL image) and encodes it in memory, so the encoded
+bytes can be handed straight to the LLM call without a PNG round-trip through
+the working directory.
+
+Backends:
+  - PyAutoGUICaptureBackend: live screen via pyautogui (default on Windows)
+  - MSSCaptureBackend: live screen via mss (faster grabs, monitor selectable)
+  - FileCaptureBackend: replays saved screenshots (no display required)
+"""
+import io
+import time
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+
+from PIL import Image
+
+from . import tracing
+from .frame_transform import FrameTransform, fit_image
+
+IMAGE_FORMATS = ("PNG", "JPEG", "WEBP")
+IMAGE_SUFFIXES = (".png", ".jpg", ".jpeg", ".webp", ".bmp")
+
+
+@dataclass
+class CaptureSettings:
+    """
+    Encoding options for frames sent to the LLM.
+      - image_format: "PNG" | "JPEG" | "WEBP"
+      - quality: 1-100, used by JPEG/WEBP
+      - max_dimension: longest side in pixels; None keeps the native resolution
+      - png_compress_level: 0-9, lower is faster (pyautogui's default save uses 6)
+      - model_resolution: (w, h) native resolution of the vision model (e.g. (896, 896));
+        frames are scaled to fit it, overriding max_dimension
+      - letterbox: pad the scaled frame to exactly model_resolution (False: scale only)
+    """
+    image_format: str = "PNG"
+    quality: int = 85
+    max_dimension: Optional[int] = None
+    png_compress_level: int = 1
+    model_resolution: Optional[Tuple[int, int]] = None
+    letterbox: bool = True
+
+    def __post_init__(self) -> None:
+        self.image_format = self.image_format.upper()
+        if self.image_format == "JPG":
+            self.image_format = "JPEG"
+        if self.image_format not in IMAGE_FORMATS:
+            raise ValueError(f"unsupported image format: {self.image_format!r} (expected one of {IMAGE_FORMATS})")
+        if not 1 <= int(self.quality) <= 100:
+            raise ValueError(f"quality must be in 1..100, got {self.quality}")
+        if self.max_dimension is not None and int(self.max_dimension) <= 0:
+            raise ValueError(f"max_dimension must be positive, got {self.max_dimension}")
+        if self.model_resolution is not None:
+            self.model_resolution = tuple(int(v) for v in self.model_resolution)
+            if len(self.model_resolution) != 2 or min(self.model_resolution) <= 0:
+                raise ValueError(f"model_resolution must be a positive (w, h), got {self.model_resolution}")
+
+
+@dataclass
+class CapturedFrame:
+    """
+    One captured screen frame.
+    `image` is the full-resolution RGB frame, `data` the encoded payload for the LLM and
+    `transform` the screen -> encoded image mapping (identity at native resolution).
+    `model_image` is the scaled image that was encoded; `marked` is set when `data` carries
+    a set-of-marks overlay (see som_overlay). `data` is empty for a frame captured with
+    encode=False that was not encoded yet.
+    """
+    image: Image.Image
+    data: bytes
+    image_format: str
+    size: Tuple[int, int]          # size of the encoded image
+    source_size: Tuple[int, int]   # size of the captured screen
+    timestamp: float
+    capture_seconds: float = 0.0
+    encode_seconds: float = 0.0
+    transform: Optional[FrameTransform] = None
+    model_image: Optional[Image.Image] = None
+    marked: bool = False
+
+
+def encode_image(image: Image.Image, settings: Optional[CaptureSettings] = None) -> Tuple[bytes, Tuple[int, int]]:
+    """
+    Encode a PIL image in memory according to `settings`.
+    Returns (encoded_bytes, encoded_size).
+    """
+    data, transform = encode_frame(image, settings)
+    return data, transform.size
+
+
+def encode_frame(image: Image.Image, settings: Optional[CaptureSettings] = None) -> Tuple[bytes, FrameTransform]:
+    """
+    encode_image that also returns the screen -> encoded image transform.
+    """
+    settings = settings or CaptureSettings()
+    image, transform = fit_image(image, settings.model_resolution, settings.letterbox, settings.max_dimension)
+    return encode_fitted(image, settings), transform
+
+
+def encode_fitted(image: Image.Image, settings: Optional[CaptureSettings] = None) -> bytes:
+    """
+    Encode an image that is already scaled for the model (no resizing).
+    """
+    settings = settings or CaptureSettings()
+
+    if image.mode not in ("RGB", "L"):
+        # JPEG cannot store alpha; screenshots never need it anyway
+        image = image.convert("RGB")
+
+    buf = io.BytesIO()
+    if settings.image_format == "PNG":
+        image.save(buf, format="PNG", compress_level=settings.png_compress_level)
+    elif settings.image_format == "JPEG":
+        image.save(buf, format="JPEG", quality=settings.quality)
+    else:
+        # method=0 is the fastest WebP encoder setting
+        image.save(buf, format="WEBP", quality=settings.quality, method=0)
+    return buf.getvalue()
+
+
+def encode_captured(frame: CapturedFrame, settings: Optional[CaptureSettings] = None,
+                    image: Optional[Image.Image] = None, started: Optional[float] = None) -> CapturedFrame:
+    """
+    Copy of `frame` with `data` encoded from `image` (default: the frame's model_image).
+    `started` is when encoding began (default: now); the time until done is recorded as "encode".
+    """
+    settings = settings or CaptureSettings()
+    t0 = time.perf_counter() if started is None else started
+    data = encode_fitted(frame.model_image if image is None else image, settings)
+    t1 = time.perf_counter()
+    tracing.record("encode", t0, t1 - t0)
+    return replace(frame, data=data, encode_seconds=t1 - t0)
+
+
+class CaptureBackend:
+    """
+    Base class for capture backends. Subclasses implement `grab()`.
+    """
+
+    def grab(self) -> Image.Image:
+        raise NotImplementedError
+
+    @property
+    def origin(self) -> Tuple[int, int]:
+        """
+        Screen position of a grabbed frame's top-left pixel (FrameTransform.origin).
+        """
+        return (0, 0)
+
+    def grab_region(self, region: Tuple[int, int, int, int]) -> Image.Image:
+        """
+        Only the (x, y, w, h) region of the screen. Backends that can grab a region directly
+        override this; the default crops a full grab.
+        """
+        x, y, w, h = region
+        return self.grab().crop((x, y, x + w, y + h))
+
+    def capture(self, settings: Optional[CaptureSettings] = None, encode: bool = True) -> CapturedFrame:
+        """
+        Grab a frame and encode it. Timing of both stages is recorded on the frame.
+        With encode=False the frame is only scaled (`model_image`) and `data` stays empty
+        until encode_captured() is called, e.g. when the payload may be reused or marked first.
+        """
+        settings = settings or CaptureSettings()
+
+        t0 = time.perf_counter()
+        image = self.grab()
+        t1 = time.perf_counter()
+        fitted, transform = fit_image(image, settings.model_resolution, settings.letterbox, settings.max_dimension)
+        if self.origin != (0, 0):
+            transform = replace(transform, origin=self.origin)
+        tracing.record("capture", t0, t1 - t0)
+
+        frame = CapturedFrame(
+            image=image,
+            data=b"",
+            image_format=settings.image_format,
+            size=transform.size,
+            source_size=image.size,
+            timestamp=time.time(),
+            capture_seconds=t1 - t0,
+            transform=transform,
+            model_image=fitted,
+        )
+        return encode_captured(frame, settings, started=t1) if encode else frame
+
+    def close(self) -> None:
+        pass
+
+
+class PyAutoGUICaptureBackend(CaptureBackend):
+    """
+    Live screen capture with pyautogui (primary monitor).
+    """
+
+    def grab(self) -> Image.Image:
+        import pyautogui  # needs a display, so imported lazily
+        return pyautogui.screenshot()
+
+    def grab_region(self, region: Tuple[int, int, int, int]) -> Image.Image:
+        import pyautogui
+        return pyautogui.screenshot(region=tuple(region))
+
+
+class MSSCaptureBackend(CaptureBackend):
+    """
+    Live screen capture with mss. `monitor` follows mss numbering
+    (0 = whole virtual desktop, 1 = primary monitor, ...). Frames of a monitor that does not
+    start at the primary monitor's top-left carry its position as the transform origin.
+    """
+
+    def __init__(self, monitor: int = 1) -> None:
+        self.monitor = monitor
+        self._sct = None
+
+    def grab(self) -> Image.Image:
+        if self._sct is None:
+            import mss
+            self._sct = mss.mss()
+        shot = self._sct.grab(self._sct.monitors[self.monitor])
+        return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+    @property
+    def origin(self) -> Tuple[int, int]:
+        if self._sct is None:
+            import mss
+            self._sct = mss.mss()
+        monitor = self._sct.monitors[self.monitor]
+        return (monitor["left"], monitor["top"])
+
+    def grab_region(self, region: Tuple[int, int, int, int]) -> Image.Image:
+        if self._sct is None:
+            import mss
+            self._sct = mss.mss()
+        monitor = self._sct.monitors[self.monitor]
+        x, y, w, h = region
+        shot = self._sct.grab({"left": monitor["left"] + x, "top": monitor["top"] + y, "width": w, "height": h})
+        return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+    def close(self) -> None:
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+
+class FileCaptureBackend(CaptureBackend):
+    """
+    Replays saved screenshots instead of grabbing the screen.
+    `source` is a single image file, a directory of images (sorted by name)
+    or an explicit list of paths. With loop=True the sequence repeats forever,
+    otherwise the last frame is returned once the sequence is exhausted.
+    """
+
+    def __init__(self, source: Union[str, Path, Iterable[Union[str, Path]]], loop: bool = True) -> None:
+        self.paths = self._resolve_paths(source)
+        if not self.paths:
+            raise ValueError(f"no screenshots found in {source!r}")
+        self.loop = loop
+        self._index = 0
+
+    @staticmethod
+    def _resolve_paths(source) -> List[Path]:
+        if isinstance(source, (str, Path)):
+            p = Path(source)
+            if p.is_dir():
+                return sorted(f for f in p.iterdir() if f.suffix.lower() in IMAGE_SUFFIXES)
+            return [p]
+        return [Path(s) for s in source]
+
+    def grab(self) -> Image.Image:
+        if self._index >= len(self.paths):
+            self._index = 0 if self.loop else len(self.paths) - 1
+        path = self.paths[self._index]
+        self._index += 1
+        with Image.open(path) as img:
+            return img.convert("RGB")
@@ -0,0 +1,190 @@
+"""
+Adaptive waiting on the screen contents (wait_until_stable / wait_until_changed tools).
+
+Frames come from a frame source (a `grab() -> PIL image` callable, the live screen by
+default) and are reduced to a small grayscale signature of the watched region, so one
+poll costs a grab plus a ~128 px resize. When a region is watched and a region source
+(`grab_region(region) -> PIL image`) is available, only that region is grabbed.
+
+Polls start at `min_interval` and back off exponentially to `max_interval` while
+nothing happens; any change resets the interval, so a busy screen is watched closely
+and an idle one cheaply.
+"""
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from . import tracing
+
+Region = Tuple[int, int, int, int]  # (x, y, w, h) in screen pixels
+FrameSource = Callable[[], Image.Image]
+RegionSource = Callable[[Region], Image.Image]
+
+SIGNATURE_SIZE = 128        # longest side of the downscaled signature
+CHANGE_THRESHOLD = 2.0      # mean absolute gray-level difference that counts as a change
+MIN_INTERVAL = 0.02
+MAX_INTERVAL = 0.25
+QUIET_SECONDS = 0.15        # no change for this long -> stable
+MIN_SLEEP = 0.001           # floor for the last, shortened sleep before a deadline
+
+
+@dataclass
+class SettleResult:
+    settled: bool      # stable / changed before the timeout
+    elapsed: float     # seconds
+    polls: int
+
+
+def parse_region(region: Optional[Sequence[int]]) -> Optional[Region]:
+    """
+    [x, y, w, h] from the planner -> Region, None for the whole screen.
+    Raises ValueError for anything else.
+    """
+    if region is None or (isinstance(region, (list, tuple)) and len(region) == 0):
+        return None
+    if not isinstance(region, (list, tuple)) or len(region) != 4:
+        raise ValueError(f"region must be [x, y, w, h], got {region!r}")
+    x, y, w, h = (int(v) for v in region)
+    if w <= 0 or h <= 0:
+        raise ValueError(f"region width and height must be positive, got {region!r}")
+    return x, y, w, h
+
+
+def frame_signature(image: Image.Image, region: Optional[Region] = None, size: int = SIGNATURE_SIZE) -> np.ndarray:
+    """
+    Downscaled grayscale float32 array of `region` (whole frame if None).
+    """
+    if region is not None:
+        x, y, w, h = region
+        image = image.crop((x, y, x + w, y + h))
+    w, h = image.size
+    scale = min(1.0, size / float(max(w, h)))
+    small = image.convert("L")
+    if scale < 1.0:
+        small = small.resize((max(1, round(w * scale)), max(1, round(h * scale))), Image.BILINEAR, reducing_gap=2.0)
+    return np.asarray(small, dtype=np.float32)
+
+
+def signature_distance(a: np.ndarray, b: np.ndarray) -> float:
+    if a.shape != b.shape:
+        return float("inf")
+    return float(np.abs(a - b).mean())
+
+
+class ScreenWatcher:
+    """
+    Polls a frame source with exponential backoff. `clock` and `sleep` are injectable
+    so tests can run on simulated time.
+    """
+
+    def __init__(
+        self,
+        source: FrameSource,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        threshold: float = CHANGE_THRESHOLD,
+        clock: Callable[[], float] = time.perf_counter,
+        sleep: Callable[[float], None] = time.sleep,
+        region_source: Optional[RegionSource] = None,
+    ) -> None:
+        """
+        region_source: grabs just a region (e.g. CaptureBackend.grab_region); without it a
+        watched region is cropped out of a full frame.
+        """
+        self.source = source
+        self.region_source = region_source
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.threshold = threshold
+        self.clock = clock
+        self.sleep = sleep
+
+    def _signature(self, region: Optional[Region]) -> np.ndarray:
+        if region is not None and self.region_source is not None:
+            return frame_signature(self.region_source(region))
+        return frame_signature(self.source(), region)
+
+    def wait_until_stable(self, timeout: float, region: Optional[Region] = None, quiet: float = QUIET_SECONDS) -> SettleResult:
+        """
+        Return once the region has not changed for `quiet` seconds (or at the timeout).
+        """
+        start = self.clock()
+        with tracing.span("wait_until_stable"):
+            # compared against the frame at the last change, not the previous poll, so a slow
+            # animation that moves little between two short polls still counts as changing
+            reference = self._signature(region)
+            last_change = start
+            interval = self.min_interval
+            polls = 1
+            while True:
+                now = self.clock()
+                if now - last_change >= quiet:
+                    return SettleResult(True, now - start, polls)
+                if now - start >= timeout:
+                    return SettleResult(False, now - start, polls)
+                # never sleep past the moment the quiet window (or the timeout) ends
+                self.sleep(max(MIN_SLEEP, min(interval, last_change + quiet - now, start + timeout - now)))
+                current = self._signature(region)
+                polls += 1
+                if signature_distance(reference, current) > self.threshold:
+                    reference = current
+                    last_change = self.clock()
+                    interval = self.min_interval
+                else:
+                    interval = min(interval * 2, self.max_interval)
+
+    def wait_until_changed(self, timeout: float, region: Optional[Region] = None) -> SettleResult:
+        """
+        Return as soon as the region differs from how it looked when the call started.
+        """
+        start = self.clock()
+        with tracing.span("wait_until_changed"):
+            baseline = self._signature(region)
+            interval = self.min_interval
+            polls = 1
+            while True:
+                now = self.clock()
+                if now - start >= timeout:
+                    return SettleResult(False, now - start, polls)
+                self.sleep(max(MIN_SLEEP, min(interval, start + timeout - now)))
+                polls += 1
+                if signature_distance(baseline, self._signature(region)) > self.threshold:
+                    return SettleResult(True, self.clock() - start, polls)
+                interval = min(interval * 2, self.max_interval)
+
+
+_source: Optional[FrameSource] = None
+_region_source: Optional[RegionSource] = None
+
+
+def get_frame_source() -> FrameSource:
+    """
+    The process-wide frame source; the live screen (pyautogui) unless set.
+    """
+    global _source, _region_source
+    if _source is None:
+        from .screen_capture import PyAutoGUICaptureBackend
+        backend = PyAutoGUICaptureBackend()
+        _source, _region_source = backend.grab, backend.grab_region
+    return _source
+
+
+def get_region_source() -> Optional[RegionSource]:
+    """
+    The region grabber that goes with get_frame_source() (None: crop full frames).
+    """
+    get_frame_source()
+    return _region_source
+
+
+def set_frame_source(source: Optional[FrameSource], region_source: Optional[RegionSource] = None) -> Optional[FrameSource]:
+    """
+    Install the frame source (and optionally its region grabber) for the wait tools
+    (None restores the live screen). Returns the previous frame source.
+    """
+    global _source, _region_source
+    previous, _source, _region_source = _source, source, region_source
+    return previous
@@ -0,0 +1,246 @@
+"""
+Append-only binary session log (what the agent saw and did during a task).
+
+A session is a directory of segment files (segment_00000.wlog, ...). Each segment starts
+with a small header and holds length-prefixed records:
+
+    kind u8 | flags u8 | step u32 | timestamp f64 | meta_len u32 | blob_len u32 | crc32 u32
+    meta (JSON, zlib-compressed when FLAG_ZLIB is set) | blob (raw bytes)
+
+Frames go in as the already-encoded PNG/JPEG/WEBP bytes (blob), everything else as JSON
+meta. A new segment is started once a segment would grow past `segment_bytes`, so a long
+task never rewrites or grows one huge file. The reader memory-maps the segments and hands
+out blobs as memoryview slices (no copy); a record cut short by a crash ends its segment.
+
+SessionRecorder is the orchestrator-facing side: task / planner step (frame, request,
+response) / tool call + result / timing records.
+"""
+import json
+import mmap
+import struct
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+MAGIC = b"WOAS"
+VERSION = 1
+SEGMENT_HEADER = struct.Struct("<4sHI")          # magic, version, segment number
+RECORD_HEADER = struct.Struct("<BBIdIII")        # kind, flags, step, timestamp, meta_len, blob_len, crc32
+FLAG_ZLIB = 0x01
+SEGMENT_PATTERN = "segment_*.wlog"
+
+KINDS = ("task", "frame", "request", "response", "tool", "timing", "error", "end")
+_KIND_CODES = {name: code for code, name in enumerate(KINDS)}
+
+
+@dataclass
+class LogRecord:
+    kind: str
+    step: int
+    timestamp: float
+    meta: Dict[str, Any]
+    blob: memoryview          # empty unless the record carries binary data (frames)
+
+
+class SessionWriter:
+
+    def __init__(self, directory: Union[str, Path], segment_bytes: int = 64 << 20, compress_min: int = 512) -> None:
+        """
+        segment_bytes: size after which a new segment file is started.
+        compress_min: JSON meta of at least this many bytes is zlib-compressed.
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.compress_min = compress_min
+        self.records = 0
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+        self._segment = len(list(self.directory.glob(SEGMENT_PATTERN)))
+        self._file = None
+        self._size = 0
+
+    def _open_segment(self) -> None:
+        if self._file is not None:
+            self._file.close()
+        path = self.directory / f"segment_{self._segment:05d}.wlog"
+        self._segment += 1
+        self._file = open(path, "wb")
+        self._file.write(SEGMENT_HEADER.pack(MAGIC, VERSION, self._segment - 1))
+        self._size = SEGMENT_HEADER.size
+
+    def append(self, kind: str, step: int, meta: Optional[Dict[str, Any]] = None, blob: bytes = b"") -> None:
+        payload = json.dumps(meta or {}, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+        flags = 0
+        if len(payload) >= self.compress_min:
+            payload = zlib.compress(payload, 1)
+            flags |= FLAG_ZLIB
+        crc = zlib.crc32(blob, zlib.crc32(payload))
+        header = RECORD_HEADER.pack(_KIND_CODES[kind], flags, step, time.time(), len(payload), len(blob), crc)
+        size = len(header) + len(payload) + len(blob)
+        with self._lock:
+            if self._file is None or (self._size + size > self.segment_bytes and self._size > SEGMENT_HEADER.size):
+                self._open_segment()
+            self._file.write(header)
+            self._file.write(payload)
+            if blob:
+                self._file.write(blob)
+            self._size += size
+            self.records += 1
+            self.bytes_written += size
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def __enter__(self) -> "SessionWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SessionReader:
+    """
+    Memory-mapped reader over all segments of a session directory, in order.
+    """
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        self.directory = Path(directory)
+        self.segments = sorted(self.directory.glob(SEGMENT_PATTERN))
+        self.truncated = False
+        self._maps: List[mmap.mmap] = []
+        for path in self.segments:
+            with open(path, "rb") as f:
+                if path.stat().st_size == 0:
+                    continue
+                self._maps.append(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def __iter__(self) -> Iterator[LogRecord]:
+        for data in self._maps:
+            view = memoryview(data)
+            if len(view) < SEGMENT_HEADER.size or SEGMENT_HEADER.unpack_from(view, 0)[0] != MAGIC:
+                raise ValueError("not a session log segment")
+            pos = SEGMENT_HEADER.size
+            while pos < len(view):
+                if pos + RECORD_HEADER.size > len(view):
+                    self.truncated = True
+                    break
+                code, flags, step, stamp, meta_len, blob_len, crc = RECORD_HEADER.unpack_from(view, pos)
+                start = pos + RECORD_HEADER.size
+                end = start + meta_len + blob_len
+                if end > len(view):
+                    self.truncated = True
+                    break
+                payload = view[start:start + meta_len]
+                blob = view[start + meta_len:end]
+                if zlib.crc32(blob, zlib.crc32(payload)) != crc:
+                    self.truncated = True
+                    break
+                raw = zlib.decompress(payload) if flags & FLAG_ZLIB else bytes(payload)
+                yield LogRecord(KINDS[code], step, stamp, json.loads(raw), blob)
+                pos = end
+
+    def records(self, kind: Optional[str] = None) -> List[LogRecord]:
+        return [r for r in self if kind is None or r.kind == kind]
+
+    def close(self) -> None:
+        for data in self._maps:
+            try:
+                data.close()
+            except BufferError:
+                # a caller still holds a blob view; the map is released with it
+                pass
+        self._maps = []
+
+    def __enter__(self) -> "SessionReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class SessionRecorder:
+    """
+    Records one orchestrator task. With directory=None every call is a no-op, so the
+    orchestrator can call it unconditionally.
+    """
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None, **writer_options: Any) -> None:
+        self.writer: Optional[SessionWriter] = None
+        self.directory: Optional[Path] = None
+        if directory is not None:
+            stamp = time.strftime("%Y%m%d_%H%M%S") + f"_{int(time.time() * 1000) % 1000:03d}"
+            self.directory = Path(directory) / f"session_{stamp}"
+            self.writer = SessionWriter(self.directory, **writer_options)
+        self._last_frame = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.writer is not None
+
+    def task(self, prompt: str, **meta: Any) -> None:
+        if self.writer:
+            self.writer.append("task", 0, {"prompt": prompt, **meta})
+
+    def planner_step(self, step: int, planner: Any, parsed: Any) -> None:
+        """
+        The frame the planner saw (when an image was sent), the request summary and the
+        raw + parsed response of one get_next_step call.
+        """
+        if not self.writer:
+            return
+        request = dict(getattr(planner, "last_request", {}) or {})
+        frame = getattr(planner, "last_frame", None)
+        last = self._last_frame
+        # an unchanged screen re-attaches the previous payload: record those bytes once
+        if request.get("image") and frame is not None and frame is not last and (last is None or frame.data is not last.data):
+            self._last_frame = frame
+            self.writer.append("frame", step, {
+                "format": frame.image_format, "size": list(frame.size), "source_size": list(frame.source_size),
+            }, frame.data)
+        self.writer.append("request", step, request)
+        self.writer.append("response", step, {
+            "text": getattr(planner, "last_response_text", None),
+            "parsed": parsed,
+            "metrics": getattr(planner, "last_step_metrics", {}),
+        })
+
+    def tool(self, step: int, parsed: Dict[str, Any], result: Dict[str, Any]) -> None:
+        if self.writer:
+            calls = {k: parsed[k] for k in ("tool_call", "tool_calls") if k in parsed}
+            self.writer.append("tool", step, {**calls, "result": result})
+
+    def timing(self, content: Dict[str, Any]) -> None:
+        """
+        Closes a step: the step's records are flushed to the segment file, so a killed
+        process loses at most the step in progress (the reader drops a cut record).
+        """
+        if self.writer:
+            self.writer.append("timing", content.get("step", 0), content)
+            self.writer.flush()
+
+    def error(self, step: int, message: str, planner: Any = None) -> None:
+        """
+        A failed step; with the planner, its raw completion is kept (e.g. invalid JSON to replay).
+        """
+        if self.writer:
+            text = getattr(planner, "last_response_text", None)
+            self.writer.append("error", step, {"error": message, "text": text})
+            self.writer.flush()
+
+    def close(self, final: Optional[str] = None) -> None:
+        if self.writer:
+            self.writer.append("end", 0, {"final_response": final})
+            self.writer.close()
+            self.writer = None
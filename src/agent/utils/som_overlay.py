@@ -0,0 +1,163 @@
+"""
+Set-of-marks overlay: element ids drawn onto the frame the planner sees.
+
+Marks are drawn on a copy of the frame as already scaled for the model (the image the
+encoder sends, see CapturedFrame.model_image), so no extra resize is paid; with
+set_of_marks, capture settings that do not scale the frame get max_dimension=MAX_DIMENSION
+(PlannerClient), so marks never go onto a full-resolution frame. Every
+ScreenParser element gets a colored outline and a numbered label. Labels are composed
+from a glyph atlas rendered once per font size (digit masks; label patches are cached
+per id). MarkRenderer.draw is a Python loop over the elements, not one vectorized pass:
+each element costs a few numpy slice assignments (outline edges, label patch) and no
+text rendering, so the time grows linearly with the element count (a single numpy scatter
+of every mark pixel was about 3x slower: slice writes are contiguous, a scatter pays per
+pixel). A label
+takes the first candidate position around its box (above, inside, below, right, left)
+that stays on the image and does not cover a label placed before it; an occupancy mask
+makes that check a slice lookup.
+
+The planner gets the marked image together with the id -> bbox table (PlannerClient with
+set_of_marks=True), so it can answer with click_element(id) on what it sees.
+"""
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from .frame_transform import FrameTransform
+
+# dark, saturated colors: white digits stay readable on all of them
+PALETTE = np.array([
+    (230, 25, 75), (60, 140, 60), (0, 90, 200), (245, 110, 20), (145, 30, 180),
+    (0, 130, 140), (200, 40, 200), (120, 90, 20), (128, 0, 0), (0, 0, 128),
+], dtype=np.uint8)
+TEXT_COLOR = np.array((255, 255, 255), dtype=np.uint8)
+
+# longest side of a marked frame when the capture settings do not scale it (PlannerClient)
+MAX_DIMENSION = 1280
+
+
+@lru_cache(maxsize=8)
+def glyph_atlas(size: int) -> Dict[str, np.ndarray]:
+    """
+    Digit -> boolean glyph mask, all of the same height, for the default font at `size` px.
+    """
+    try:
+        font = ImageFont.load_default(size=size)
+    except TypeError:
+        # Pillow < 10.1: fixed-size bitmap font only
+        font = ImageFont.load_default()
+    boxes = {d: font.getbbox(d) for d in "0123456789"}
+    top = min(b[1] for b in boxes.values())
+    bottom = max(b[3] for b in boxes.values())
+    atlas = {}
+    for digit, (left, _, right, _) in boxes.items():
+        canvas = Image.new("L", (right - left, bottom - top), 0)
+        ImageDraw.Draw(canvas).text((-left, -top), digit, fill=255, font=font)
+        atlas[digit] = np.asarray(canvas) > 127
+    return atlas
+
+
+@lru_cache(maxsize=1024)
+def label_patch(text: str, size: int, pad: int = 2) -> np.ndarray:
+    """
+    Boolean text mask of a label (digits from the atlas, `pad` px margin around them).
+    """
+    atlas = glyph_atlas(size)
+    glyphs = np.hstack([atlas[c] for c in text])
+    patch = np.zeros((glyphs.shape[0] + 2 * pad, glyphs.shape[1] + 2 * pad), dtype=bool)
+    patch[pad:pad + glyphs.shape[0], pad:pad + glyphs.shape[1]] = glyphs
+    patch.setflags(write=False)
+    return patch
+
+
+class MarkRenderer:
+
+    def __init__(self, font_size: int = 14, line_width: int = 2) -> None:
+        """
+        font_size: label digit size in pixels of the marked image.
+        """
+        self.font_size = font_size
+        self.line_width = line_width
+
+    def render(self, image: Image.Image, elements: Sequence[Dict[str, Any]],
+               transform: Optional[FrameTransform] = None) -> Image.Image:
+        """
+        Marked copy of `image`, the frame as scaled for the model (CapturedFrame.model_image).
+        Element bboxes are in screen pixels and mapped into it with `transform`
+        (CapturedFrame.transform; None = same pixels). `image` itself is not modified.
+        """
+        out = np.array(image.convert("RGB") if image.mode != "RGB" else image)
+        if transform is None or transform.is_identity:
+            marks = [(e["id"], self._rect(e)) for e in elements]
+        else:
+            marks = [(e["id"], transform.rect_to_model(*self._rect(e))) for e in elements]
+        self.draw(out, marks)
+        return Image.fromarray(out)
+
+    @staticmethod
+    def _rect(element: Dict[str, Any]) -> Tuple[int, int, int, int]:
+        b = element["bbox"]
+        return b["x"], b["y"], b["w"], b["h"]
+
+    def draw(self, out: np.ndarray, marks: List[Tuple[int, Tuple[int, int, int, int]]]) -> List[Tuple[int, int, int, int]]:
+        """
+        Draw outlines and labels in place on an HxWx3 uint8 array. Returns the label rectangles.
+        """
+        height, width = out.shape[:2]
+        lw = self.line_width
+        colors = PALETTE[[int(i) % len(PALETTE) for i, _ in marks]] if marks else PALETTE[:0]
+
+        # outlines first, so labels are never painted over by a later box
+        for color, (_, (x, y, w, h)) in zip(colors, marks):
+            x1, y1 = max(0, x), max(0, y)
+            x2, y2 = min(width, x + w), min(height, y + h)
+            if x2 <= x1 or y2 <= y1:
+                continue
+            out[y1:min(y2, y1 + lw), x1:x2] = color
+            out[max(y1, y2 - lw):y2, x1:x2] = color
+            out[y1:y2, x1:min(x2, x1 + lw)] = color
+            out[y1:y2, max(x1, x2 - lw):x2] = color
+
+        occupied = np.zeros((height, width), dtype=bool)
+        placed = []
+        for color, (element_id, (x, y, w, h)) in zip(colors, marks):
+            patch = label_patch(str(int(element_id)), self.font_size)
+            ph, pw = patch.shape
+            spot = self._place(occupied, (x, y, w, h), pw, ph)
+            if spot is None:
+                continue
+            lx, ly = spot
+            occupied[ly:ly + ph, lx:lx + pw] = True
+            region = out[ly:ly + ph, lx:lx + pw]
+            region[...] = color
+            region[patch] = TEXT_COLOR
+            placed.append((lx, ly, pw, ph))
+        return placed
+
+    @staticmethod
+    def _place(occupied: np.ndarray, box: Tuple[int, int, int, int], pw: int, ph: int) -> Optional[Tuple[int, int]]:
+        height, width = occupied.shape
+        if pw > width or ph > height:
+            return None
+        x, y, w, h = box
+        candidates = (
+            (x, y - ph),               # above, left aligned
+            (x, y),                    # inside top-left
+            (x, y + h),                # below
+            (x + w - pw, y - ph),      # above, right aligned
+            (x + w - pw, y + h - ph),  # inside bottom-right
+            (x + w, y),                # right of the box
+            (x - pw, y),               # left of the box
+        )
+        fallback = None
+        for cx, cy in candidates:
+            if 0 <= cx <= width - pw and 0 <= cy <= height - ph:
+                if not occupied[cy:cy + ph, cx:cx + pw].any():
+                    return cx, cy
+                fallback = fallback or (cx, cy)
+        if fallback is None:
+            # box at the image border: clamp the first candidate onto the image
+            fallback = (min(max(x, 0), width - pw), min(max(y - ph, 0), height - ph))
+        return fallback
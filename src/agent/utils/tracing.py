@@ -0,0 +1,148 @@
+"""
+Lightweight stage timing.
+
+Code paths wrap their stages in `span("name")` (or report a measured duration with
+`record(...)`). Nothing is recorded unless a Tracer is installed with set_tracer(), so the
+calls cost a global lookup when tracing is off. A tracer can forward to a parent (e.g. a
+per-task tracer inside a benchmark-wide one) and export Chrome trace JSON
+(chrome://tracing, ui.perfetto.dev).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+
+@dataclass
+class Span:
+    name: str
+    start: float                  # time.perf_counter() seconds
+    duration: float               # seconds
+    thread_id: int = 0
+    args: Dict[str, Any] = field(default_factory=dict)
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """
+    Linear-interpolated percentile (q in 0..100) of a non-empty sequence.
+    """
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+class Tracer:
+    """
+    Thread-safe span collector. Spans are also passed on to `parent` if given.
+    """
+
+    def __init__(self, parent: Optional["Tracer"] = None) -> None:
+        self.parent = parent
+        self.origin = time.perf_counter()
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: float, duration: float, **args: Any) -> None:
+        span = Span(name, start, duration, threading.get_ident(), args)
+        with self._lock:
+            self.spans.append(span)
+        if self.parent is not None:
+            self.parent.record(name, start, duration, **args)
+
+    def spans_since(self, index: int) -> List[Span]:
+        with self._lock:
+            return self.spans[index:]
+
+    def to_chrome_trace(self, process_name: str = "windows-os-agent") -> Dict[str, Any]:
+        """
+        Chrome trace event format: one complete ("X") event per span, microseconds
+        relative to the tracer's creation, one lane per thread.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        pid = os.getpid()
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": process_name}},
+        ]
+        for s in spans:
+            events.append({
+                "name": s.name,
+                "cat": "agent",
+                "ph": "X",
+                "ts": round((s.start - self.origin) * 1e6, 1),
+                "dur": round(s.duration * 1e6, 1),
+                "pid": pid,
+                "tid": s.thread_id,
+                "args": {k: v if isinstance(v, (str, int, float, bool)) or v is None else str(v) for k, v in s.args.items()},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_chrome_trace(self, path: Union[str, Path], process_name: str = "windows-os-agent") -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace(process_name), ensure_ascii=False), encoding="utf-8")
+        return path
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans.clear()
+
+    def stage_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Per span name: count, mean, p50 and p95 in milliseconds.
+        """
+        with self._lock:
+            spans = list(self.spans)
+        by_name: Dict[str, List[float]] = {}
+        for s in spans:
+            by_name.setdefault(s.name, []).append(s.duration * 1000.0)
+        return {
+            name: {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values), 3),
+                "p50_ms": round(percentile(values, 50), 3),
+                "p95_ms": round(percentile(values, 95), 3),
+            }
+            for name, values in by_name.items()
+        }
+
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Optional[Tracer]:
+    """
+    Install the process-wide tracer (None disables tracing). Returns the previous one.
+    """
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def record(name: str, start: float, duration: float, **args: Any) -> None:
+    tracer = _tracer
+    if tracer is not None:
+        tracer.record(name, start, duration, **args)
+
+
+@contextmanager
+def span(name: str, **args: Any) -> Iterator[None]:
+    tracer = _tracer
+    if tracer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.record(name, start, time.perf_counter() - start, **args)
@@ -1,80 +1,341 @@
+import asyncio
+import queue
+import time
 import traceback
-from typing import Any, Dict, Generator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, Generator, List, Optional, Tuple
 
-from .cursor.set_cursor import tint_cursor_color_correct, restore_cursor
-from .agent.executor.executor_core import ExecutorCore
-from .agent.planner.planner_client import PlannerClient
+try:
+    from .cursor.set_cursor import tint_cursor_color_correct, restore_cursor
+except (ImportError, AttributeError):
+    # not on Windows (no ctypes.windll): the cursor tint is cosmetic, run without it
+    def tint_cursor_color_correct() -> None:
+        pass
+
+    def restore_cursor() -> None:
+        pass
 
 # Attempt sensible imports with fallbacks depending on package layout
 from .agent.planner.planner_client import PlannerClient
 from .agent.executor.executor_core import ExecutorCore
+from .agent.utils.frame_transform import FrameTransform, remap_step
+from .agent.utils.screen_capture import CaptureBackend, CaptureSettings, CapturedFrame, MSSCaptureBackend
+from .agent.utils import tracing
+from .agent.utils.session_log import SessionRecorder
 
 
 REACT_PROMPT = "src/agent/planner/react_prompt.txt"
 SUMMARIZER_PROMPT = "src/agent/planner/summarizer_prompt.txt"
 
+# Default pause between an action and the follow-up screenshot (lets the UI repaint)
+SETTLE_SECONDS = 0.3
+
+# Planner steps per task before the loop is cut off (no action of a later step runs)
+MAX_STEPS = 50
+
+
+class _StepTimer:
+    """
+    Per-task tracer for the orchestrators. Installed as the active tracer for the task (spans
+    still reach an outer tracer, e.g. a benchmark's), turned into one {"type": "timing"} step per
+    agent step, and optionally written as a Chrome trace file when the task ends.
+    """
+
+    def __init__(self, trace_dir: Optional[str] = None) -> None:
+        self.tracer = tracing.Tracer(parent=tracing.get_tracer())
+        self.trace_dir = trace_dir
+        self.trace_path: Optional[Path] = None
+        self.step_no = 0
+        self._cursor = 0
+        self._step_started = time.perf_counter()
+        self._previous = tracing.set_tracer(self.tracer)
+
+    def timing_step(self) -> Dict[str, Any]:
+        """
+        Close the current step: its spans (ms relative to task start) as a timing step.
+        """
+        now = time.perf_counter()
+        self.tracer.record("step", self._step_started, now - self._step_started, step=self.step_no)
+        spans = self.tracer.spans_since(self._cursor)
+        self._cursor += len(spans)
+        content = {
+            "step": self.step_no,
+            "spans": [
+                {
+                    "name": s.name,
+                    "start_ms": round((s.start - self.tracer.origin) * 1000.0, 3),
+                    "duration_ms": round(s.duration * 1000.0, 3),
+                    **({"args": s.args} if s.args else {}),
+                }
+                for s in spans
+            ],
+        }
+        self.step_no += 1
+        self._step_started = now
+        return {"type": "timing", "content": content}
+
+    def close(self) -> None:
+        tracing.set_tracer(self._previous)
+        if self.trace_dir:
+            stamp = time.strftime("%Y%m%d_%H%M%S") + f"_{int(time.time() * 1000) % 1000:03d}"
+            self.trace_path = self.tracer.write_chrome_trace(Path(self.trace_dir) / f"task_{stamp}.trace.json")
+
+
+# planner response keys that ask the executor for work (single call / batch)
+ACTION_KEYS = ("tool_call", "tool_calls")
+
+
+def _has_action(parsed: Any) -> bool:
+    return isinstance(parsed, dict) and any(k in parsed for k in ACTION_KEYS)
+
+
+def _execute_tool(executor: ExecutorCore, parsed: Dict[str, Any], transform: Optional[FrameTransform] = None) -> Dict[str, Any]:
+    """
+    Run the planner step's tool_call, or its tool_calls batch (ExecutorCore.execute_batch).
+    With the transform of the image the planner saw (PlannerClient.last_transform), its
+    coordinate parameters are mapped from image pixels back to screen pixels first.
+    """
+    parsed = remap_step(parsed, transform)
+    # executor.execute_command should return a dict-like observation
+    try:
+        if "tool_calls" in parsed:
+            return executor.execute_batch(parsed["tool_calls"])
+        return executor.execute_command(parsed["tool_call"])
+    except Exception as exc:
+        # normalize exception to error dict
+        return {"status": "error", "error": str(exc), "traceback": traceback.format_exc()}
+
+
+def _monitor_frames(screen_parser, frame: CapturedFrame) -> List[Tuple[Dict[str, Any], Any]]:
+    """
+    A virtual desktop frame cut into the [(monitor, BGR frame), ...] list
+    ScreenParser.parse_monitors takes, so every monitor is parsed from the pixels the planner sees.
+    """
+    ox, oy = frame.transform.origin if frame.transform is not None else (0, 0)
+    frames = []
+    for m in screen_parser.monitors():
+        x, y = m["left"] - ox, m["top"] - oy
+        frames.append((m, screen_parser.load_image(frame.image.crop((x, y, x + m["width"], y + m["height"])))))
+    return frames
+
+
+def _to_screen(elements: List[Dict[str, Any]], frame: CapturedFrame) -> List[Dict[str, Any]]:
+    """
+    Elements parsed from `frame` (bboxes in frame pixels) with their bboxes in screen
+    coordinates, the space the element table, the ElementIndex and the marks work in.
+    """
+    ox, oy = frame.transform.origin if frame.transform is not None else (0, 0)
+    if (ox, oy) == (0, 0):
+        return elements
+    return [dict(e, bbox=dict(e["bbox"], x=e["bbox"]["x"] + ox, y=e["bbox"]["y"] + oy)) for e in elements]
+
+
+def _observe(planner: PlannerClient, executor: ExecutorCore, screen_parser=None, all_monitors: bool = False) -> None:
+    """
+    Capture the frame for the next planner call. With a ScreenParser the frame is also parsed
+    (only when it changed) and the elements are loaded into the executor's index and the
+    planner's element table, so the planner can act by element id. Element bboxes are
+    screen coordinates (offset by the frame's origin).
+    With all_monitors the frame is the virtual desktop and it is parsed per monitor
+    (ScreenParser.parse_monitors); element bboxes are then virtual desktop coordinates.
+    """
+    frame = planner.screen_capture()
+    if screen_parser is None:
+        return
+    change = planner.last_frame_change
+    if change is None or change.changed:
+        if all_monitors:
+            elements = screen_parser.parse_monitors(frames=_monitor_frames(screen_parser, frame))
+        else:
+            elements = _to_screen(screen_parser.parse(frame.image), frame)
+        executor.update_elements(elements)
+        planner.set_ui_elements(elements)
 
-def run_orchestrator(prompt: str) -> Generator[Dict[str, Any], None, None]:
+
+def _settle_and_observe(planner: PlannerClient, executor: ExecutorCore, screen_parser, settle_seconds: float,
+                        all_monitors: bool = False) -> None:
+    if settle_seconds > 0:
+        time.sleep(settle_seconds)
+    _observe(planner, executor, screen_parser, all_monitors)
+
+
+def _stream_step(
+    planner: PlannerClient,
+    executor: ExecutorCore,
+    user_input: Optional[str],
+    pool: ThreadPoolExecutor,
+    out: Dict[str, Any],
+    dispatch: bool = True,
+) -> Generator[Dict[str, Any], None, Dict[str, Any]]:
+    """
+    One streamed planner call (PlannerClient(stream=True)) run on `pool`.
+    Yields {"type": "thought_delta"} steps while the response streams and, with dispatch, submits
+    the tool_call (or tool_calls batch) to the executor as soon as it is complete. Returns the
+    parsed response; out["tool"] holds the tool result future and out["action"] the dispatched
+    call (both None when nothing was dispatched early). `out` is filled even when the planner
+    call raises, so the caller can still collect an action that already ran.
+    """
+    events: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue()
+    out["tool"] = out["action"] = None
+
+    def on_event(kind: str, value: Any) -> None:
+        if kind == "thought_delta":
+            events.put({"type": "thought_delta", "content": value})
+        elif kind in ACTION_KEYS and dispatch and out["tool"] is None:
+            out["action"] = {kind: value}
+            out["tool"] = pool.submit(_execute_tool, executor, out["action"], planner.last_transform)
+
+    step = pool.submit(planner.get_next_step, user_input, False, on_event)
+    step.add_done_callback(lambda _: events.put(None))
+    while True:
+        item = events.get()
+        if item is None:
+            break
+        yield item
+    return step.result()
+
+
+def _dispatched_anyway(planner: PlannerClient, recorder: Optional[SessionRecorder], step_no: int,
+                       action: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The planner call failed after its tool_call had been dispatched early, so the action did run.
+    Its result still goes to history (together with the call, which the failed response did not
+    leave there) and to the session log. Returns the tool_result step to yield.
+    """
+    if recorder is not None:
+        recorder.tool(step_no, action, result)
+    planner.add_tool_response({**action, **result})
+    return {"type": "tool_result", "content": result}
+
+
+def run_orchestrator(
+    prompt: str,
+    capture_backend: Optional[CaptureBackend] = None,
+    capture_settings: Optional[CaptureSettings] = None,
+    skip_unchanged_frames: bool = True,
+    settle_seconds: float = SETTLE_SECONDS,
+    screen_parser=None,
+    stream: bool = False,
+    executor: Optional[ExecutorCore] = None,
+    trace_dir: Optional[str] = None,
+    session_dir: Optional[str] = None,
+    set_of_marks: bool = False,
+    all_monitors: bool = False,
+) -> Generator[Dict[str, Any], None, None]:
     """
     Generator-based orchestrator.
 
     Yields step dictionaries of the form:
       {"type":"user_prompt", "content": prompt}
-      {"type":"thought", "content": <agent_thought_dict>}
+      {"type":"thought", "content": <agent_thought_dict>, "metrics": <planner latency dict>}
       {"type":"tool_result", "content": <executor_result_dict>}
       {"type":"assistant", "content": <final_response_str>}
+      {"type":"timing", "content": {"step": n, "spans": [{"name", "start_ms", "duration_ms"}, ...]}}
+    and, with stream=True, {"type":"thought_delta", "content": <text>} while a thought is generated.
 
     This function is intended to be run in a background thread so it does not block the GUI.
+    capture_backend / capture_settings are forwarded to PlannerClient
+    (e.g. FileCaptureBackend to replay saved screenshots). With skip_unchanged_frames
+    an unchanged (pixel-identical) screen is not re-encoded: the previous image is attached again.
+    After every action the screenshot waits settle_seconds (default SETTLE_SECONDS) so the UI
+    can repaint; 0 captures right away.
+    With a screen_parser (ScreenParser) every changed frame is parsed and the element ids
+    become available to click_element / type_into_element.
+    With stream=True the planner response is streamed: thought text is yielded as it arrives
+    and the tool_call starts executing as soon as it is complete.
+    An executor can be passed in (e.g. ExecutorCore(dispatch_map=...) with no-op tools for benchmarks).
+    One timing step closes every agent step (capture, history, llm, parse, policy, execute spans);
+    with trace_dir the whole task is also written there as a Chrome trace file.
+    With session_dir every frame sent to the planner, the planner's requests / raw responses,
+    tool calls, results and timings are appended to a binary session log in a new
+    session_<stamp> directory there (replay it with src.session_replay).
+    With set_of_marks (and a screen_parser) the element ids are drawn onto the image the
+    planner gets (see agent/utils/som_overlay.py).
+    With all_monitors the planner sees the whole virtual desktop (MSSCaptureBackend(monitor=0)
+    unless a capture_backend is given) and the screen_parser parses it per monitor.
     """
-    planner = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT)
-    executor = ExecutorCore()
+    if all_monitors and capture_backend is None:
+        capture_backend = MSSCaptureBackend(monitor=0)
+    executor = executor or ExecutorCore()
+    planner = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT, capture_backend, capture_settings, skip_unchanged_frames,
+                            stream=stream, tool_registry=executor.registry, set_of_marks=set_of_marks)
+    # planner call + early tool dispatch run side by side
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="orchestrator") if stream else None
+    timer = _StepTimer(trace_dir)
+    recorder = SessionRecorder(session_dir)
     tint_cursor_color_correct()
-
-    # 1) announce user prompt
-    yield {"type": "user_prompt", "content": prompt}
+    parsed = None
 
     try:
+        # 1) announce user prompt
+        yield {"type": "user_prompt", "content": prompt}
+        recorder.task(prompt, stream=stream)
+
         # 2) first planner call with user's input
-        parsed = planner.get_next_step(prompt)
+        _observe(planner, executor, screen_parser, all_monitors)
+        early: Dict[str, Any] = {"tool": None, "action": None}
+        try:
+            if stream:
+                parsed = yield from _stream_step(planner, executor, prompt, pool, early)
+            else:
+                parsed = planner.get_next_step(prompt, capture=False)
+        except Exception as exc:
+            recorder.error(timer.step_no, str(exc), planner)
+            if early["tool"] is not None:
+                yield _dispatched_anyway(planner, recorder, timer.step_no, early["action"], early["tool"].result())
+            raise
+        recorder.planner_step(timer.step_no, planner, parsed)
         # yield planner thought (full dict so GUI can show "thought" part)
-        yield {"type": "thought", "content": parsed}
+        yield {"type": "thought", "content": parsed, "metrics": planner.last_step_metrics}
 
         # 3) execute loop while planner requests tool_call
         loop_guard = 0
-        while isinstance(parsed, dict) and "tool_call" in parsed:
+        while _has_action(parsed):
             loop_guard += 1
-            if loop_guard > 50:
+            if loop_guard > MAX_STEPS:
                 # defensive break
                 yield {"type": "tool_result", "content": {"status": "error", "error": "too-many-steps"}}
                 break
 
-            tool_call = parsed["tool_call"]
-            # executor.execute_command should return a dict-like observation
-            try:
-                result = executor.execute_command(tool_call)
-            except Exception as exc:
-                # normalize exception to error dict
-                result = {"status": "error", "error": str(exc), "traceback": traceback.format_exc()}
+            result = early["tool"].result() if early["tool"] is not None else _execute_tool(executor, parsed, planner.last_transform)
 
             # yield the tool result for UI to render immediately
+            recorder.tool(timer.step_no, parsed, result)
             yield {"type": "tool_result", "content": result}
+            timing = timer.timing_step()
+            recorder.timing(timing["content"])
+            yield timing
 
             # inform planner about the tool result
             planner.add_tool_response(result)
 
             # get next step from planner (no user input)
             try:
-                parsed = planner.get_next_step()
+                _settle_and_observe(planner, executor, screen_parser, settle_seconds, all_monitors)
+                early = {"tool": None, "action": None}
+                if stream:
+                    # no early dispatch for a step the guard above would refuse
+                    parsed = yield from _stream_step(planner, executor, None, pool, early, loop_guard < MAX_STEPS)
+                else:
+                    parsed = planner.get_next_step(capture=False)
             except Exception as exc:
                 # if planner fails to produce valid JSON / parse error, yield final error as assistant
+                recorder.error(timer.step_no, str(exc), planner)
+                if early["tool"] is not None:
+                    yield _dispatched_anyway(planner, recorder, timer.step_no, early["action"], early["tool"].result())
                 yield {"type": "assistant", "content": f"Planner error: {str(exc)}"}
                 parsed = None
                 break
+            recorder.planner_step(timer.step_no, planner, parsed)
 
             # yield planner thought for the new step
-            yield {"type": "thought", "content": parsed}
+            yield {"type": "thought", "content": parsed, "metrics": planner.last_step_metrics}
 
         # 4) when planner returns final_response, yield assistant message
+        timing = timer.timing_step()
+        recorder.timing(timing["content"])
+        yield timing
         if isinstance(parsed, dict) and "final_response" in parsed:
             yield {"type": "assistant", "content": parsed.get("final_response")}
         else:
@@ -90,8 +351,196 @@ def run_orchestrator(prompt: str) -> Generator[Dict[str, Any], None, None]:
             planner.summarize_and_clear_history()
         except Exception:
             pass
+        if pool is not None:
+            pool.shutdown(wait=False)
+        timer.close()
+        recorder.close(parsed.get("final_response") if isinstance(parsed, dict) else None)
+        restore_cursor()
+
+
+async def _stream_step_async(
+    planner: PlannerClient,
+    executor: ExecutorCore,
+    user_input: Optional[str],
+    out: Dict[str, Any],
+    dispatch_early: bool = True,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Async counterpart of _stream_step. Yields thought_delta steps; when exhausted, out["parsed"]
+    holds the planner response, out["tool"] the early-dispatched tool task and out["action"] its
+    call (both None when nothing was dispatched; set even if the planner call raises).
+    """
+    loop = asyncio.get_running_loop()
+    events: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+    out["tool"] = out["action"] = None
+
+    def dispatch(action: Dict[str, Any]) -> None:
+        if out["tool"] is None:
+            out["action"] = action
+            out["tool"] = asyncio.ensure_future(asyncio.to_thread(_execute_tool, executor, action, planner.last_transform))
+
+    def on_event(kind: str, value: Any) -> None:  # called from the planner thread
+        if kind == "thought_delta":
+            loop.call_soon_threadsafe(events.put_nowait, {"type": "thought_delta", "content": value})
+        elif kind in ACTION_KEYS and dispatch_early:
+            loop.call_soon_threadsafe(dispatch, {kind: value})
+
+    step = asyncio.ensure_future(asyncio.to_thread(planner.get_next_step, user_input, False, on_event))
+    step.add_done_callback(lambda _: events.put_nowait(None))
+    while True:
+        item = await events.get()
+        if item is None:
+            break
+        yield item
+    out["parsed"] = step.result()
+
+
+async def run_orchestrator_async(
+    prompt: str,
+    capture_backend: Optional[CaptureBackend] = None,
+    capture_settings: Optional[CaptureSettings] = None,
+    skip_unchanged_frames: bool = True,
+    settle_seconds: float = SETTLE_SECONDS,
+    screen_parser=None,
+    stream: bool = False,
+    executor: Optional[ExecutorCore] = None,
+    trace_dir: Optional[str] = None,
+    session_dir: Optional[str] = None,
+    set_of_marks: bool = False,
+    all_monitors: bool = False,
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """
+    Pipelined variant of run_orchestrator. Yields exactly the same step dicts.
+
+    Blocking work (capture, encode, LLM call, tool execution) runs in worker threads so the
+    stages overlap instead of running back to back:
+      - the Ollama connection / model load is prefetched while the first screenshot is captured
+      - right after a tool finishes, the settle delay + capture + encode for the next step
+        start in the background while the result is yielded and recorded in history
+      - the planner call then reuses that frame (get_next_step(capture=False))
+      - with stream=True thought deltas are yielded while the response is generated and the
+        tool_call is dispatched the moment it is complete
+    Timing steps, settle_seconds, trace_dir, session_dir, set_of_marks and all_monitors work as
+    in run_orchestrator.
+
+    Use iterate_steps() to consume it from synchronous code such as OrchestratorWorker.
+    """
+    if all_monitors and capture_backend is None:
+        capture_backend = MSSCaptureBackend(monitor=0)
+    executor = executor or ExecutorCore()
+    planner = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT, capture_backend, capture_settings, skip_unchanged_frames,
+                            stream=stream, tool_registry=executor.registry, set_of_marks=set_of_marks)
+    timer = _StepTimer(trace_dir)
+    recorder = SessionRecorder(session_dir)
+    tint_cursor_color_correct()
+    step: Dict[str, Any] = {"tool": None, "action": None}
+    parsed = None
+
+    try:
+        yield {"type": "user_prompt", "content": prompt}
+        recorder.task(prompt, stream=stream)
+
+        # prefetch the model connection while the first frame is grabbed and encoded
+        await asyncio.gather(
+            asyncio.to_thread(planner.warm_up),
+            asyncio.to_thread(_observe, planner, executor, screen_parser, all_monitors),
+        )
+        try:
+            if stream:
+                async for delta in _stream_step_async(planner, executor, prompt, step):
+                    yield delta
+                parsed = step["parsed"]
+            else:
+                parsed = await asyncio.to_thread(planner.get_next_step, prompt, False)
+        except Exception as exc:
+            recorder.error(timer.step_no, str(exc), planner)
+            if step["tool"] is not None:
+                yield _dispatched_anyway(planner, recorder, timer.step_no, step["action"], await step["tool"])
+            raise
+        recorder.planner_step(timer.step_no, planner, parsed)
+        yield {"type": "thought", "content": parsed, "metrics": planner.last_step_metrics}
+
+        loop_guard = 0
+        while _has_action(parsed):
+            loop_guard += 1
+            if loop_guard > MAX_STEPS:
+                yield {"type": "tool_result", "content": {"status": "error", "error": "too-many-steps"}}
+                break
+
+            if step["tool"] is not None:
+                result = await step["tool"]
+            else:
+                result = await asyncio.to_thread(_execute_tool, executor, parsed, planner.last_transform)
+
+            # start settle/capture/encode of the post-action frame before recording the result
+            next_frame = asyncio.create_task(asyncio.to_thread(_settle_and_observe, planner, executor, screen_parser, settle_seconds,
+                                                                   all_monitors))
+
+            recorder.tool(timer.step_no, parsed, result)
+            yield {"type": "tool_result", "content": result}
+            timing = timer.timing_step()
+            recorder.timing(timing["content"])
+            yield timing
+            planner.add_tool_response(result)
+
+            step["tool"] = None
+            try:
+                await next_frame
+                if stream:
+                    async for delta in _stream_step_async(planner, executor, None, step, loop_guard < MAX_STEPS):
+                        yield delta
+                    parsed = step["parsed"]
+                else:
+                    parsed = await asyncio.to_thread(planner.get_next_step, None, False)
+            except Exception as exc:
+                recorder.error(timer.step_no, str(exc), planner)
+                if step["tool"] is not None:
+                    yield _dispatched_anyway(planner, recorder, timer.step_no, step["action"], await step["tool"])
+                yield {"type": "assistant", "content": f"Planner error: {str(exc)}"}
+                parsed = None
+                break
+            recorder.planner_step(timer.step_no, planner, parsed)
+
+            yield {"type": "thought", "content": parsed, "metrics": planner.last_step_metrics}
+
+        timing = timer.timing_step()
+        recorder.timing(timing["content"])
+        yield timing
+        if isinstance(parsed, dict) and "final_response" in parsed:
+            yield {"type": "assistant", "content": parsed.get("final_response")}
+        else:
+            yield {"type": "assistant", "content": "(no final_response produced)"}
+
+    except Exception as exc:
+        yield {"type": "assistant", "content": f"Orchestrator error: {str(exc)}"}
+    finally:
+        try:
+            await asyncio.to_thread(planner.summarize_and_clear_history)
+        except Exception:
+            pass
+        timer.close()
+        recorder.close(parsed.get("final_response") if isinstance(parsed, dict) else None)
         restore_cursor()
 
 
+def iterate_steps(steps: AsyncGenerator[Dict[str, Any], None]) -> Generator[Dict[str, Any], None, None]:
+    """
+    Drive an async step generator (e.g. run_orchestrator_async(prompt)) on a private event loop
+    and yield its steps synchronously, so thread-based consumers can iterate it like run_orchestrator.
+    """
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                step = loop.run_until_complete(steps.__anext__())
+            except StopAsyncIteration:
+                break
+            yield step
+    finally:
+        loop.run_until_complete(steps.aclose())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
+
 if __name__ == "__main__":
     run_orchestrator()
\ No newline at end of file
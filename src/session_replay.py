@@ -0,0 +1,187 @@
+"""
+Offline replay of a session recorded by run_orchestrator(session_dir=...).
+
+The recorded planner completions are re-parsed with PlannerClient.parse_response and the
+recorded tool calls are re-dispatched through ExecutorCore, in order and at full speed:
+  - no model: the raw completion text comes from the log
+  - no display: input goes to a RecordingBackend, wait tools return immediately
+  - the element table each request carried is loaded into the executor before its step
+  - coordinates are mapped back from image to screen pixels with the recorded frame transform
+A step matches when the re-parsed step equals the recorded one and the replayed tool
+result has the recorded status, so an old incident can serve as a regression test (and
+its replay time as a performance test of parsing / validation / policy / dispatch).
+
+Usage:
+    python -m src.session_replay SESSION_DIR [--decode-frames]
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .agent.executor.executor_core import TOOL_DISPATCH_MAP, ExecutorCore
+from .agent.executor.input_backend import RecordingBackend, set_input_backend
+from .agent.planner.planner_client import PlannerClient
+from .agent.utils.frame_transform import FrameTransform, remap_step
+from .agent.utils.session_log import SessionReader
+
+# tools that only wait on the screen: nothing to wait for in a replay
+INSTANT_TOOLS = ("wait", "wait_until_stable", "wait_until_changed")
+
+
+def _instant(func):
+    # same signature (the registry still validates the recorded parameters), no waiting
+    @functools.wraps(func)
+    def tool(*args, **kwargs):
+        return f"replayed:{func.__name__}"
+    return tool
+
+
+def replay_dispatch_map() -> Dict[str, Any]:
+    return {name: _instant(func) if name in INSTANT_TOOLS else func for name, func in TOOL_DISPATCH_MAP.items()}
+
+
+def elements_from_table(table: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    PlannerClient.ui_elements_table rows -> ElementIndex elements.
+    """
+    if not table:
+        return []
+    elements = []
+    for row in json.loads(table):
+        x, y, w, h = row["bbox"]
+        elements.append({"id": row["id"], "type": row.get("type"), "content": row.get("text", ""),
+                         "bbox": {"x": x, "y": y, "w": w, "h": h}})
+    return elements
+
+
+@dataclass
+class ReplayStep:
+    step: int
+    parse_ok: bool                          # re-parse reproduces the recorded planner step
+    recorded_status: Optional[str] = None   # tool result status in the log (None: no tool call)
+    replayed_status: Optional[str] = None
+    error: Optional[str] = None
+
+    @property
+    def match(self) -> bool:
+        return self.parse_ok and self.recorded_status == self.replayed_status
+
+
+@dataclass
+class ReplayReport:
+    session: str
+    records: int = 0
+    frames: int = 0
+    frame_bytes: int = 0
+    truncated: bool = False
+    steps: List[ReplayStep] = field(default_factory=list)
+    replay_s: float = 0.0
+    recorded_s: float = 0.0     # sum of the recorded "step" spans
+
+    @property
+    def mismatches(self) -> List[ReplayStep]:
+        return [s for s in self.steps if not s.match]
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["matched"] = len(self.steps) - len(self.mismatches)
+        data["mismatches"] = [asdict(s) for s in self.mismatches]
+        data["steps"] = len(self.steps)
+        data["speedup"] = round(self.recorded_s / self.replay_s, 1) if self.replay_s > 0 else None
+        return data
+
+
+class SessionReplayer:
+
+    def __init__(self, session_dir: str, executor: Optional[ExecutorCore] = None, decode_frames: bool = False) -> None:
+        """
+        executor: defaults to an ExecutorCore with the real tools (waits made instant);
+        decode_frames: also decode every recorded frame (checks the images, costs time).
+        """
+        self.session_dir = session_dir
+        self.executor = executor or ExecutorCore(dispatch_map=replay_dispatch_map())
+        self.decode_frames = decode_frames
+        self.backend = RecordingBackend()
+        self.transform: Optional[FrameTransform] = None
+
+    def _reparse(self, text: Optional[str]) -> Any:
+        try:
+            parsed = PlannerClient.parse_response(text)
+        except (TypeError, ValueError):
+            return None
+        return parsed if PlannerClient.is_step(parsed) else None
+
+    def replay(self) -> ReplayReport:
+        report = ReplayReport(self.session_dir)
+        previous = set_input_backend(self.backend)
+        started = time.perf_counter()
+        current: Optional[ReplayStep] = None
+        try:
+            with SessionReader(self.session_dir) as reader:
+                for record in reader:
+                    report.records += 1
+                    meta = record.meta
+                    if record.kind == "frame":
+                        report.frames += 1
+                        report.frame_bytes += len(record.blob)
+                        if self.decode_frames:
+                            from PIL import Image
+                            with Image.open(io.BytesIO(record.blob)) as img:
+                                img.load()
+                    elif record.kind == "request":
+                        self.executor.update_elements(elements_from_table(meta.get("ui_elements")))
+                        if meta.get("transform"):
+                            self.transform = FrameTransform.from_dict(meta["transform"])
+                    elif record.kind == "response":
+                        current = ReplayStep(record.step, self._reparse(meta.get("text")) == meta.get("parsed"))
+                        report.steps.append(current)
+                    elif record.kind == "error":
+                        # the recorded completion must still fail to parse into a step
+                        failed = meta.get("text") is None or self._reparse(meta.get("text")) is None
+                        # a tool record that follows belongs to this step (dispatched before the failure)
+                        current = ReplayStep(record.step, failed, error=meta.get("error"))
+                        report.steps.append(current)
+                    elif record.kind == "tool":
+                        result = self._dispatch(meta)
+                        if current is None or current.step != record.step:
+                            current = ReplayStep(record.step, False, error="tool call without a planner step")
+                            report.steps.append(current)
+                        current.recorded_status = (meta.get("result") or {}).get("status")
+                        current.replayed_status = result.get("status")
+                    elif record.kind == "timing":
+                        for span in meta.get("spans", []):
+                            if span.get("name") == "step":
+                                report.recorded_s += span.get("duration_ms", 0.0) / 1000.0
+                report.truncated = reader.truncated
+        finally:
+            set_input_backend(previous)
+        report.replay_s = time.perf_counter() - started
+        return report
+
+    def _dispatch(self, meta: Dict[str, Any]) -> Dict[str, Any]:
+        meta = remap_step(meta, self.transform)
+        if "tool_calls" in meta:
+            return self.executor.execute_batch(meta["tool_calls"])
+        return self.executor.execute_command(meta.get("tool_call") or {})
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("session_dir")
+    ap.add_argument("--decode-frames", action="store_true", help="decode every recorded frame")
+    args = ap.parse_args()
+    # executor progress prints go to stderr; stdout carries only the JSON report
+    with contextlib.redirect_stdout(sys.stderr):
+        report = SessionReplayer(args.session_dir, decode_frames=args.decode_frames).replay()
+    print(json.dumps(report.to_dict(), indent=2, ensure_ascii=False))
+    sys.exit(1 if report.mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,14 +12,23 @@ class ScreenParser:
         self.model = YOLO(model_path) 
         self.lang = 'tur' 
 
-    def parse_and_visualize(self, image_source=None):
+    def parse_and_visualize(self, image_source=None, monitor=1):
+        """
+        monitor: canlı yakalamada mss monitör numarası (0 = tüm sanal masaüstü, 1 = birincil, 2... = diğerleri).
+        Canlı yakalamada bbox'lar sanal masaüstü koordinatlarındadır (pyautogui'nin tıkladığı koordinatlar).
+        """
         img = None
+        # Kare içi koordinatlardan sanal masaüstü koordinatlarına kaydırma (dosyadan okunan resimde 0)
+        offset_x, offset_y = 0, 0
         
         # --- GÖRÜNTÜ YAKALAMA ---
         if image_source is None:
             with mss.mss() as sct:
-                monitor = sct.monitors[1]
-                sct_img = sct.grab(monitor)
+                if not 0 <= monitor < len(sct.monitors):
+                    raise ValueError(f"Monitör bulunamadı: {monitor}")
+                mon = sct.monitors[monitor]
+                offset_x, offset_y = mon["left"], mon["top"]
+                sct_img = sct.grab(mon)
                 img = np.array(sct_img)
                 img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
                 print("Canlı ekran görüntüsü alındı.")
@@ -73,7 +82,7 @@ class ScreenParser:
                 "type": label_name,
                 "id": cls_id,
                 "confidence": round(confidence, 2),
-                "bbox": {"x": x1, "y": y1, "w": x2-x1, "h": y2-y1},
+                "bbox": {"x": x1 + offset_x, "y": y1 + offset_y, "w": x2-x1, "h": y2-y1},
                 "content": detected_text
             }
             parsed_elements.append(element_data)
@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from src.agent.executor.element_index import ElementIndex
+from src.agent.planner.planner_client import PlannerClient
+
+
+def _element(element_id, x, y, w, h, text=""):
+    return {"id": element_id, "class_id": 0, "type": "button", "content": text,
+            "bbox": {"x": x, "y": y, "w": w, "h": h}}
+
+
+class TestElementIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ElementIndex(cell_size=64)
+        self.index.update([
+            _element(0, 0, 0, 400, 300, "Pencere"),
+            _element(1, 100, 100, 50, 20, "Kaydet"),
+            _element(2, 500, 500, 10, 10),
+        ])
+
+    def test_center_by_id(self):
+        self.assertEqual(self.index.center(1), (125, 110))
+        self.assertEqual(self.index.center("2"), (505, 505))
+        with self.assertRaises(ValueError):
+            self.index.center(7)
+
+    def test_point_lookup_returns_smallest_containing_element(self):
+        self.assertEqual(self.index.at(120, 110)["id"], 1)
+        self.assertEqual(self.index.at(10, 10)["id"], 0)
+        self.assertIsNone(self.index.at(450, 450))
+        self.assertEqual(self.index.at(509, 509)["id"], 2)
+        self.assertIsNone(self.index.at(510, 510))
+
+    def test_update_replaces_previous_frame(self):
+        self.index.update([_element(0, 10, 10, 5, 5)])
+        self.assertEqual(len(self.index), 1)
+        self.assertIsNone(self.index.get(1))
+        self.assertIsNone(self.index.at(120, 110))
+
+
+class TestPlannerElementTable(unittest.TestCase):
+
+    def test_screen_message_carries_element_table(self):
+        planner = PlannerClient.__new__(PlannerClient)
+        planner.ui_elements_table = None
+        planner.mark_renderer = None
+        planner.set_ui_elements([_element(3, 1, 2, 30, 40, "Tamam")])
+        rows = json.loads(planner.ui_elements_table)
+        self.assertEqual(rows, [{"id": 3, "type": "button", "text": "Tamam", "bbox": [1, 2, 30, 40]}])
+        planner.set_ui_elements([])
+        self.assertIsNone(planner.ui_elements_table)
+
+
+if __name__ == '__main__':
+    unittest.main()
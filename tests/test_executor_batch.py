@@ -0,0 +1,79 @@
+import unittest
+
+from src.agent.executor.executor_core import TOOL_REGISTRY, ExecutorCore
+from src.agent.executor.tool_registry import MAX_BATCH_ACTIONS
+
+
+class TestExecuteBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def record(name):
+            def tool(**params):
+                self.calls.append((name, params))
+                if params.get("fail"):
+                    raise ValueError("alan bulunamadı")
+                return name
+            return tool
+
+        self.executor = ExecutorCore(dispatch_map={
+            "mouse_click": record("mouse_click"),
+            "keyboard_type": record("keyboard_type"),
+            "keyboard_press": record("keyboard_press"),
+            "read_file": record("read_file"),
+        })
+
+    def test_actions_run_in_order(self):
+        result = self.executor.execute_batch([
+            {"action": "mouse_click", "parameters": {"x": 10, "y": 20}},
+            {"action": "keyboard_type", "parameters": {"text": "merhaba"}},
+            {"action": "keyboard_press", "parameters": {"text": "ENTER"}},
+        ])
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(result["completed"], 3)
+        self.assertEqual([c[0] for c in self.calls], ["mouse_click", "keyboard_type", "keyboard_press"])
+        self.assertEqual([r["result"] for r in result["results"]], ["mouse_click", "keyboard_type", "keyboard_press"])
+
+    def test_short_circuit_on_failure(self):
+        result = self.executor.execute_batch([
+            {"action": "mouse_click", "parameters": {"x": 10, "y": 20}},
+            {"action": "keyboard_type", "parameters": {"text": "x", "fail": True}},
+            {"action": "keyboard_press", "parameters": {"text": "ENTER"}},
+        ])
+        self.assertEqual(result["status"], "error")
+        self.assertEqual(result["completed"], 1)
+        self.assertEqual([r["status"] for r in result["results"]], ["success", "error", "skipped"])
+        self.assertEqual(len(self.calls), 2)
+
+    def test_policy_checked_for_whole_batch_before_any_action(self):
+        for bad in ({"action": "read_file", "parameters": {"path": "/etc/passwd"}},
+                    {"action": "format_disk", "parameters": {}},
+                    {"action": "keyboard_type", "parameters": "metin"}):
+            result = self.executor.execute_batch([
+                {"action": "mouse_click", "parameters": {"x": 1, "y": 1}},
+                bad,
+            ])
+            self.assertEqual(result["status"], "error")
+            self.assertIn("tool_calls[1]", result["error"])
+            self.assertEqual(result["completed"], 0)
+        self.assertEqual(self.calls, [])
+
+    def test_empty_batch_rejected(self):
+        self.assertEqual(self.executor.execute_batch([])["status"], "error")
+
+    def test_batch_size_limit_matches_the_prompt(self):
+        click = {"action": "mouse_click", "parameters": {"x": 1, "y": 1}}
+        self.assertEqual(self.executor.execute_batch([click] * MAX_BATCH_ACTIONS)["completed"], MAX_BATCH_ACTIONS)
+        self.calls.clear()
+        result = self.executor.execute_batch([click] * (MAX_BATCH_ACTIONS + 1))
+        self.assertEqual(result["status"], "error")
+        self.assertIn(f"tool_calls[{MAX_BATCH_ACTIONS}]", result["error"])
+        self.assertEqual(result["completed"], 0)
+        self.assertEqual(self.calls, [])
+        prompt = TOOL_REGISTRY.render_prompt("format C, at most {{MAX_BATCH_ACTIONS}} actions")
+        self.assertEqual(prompt, f"format C, at most {MAX_BATCH_ACTIONS} actions")
+
+
+if __name__ == '__main__':
+    unittest.main()
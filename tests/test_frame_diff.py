@@ -0,0 +1,80 @@
+import json
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from src.agent.utils.frame_diff import FrameChangeDetector
+from src.agent.utils.screen_capture import CaptureBackend
+from src.agent.planner.planner_client import PlannerClient
+
+
+class _ListCaptureBackend(CaptureBackend):
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def grab(self):
+        return self.frames.pop(0)
+
+
+class TestFrameDiff(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = np.random.default_rng(1).integers(0, 255, (200, 300, 3), dtype=np.uint8)
+
+    def test_first_frame_is_full_region(self):
+        change = FrameChangeDetector().update(self.frame)
+        self.assertTrue(change.changed and change.first_frame)
+        self.assertEqual(change.regions, [(0, 0, 300, 200)])
+
+    def test_identical_frame_is_unchanged(self):
+        det = FrameChangeDetector()
+        det.update(self.frame)
+        change = det.update(self.frame.copy())
+        self.assertFalse(change.changed)
+        self.assertEqual(change.regions, [])
+
+    def test_changed_regions_are_merged_per_blob(self):
+        det = FrameChangeDetector(tile_size=32)
+        det.update(self.frame)
+        nxt = self.frame.copy()
+        nxt[10:20, 10:70] ^= 0xFF     # tiles (0,0) and (0,1) -> one region
+        nxt[195, 290] ^= 0xFF         # single pixel in the clipped corner tile
+        change = det.update(nxt)
+        self.assertTrue(change.changed)
+        self.assertEqual(sorted(change.regions), [(0, 0, 96, 32), (288, 192, 12, 8)])
+        self.assertEqual(change.dirty_tiles, 4)
+
+    def test_size_change_resets(self):
+        det = FrameChangeDetector()
+        det.update(self.frame)
+        self.assertTrue(det.update(self.frame[:100]).first_frame)
+
+
+class TestPlannerSkipsUnchangedFrames(unittest.TestCase):
+
+    def test_unchanged_frame_reattaches_the_previous_image(self):
+        img = Image.new("RGB", (64, 64), (1, 2, 3))
+        planner = PlannerClient("missing_react.txt", "missing_summary.txt",
+                                capture_backend=_ListCaptureBackend([img, img.copy()]))
+        sent = []
+
+        def fake_call(system_prompt, messages):
+            sent.append(messages[-1])
+            return json.dumps({"thought": "t", "tool_call": {"action": "wait", "parameters": {"seconds": 0}}})
+
+        planner._call_ollama = fake_call
+        planner.get_next_step("do something")
+        planner.add_tool_response({"status": "success", "result": 0.0})
+        planner.get_next_step()
+
+        self.assertFalse(planner.last_frame_change.changed)
+        # history keeps no images: the unchanged step still carries a screenshot, the same bytes, not re-encoded
+        self.assertTrue(all("images" not in m for m in planner._serialize_history_for_messages()))
+        self.assertIn("has not changed", sent[1]["content"])
+        self.assertIs(sent[1]["images"][0], sent[0]["images"][0])
+        self.assertEqual(planner.last_frame.encode_seconds, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,190 @@
+import io
+import json
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from src.agent.executor.executor_core import ExecutorCore
+from src.agent.planner.planner_client import PlannerClient
+from src.agent.utils.frame_transform import FrameTransform, fit_image, remap_step
+from src.agent.utils.screen_capture import CaptureBackend, CaptureSettings, encode_frame
+from src.orchestrator import REACT_PROMPT, SUMMARIZER_PROMPT, run_orchestrator
+
+
+class _FullHDBackend(CaptureBackend):
+    def grab(self):
+        return Image.new("RGB", (1920, 1080), (30, 30, 30))
+
+
+class _DualMonitorBackend(CaptureBackend):
+    """Virtual desktop of a 1920x1080 monitor left of the primary one (dark left, light right)."""
+
+    origin = (-1920, 0)
+
+    def grab(self):
+        image = Image.new("RGB", (3840, 1080), (30, 30, 30))
+        image.paste((220, 220, 220), (1920, 0, 3840, 1080))
+        return image
+
+
+class _MonitorParser:
+    """ScreenParser stand-in: one element per monitor, at its center, in virtual desktop coordinates."""
+
+    MONITORS = [{"index": 1, "left": 0, "top": 0, "width": 1920, "height": 1080},
+                {"index": 2, "left": -1920, "top": 0, "width": 1920, "height": 1080}]
+
+    def __init__(self):
+        self.frames = []
+
+    def monitors(self, indices=None):
+        return self.MONITORS
+
+    def load_image(self, image):
+        return image
+
+    def parse_monitors(self, indices=None, frames=None, use_cache=True):
+        self.frames.extend((m["index"], img.size, img.getpixel((0, 0))) for m, img in frames)
+        return [{"id": i, "type": "button", "content": "OK", "monitor": m["index"],
+                 "bbox": {"x": m["left"] + 900, "y": 500, "w": 120, "h": 80}} for i, (m, _) in enumerate(frames)]
+
+
+class _LeftMonitorBackend(CaptureBackend):
+    """A single 1920x1080 monitor left of the primary one (e.g. MSSCaptureBackend(monitor=2))."""
+
+    origin = (-1920, 0)
+
+    def grab(self):
+        return Image.new("RGB", (1920, 1080), (30, 30, 30))
+
+
+class _FrameParser:
+    """ScreenParser stand-in: one element in frame pixels."""
+
+    def parse(self, image):
+        return [{"id": 0, "type": "button", "content": "OK", "bbox": {"x": 100, "y": 200, "w": 120, "h": 80}}]
+
+
+class _ClickCenterClient:
+    """ollama.Client stand-in: clicks the center of the image it was sent, then finishes."""
+
+    def __init__(self, host=None):
+        self.calls = 0
+
+    def chat(self, model, messages, format=None, stream=False):
+        self.calls += 1
+        if self.calls > 2:
+            return {"message": {"content": "özet"}}
+        if self.calls == 1:
+            w, h = Image.open(io.BytesIO(messages[-1]["images"][0])).size
+            reply = {"thought": "ortala", "tool_call": {"action": "mouse_click", "parameters": {"x": w // 2, "y": h // 2}}}
+        else:
+            reply = {"thought": "bitti", "final_response": "tamam"}
+        return {"message": {"content": json.dumps(reply)}}
+
+
+class TestFrameTransform(unittest.TestCase):
+
+    def test_letterbox_to_model_resolution(self):
+        image, t = fit_image(Image.new("RGB", (1920, 1080), (255, 255, 255)), (896, 896))
+        self.assertEqual(image.size, (896, 896))
+        self.assertEqual((t.pad_x, t.pad_y), (0, 196))
+        self.assertEqual(image.getpixel((448, 100)), (0, 0, 0))
+        self.assertEqual(image.getpixel((448, 448)), (255, 255, 255))
+        for point in ((0, 0), (960, 540), (1919, 1079), (333, 777)):
+            back = t.to_screen(*t.to_model(*point))
+            self.assertLessEqual(max(abs(back[0] - point[0]), abs(back[1] - point[1])), 2)
+        # a click on the padding lands on the screen edge
+        self.assertEqual(t.to_screen(448, 10), (960, 0))
+
+        plain, scaled = fit_image(Image.new("RGB", (1920, 1080)), (896, 896), letterbox=False)
+        self.assertEqual(plain.size, (896, 504))
+        self.assertEqual(FrameTransform.from_dict(scaled.to_dict()), scaled)
+        self.assertTrue(fit_image(Image.new("RGB", (800, 600)))[1].is_identity)
+
+    def test_encode_frame_records_the_transform(self):
+        data, t = encode_frame(Image.new("RGB", (2560, 1440)), CaptureSettings(image_format="JPEG", model_resolution=(1024, 768)))
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (1024, 768))
+        self.assertEqual((t.source_size, t.size, t.pad_y), ((2560, 1440), (1024, 768), 96))
+        _, t = encode_frame(Image.new("RGB", (2560, 1440)), CaptureSettings(max_dimension=1280))
+        self.assertEqual((t.size, t.scale_x, t.pad_x), ((1280, 720), 0.5, 0))
+        with self.assertRaises(ValueError):
+            CaptureSettings(model_resolution=(896, 0))
+
+    def test_remap_step_maps_only_coordinates(self):
+        t = FrameTransform((1920, 1080), (960, 540), 0.5, 0.5)
+        step = {"thought": "", "tool_calls": [
+            {"action": "mouse_click", "parameters": {"x": 100, "y": "50.4", "button": "left"}},
+            {"action": "wait_until_stable", "parameters": {"region": [10, 10, 100, 50]}},
+            {"action": "click_element", "parameters": {"element_id": 3}},
+            {"action": "mouse_move", "parameters": {"x": "sol", "y": True}},
+        ]}
+        calls = remap_step(step, t)["tool_calls"]
+        self.assertEqual(calls[0]["parameters"], {"x": 200, "y": 101, "button": "left"})
+        self.assertEqual(calls[1]["parameters"], {"region": [20, 20, 200, 100]})
+        self.assertEqual(calls[2], step["tool_calls"][2])
+        self.assertEqual(calls[3]["parameters"], {"x": "sol", "y": True})
+        self.assertEqual(step["tool_calls"][0]["parameters"]["x"], 100)
+        self.assertIs(remap_step(step, FrameTransform.identity((1920, 1080))), step)
+
+    def test_prompt_coordinates_are_in_image_pixels(self):
+        settings = CaptureSettings(model_resolution=(896, 896))
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _ClickCenterClient):
+            planner = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT, _FullHDBackend(), settings)
+        frame = planner.screen_capture()
+        planner.set_ui_elements([{"id": 0, "type": "button", "content": "OK", "bbox": {"x": 960, "y": 540, "w": 192, "h": 108}}])
+        content = planner._build_screen_message(frame, None)["content"]
+        self.assertIn("in image pixels", content)
+        self.assertIn('"bbox":[448,448,90,50]', content)
+        self.assertIn('"bbox":[960,540,192,108]', planner.ui_elements_table)
+
+    def test_origin_maps_a_virtual_desktop(self):
+        t = FrameTransform((3840, 1080), (1920, 540), 0.5, 0.5, origin=(-1920, 0))
+        self.assertFalse(t.is_identity)
+        self.assertEqual(t.to_model(-1920, 0), (0, 0))
+        self.assertEqual(t.to_model(0, 540), (960, 270))
+        self.assertEqual(t.to_screen(960, 270), (0, 540))
+        self.assertEqual(t.to_screen(-50, 2000), (-1920, 1079))
+        self.assertEqual(FrameTransform.from_dict(json.loads(json.dumps(t.to_dict()))), t)
+        # transforms recorded before origin existed
+        legacy = {k: v for k, v in t.to_dict().items() if k != "origin"}
+        self.assertEqual(FrameTransform.from_dict(legacy).origin, (0, 0))
+
+    def test_all_monitors_parses_each_monitor_of_the_sent_frame(self):
+        clicks = []
+        executor = ExecutorCore(dispatch_map={"mouse_click": lambda x, y, button="left": clicks.append((x, y)) or "ok"})
+        parser = _MonitorParser()
+        settings = CaptureSettings(image_format="JPEG", model_resolution=(896, 896))
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _ClickCenterClient):
+            steps = list(run_orchestrator("ortaya tıkla", capture_backend=_DualMonitorBackend(), capture_settings=settings,
+                                          screen_parser=parser, executor=executor, all_monitors=True))
+        self.assertEqual(steps[-1], {"type": "assistant", "content": "tamam"})
+        self.assertEqual(parser.frames[:2], [(1, (1920, 1080), (220, 220, 220)), (2, (1920, 1080), (30, 30, 30))])
+        # the image center is where the two monitors meet
+        self.assertEqual(clicks, [(0, 540)])
+        self.assertEqual(executor.element_index.get(1)["bbox"]["x"], -1020)
+
+    def test_parsed_elements_are_offset_by_the_frame_origin(self):
+        clicks = []
+        executor = ExecutorCore(dispatch_map={"mouse_click": lambda x, y, button="left": clicks.append((x, y)) or "ok"})
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _ClickCenterClient):
+            steps = list(run_orchestrator("ortaya tıkla", capture_backend=_LeftMonitorBackend(),
+                                          screen_parser=_FrameParser(), executor=executor))
+        self.assertEqual(steps[-1], {"type": "assistant", "content": "tamam"})
+        self.assertEqual(executor.element_index.get(0)["bbox"], {"x": -1820, "y": 200, "w": 120, "h": 80})
+        self.assertEqual(executor.element_index.center(0), (-1760, 240))
+        self.assertEqual(clicks, [(-960, 540)])
+
+    def test_orchestrator_clicks_in_screen_space(self):
+        clicks = []
+        executor = ExecutorCore(dispatch_map={"mouse_click": lambda x, y, button="left": clicks.append((x, y)) or "ok"})
+        settings = CaptureSettings(image_format="JPEG", model_resolution=(896, 896))
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _ClickCenterClient):
+            steps = list(run_orchestrator("ortaya tıkla", capture_backend=_FullHDBackend(), capture_settings=settings,
+                                          executor=executor))
+        self.assertEqual(steps[-1], {"type": "assistant", "content": "tamam"})
+        self.assertEqual(clicks, [(960, 540)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import threading
+import unittest
+
+from PIL import Image
+
+from src.agent.planner.history import MessageHistory, estimate_tokens
+from src.agent.planner.planner_client import PlannerClient
+from src.agent.utils.screen_capture import CaptureBackend
+
+
+class _StaticCaptureBackend(CaptureBackend):
+    def grab(self):
+        return Image.new("RGB", (32, 32))
+
+
+class TestMessageHistory(unittest.TestCase):
+
+    def test_messages_match_legacy_serialization(self):
+        history = MessageHistory()
+        entries = [
+            ("user", "Not defteri aç"),
+            ("assistant", {"thought": "açılıyor", "tool_call": {"action": "keyboard_press", "params": {"text": "win"}}}),
+            ("tool", {"status": "success", "items": [1, 2]}),
+            ("memory", 42),
+        ]
+        for role, content in entries:
+            history.append(role, content)
+        expected = [
+            {"role": role, "content": json.dumps(c, ensure_ascii=False) if isinstance(c, (dict, list)) else str(c)}
+            for role, c in entries
+        ]
+        self.assertEqual(history.messages(), expected)
+
+    def test_entries_serialized_once_and_tokens_tracked(self):
+        history = MessageHistory()
+        payload = {"status": "success", "text": "x" * 400}
+        record = history.append("tool", payload)
+        payload["text"] = "changed"   # later mutation does not leak into the cached message
+        self.assertIn("x" * 400, history.messages()[0]["content"])
+        self.assertIs(history.messages()[0], record.message)
+        self.assertEqual(history.token_count, estimate_tokens(record.message["content"]))
+
+        history.append("user", "abc")
+        self.assertEqual(history.token_count, sum(r.tokens for r in history))
+        history.clear()
+        self.assertEqual((len(history), history.token_count, history.messages()), (0, 0, []))
+
+    def test_replace_head_keeps_newer_entries(self):
+        history = MessageHistory()
+        for i in range(4):
+            history.append("tool", {"i": i})
+        head = history.records[:3]
+        history.append("user", "new")
+        self.assertTrue(history.replace_head(head, "memory", "özet"))
+        self.assertEqual([r.role for r in history], ["memory", "tool", "user"])
+        self.assertEqual(history.token_count, sum(r.tokens for r in history))
+        self.assertFalse(history.replace_head(head, "memory", "again"))
+
+
+class TestRollingContext(unittest.TestCase):
+
+    def _planner(self, **kwargs):
+        planner = PlannerClient("missing_react.txt", "missing_summary.txt",
+                                capture_backend=_StaticCaptureBackend(), **kwargs)
+        planner.react_prompt, planner.summarizer_prompt = "react", "summarize"
+        self.sent_sizes = []
+        self.summarized = []
+        self.release = threading.Event()
+
+        def fake_call(system_prompt, messages):
+            if system_prompt == "summarize":
+                self.release.wait(5)
+                self.summarized.append(len(messages) - 1)
+                return "özet"
+            self.sent_sizes.append(sum(estimate_tokens(m["content"]) for m in messages[1:-1]))
+            return json.dumps({"thought": "t", "tool_call": {"action": "wait", "parameters": {"seconds": 0}}})
+
+        planner._call_ollama = fake_call
+        return planner
+
+    def _run_steps(self, planner, steps):
+        planner.get_next_step("görev")
+        for i in range(steps):
+            planner.add_tool_response({"status": "success", "result": "x" * 2000})
+            planner.get_next_step()
+
+    def test_old_entries_summarized_in_background(self):
+        planner = self._planner(context_budget_tokens=3000, context_hard_limit_tokens=6000, keep_recent_entries=4)
+        self.release.set()
+        self._run_steps(planner, 30)
+        self.assertGreaterEqual(len(self.summarized), 2)
+        self.assertEqual(planner._history.records[0].role, "memory")
+        # prompt size stays flat instead of growing with the step count (30 steps ~ 16000 tokens)
+        self.assertLessEqual(max(self.sent_sizes), 6000)
+
+    def test_hard_limit_waits_for_summary(self):
+        planner = self._planner(context_budget_tokens=1000, context_hard_limit_tokens=1500, keep_recent_entries=2)
+        threading.Timer(0.05, self.release.set).start()
+        self._run_steps(planner, 6)
+        self.assertLessEqual(max(self.sent_sizes), 1500)
+
+
+if __name__ == '__main__':
+    unittest.main()
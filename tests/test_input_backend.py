@@ -0,0 +1,110 @@
+import unittest
+from unittest import mock
+
+from src.agent.executor import tools
+from src.agent.executor.executor_core import ExecutorCore
+from src.agent.executor.input_backend import (
+    MIN_PASTE_SETTLE,
+    PROFILES,
+    DesktopInputBackend,
+    RecordingBackend,
+    get_profile,
+    keys_to_send_keys,
+    set_input_backend,
+)
+from src.agent.executor.text_entry import escape_send_keys, plan_text_entry, unescape_send_keys
+
+
+class TestInputBackend(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = RecordingBackend()
+        self.previous = set_input_backend(self.backend)
+
+    def tearDown(self):
+        set_input_backend(self.previous)
+
+    def test_tools_go_through_the_backend(self):
+        self.assertEqual(tools.mouse_click("10", 20.0, "right"), "clicked:10,20:right")
+        tools.mouse_double_click(5, 6)
+        tools.mouse_move(7, 8)
+        tools.keyboard_type("merhaba dünya")
+        tools.keyboard_press("CTRL+SHIFT+ESC")
+        tools.scroll(-3)
+
+        self.assertEqual(self.backend.kinds(), ["click", "click", "move", "keys", "press", "scroll"])
+        self.assertEqual(self.backend.events[0].args, (10, 20, "right", 1))
+        self.assertEqual(self.backend.events[1].args, (5, 6, "left", 2))
+        self.assertEqual(self.backend.events[4].args, (("CTRL", "SHIFT", "ESC"),))
+        self.assertEqual(self.backend.position, (7, 8))
+
+    def test_executor_runs_ui_tools_without_a_display(self):
+        result = ExecutorCore().execute_command({"action": "mouse_click", "parameters": {"x": 1, "y": 2}})
+        self.assertEqual(result["status"], "success")
+        self.assertEqual(self.backend.events[0].args, (1, 2, "left", 1))
+
+    def test_profiles_set_the_simulated_time(self):
+        for name in ("instant", "fast", "human"):
+            backend = RecordingBackend(name)
+            backend.click(1, 1)
+            backend.click(1, 1, clicks=2)
+            backend.type_text("a{+}")
+            backend.type_text("x" * 100)
+            profile = PROFILES[name]
+            expected = (2 * profile.move_duration + profile.click_interval
+                        + 4 * profile.key_interval + profile.restore_delay + 4 * profile.action_pause)
+            self.assertAlmostEqual(backend.elapsed, expected)
+        self.assertEqual(RecordingBackend("instant").profile.move_duration, 0.0)
+        self.assertLess(PROFILES["fast"].move_duration, PROFILES["human"].move_duration)
+        with self.assertRaises(ValueError):
+            get_profile("slow")
+
+    def test_clipboard_is_restored_only_after_the_paste_settles(self):
+        calls = []
+        backend = DesktopInputBackend("instant")
+        backend._keyboard = mock.Mock(send_keys=lambda keys, **kw: calls.append(("keys", keys)))
+        with mock.patch("pyperclip.paste", return_value="eski"), \
+                mock.patch("pyperclip.copy", side_effect=lambda text: calls.append(("copy", text))), \
+                mock.patch("src.agent.executor.input_backend.time.sleep",
+                           side_effect=lambda seconds: calls.append(("sleep", seconds))):
+            backend.paste("yeni")
+        self.assertEqual(calls, [("copy", "yeni"), ("keys", "^v"), ("sleep", MIN_PASTE_SETTLE), ("copy", "eski")])
+        self.assertEqual(PROFILES["human"].restore_delay, PROFILES["human"].paste_settle)
+
+    def test_keys_to_send_keys(self):
+        self.assertEqual(keys_to_send_keys(["CTRL", "s"]), "^s")
+        self.assertEqual(keys_to_send_keys(["alt", "F4"]), "%{F4}")
+        self.assertEqual(keys_to_send_keys(["ENTER"]), "{ENTER}")
+
+
+class TestTextEntry(unittest.TestCase):
+
+    def test_specials_are_escaped(self):
+        text = "a+b^c%d~e(f){g}"
+        self.assertEqual(escape_send_keys(text), "a{+}b{^}c{%}d{~}e{(}f{)}{{}g{}}")
+        self.assertEqual(escape_send_keys("x\r\ny\tz"), "x{ENTER}y{TAB}z")
+        self.assertEqual(unescape_send_keys(escape_send_keys(text)), text)
+
+    def test_strategy_by_size_and_content(self):
+        self.assertEqual(plan_text_entry(""), [])
+        short = plan_text_entry("{" * 40, chunk_size=32)
+        self.assertEqual([s.method for s in short], ["keys", "keys"])
+        self.assertEqual([s.chars for s in short], [32, 8])
+        self.assertEqual(short[1].payload, "{{}" * 8)
+        self.assertEqual([s.method for s in plan_text_entry("y" * 64)], ["paste"])
+        self.assertEqual([s.method for s in plan_text_entry("ok \U0001F600")], ["paste"])
+
+    def test_recorded_text_round_trips(self):
+        backend = RecordingBackend()
+        previous = set_input_backend(backend)
+        try:
+            tools.keyboard_type("Toplam: %50 (+KDV) {fiyat}")
+            tools.keyboard_type("uzun metin " * 20)
+        finally:
+            set_input_backend(previous)
+        self.assertEqual(backend.kinds(), ["keys", "paste"])
+        self.assertEqual(backend.typed_text(), "Toplam: %50 (+KDV) {fiyat}" + "uzun metin " * 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
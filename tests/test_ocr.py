@@ -0,0 +1,91 @@
+import unittest
+
+import numpy as np
+
+from src.agent.executor.ocr import MosaicOCR, Word, assign_words, pack_shelves, render_mosaic
+
+
+class _FakeMosaicOCR(MosaicOCR):
+    """Reads each ROI's 'text' back from its first pixel value, one word per slot."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.slots = []
+
+    def ocr_words(self, image):
+        self.calls += 1
+        words = []
+        ys, xs = np.nonzero(image)
+        seen = set()
+        for y, x in zip(ys, xs):
+            value = int(image[y, x])
+            if value not in seen:
+                seen.add(value)
+                words.append(Word(f"w{value}", int(x), int(y), 4, 4))
+        return words
+
+
+class TestMosaicPacking(unittest.TestCase):
+
+    def test_slots_do_not_overlap_and_fit(self):
+        rng = np.random.default_rng(3)
+        sizes = [(int(w), int(h)) for w, h in rng.integers(10, 300, size=(120, 2))]
+        placements, mosaics = pack_shelves(sizes, max_width=1024, max_height=1024, gutter=8)
+
+        self.assertEqual([p.index for p in placements], list(range(len(sizes))))
+        for m, (mw, mh) in enumerate(mosaics):
+            slots = [p for p in placements if p.mosaic == m]
+            self.assertTrue(slots)
+            for p in slots:
+                self.assertLessEqual(p.x + p.w, mw)
+                self.assertLessEqual(p.y + p.h, mh)
+                self.assertLessEqual(mw, 1024)
+                self.assertLessEqual(mh, 1024)
+            for a in slots:
+                for b in slots:
+                    if a is not b:
+                        disjoint = a.x + a.w <= b.x or b.x + b.w <= a.x or a.y + a.h <= b.y or b.y + b.h <= a.y
+                        self.assertTrue(disjoint, (a, b))
+
+    def test_oversized_box_gets_its_own_shelf(self):
+        placements, mosaics = pack_shelves([(3000, 40), (50, 20)], max_width=1024, max_height=1024, gutter=8)
+        self.assertGreaterEqual(mosaics[placements[0].mosaic][0], 3000)
+        self.assertGreaterEqual(placements[1].y, placements[0].y + 40)
+
+    def test_assign_words_reading_order(self):
+        placements, _ = pack_shelves([(200, 60)], gutter=10)
+        p = placements[0]
+        words = [
+            Word("second", p.x + 100, p.y + 5, 40, 12),
+            Word("third", p.x + 5, p.y + 35, 40, 12),
+            Word("first", p.x + 5, p.y + 6, 40, 12),
+            Word("outside", 0, 0, 2, 2),
+        ]
+        self.assertEqual(assign_words(words, placements), {0: "first second third"})
+
+
+class TestMosaicOCR(unittest.TestCase):
+
+    def test_texts_map_back_to_rois_with_few_calls(self):
+        rois = [np.full((20 + i % 7, 40 + i * 3), i + 1, dtype=np.uint8) for i in range(80)]
+        rois.insert(5, np.zeros((0, 0), dtype=np.uint8))
+        ocr = _FakeMosaicOCR(max_width=1024, max_height=1024)
+
+        texts = ocr.recognize(rois)
+
+        self.assertEqual(texts[5], "")
+        expected = [f"w{int(r.flat[0])}" if r.size else "" for r in rois]
+        self.assertEqual(texts, expected)
+        self.assertLess(ocr.calls, 5)
+
+    def test_render_mosaic_places_pixels(self):
+        rois = [np.full((2, 3), 7, dtype=np.uint8)]
+        placements, mosaics = pack_shelves([(3, 2)], gutter=1)
+        canvas = render_mosaic(rois, placements, mosaics[0])
+        self.assertEqual(canvas.shape, (4, 5))
+        self.assertEqual(int(canvas.sum()), 7 * 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from src.agent.executor.ocr import MosaicOCR, Word
+from src.agent.executor.ocr_cache import OCRCache, roi_key
+
+
+class _CountingOCR(MosaicOCR):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+
+    def ocr_words(self, image):
+        self.calls += 1
+        words = []
+        for value in sorted(set(np.unique(image).tolist()) - {0}):
+            ys, xs = np.nonzero(image == value)
+            words.append(Word(f"w{value}", int(xs.min()), int(ys.min()), 2, 2))
+        return words
+
+
+class TestOCRCache(unittest.TestCase):
+
+    def test_key_depends_on_pixels_shape_and_lang(self):
+        a = np.zeros((4, 6), dtype=np.uint8)
+        self.assertEqual(roi_key(a, "tur"), roi_key(a.copy(), "tur"))
+        self.assertNotEqual(roi_key(a, "tur"), roi_key(a, "eng"))
+        self.assertNotEqual(roi_key(a, "tur"), roi_key(a.reshape(6, 4), "tur"))
+        b = a.copy()
+        b[0, 0] = 1
+        self.assertNotEqual(roi_key(a, "tur"), roi_key(b, "tur"))
+
+    def test_lru_eviction_and_counters(self):
+        cache = OCRCache(max_entries=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        self.assertEqual(cache.get("a"), "A")   # a becomes most recent
+        cache.put("c", "C")                     # evicts b
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "C")
+        self.assertEqual(cache.stats(), {"entries": 2, "hits": 2, "misses": 1, "hit_rate": 0.667})
+
+    def test_persistence_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ocr_cache.json"
+            cache = OCRCache(path=path)
+            cache.put("k1", "Dosya")
+            cache.put("k2", "")
+            cache.save()
+            reloaded = OCRCache(path=path)
+            self.assertEqual(len(reloaded), 2)
+            self.assertEqual(reloaded.get("k1"), "Dosya")
+            self.assertEqual(reloaded.get("k2"), "")
+
+    def test_mosaic_ocr_skips_cached_rois(self):
+        rois = [np.full((10, 20), i + 1, dtype=np.uint8) for i in range(5)]
+        ocr = _CountingOCR(cache=OCRCache())
+        first = ocr.recognize(rois)
+        self.assertEqual(ocr.calls, 1)
+
+        second = ocr.recognize(rois + [np.full((10, 20), 9, dtype=np.uint8)])
+        self.assertEqual(second[:5], first)
+        self.assertEqual(second[5], "w9")
+        self.assertEqual(ocr.calls, 2)
+        self.assertEqual(ocr.cache.hits, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
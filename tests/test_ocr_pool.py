@@ -0,0 +1,144 @@
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from src.agent.executor.ocr import MosaicOCR, threshold_roi
+from src.agent.executor.ocr_pool import OCRWorkerPool
+
+try:
+    import tesserocr
+    HAS_ENG = "eng" in tesserocr.get_languages()[1]
+except Exception:
+    HAS_ENG = False
+
+
+def _echo_words(image):
+    # fake OCR task: the image's first pixel value as the only word
+    return [(str(int(image.flat[0])), 0, 0, image.shape[1], image.shape[0])]
+
+
+def _slow_words(image):
+    # outlives the call's timeout (short: before Python 3.14 the worker finishes it)
+    time.sleep(2)
+    return []
+
+
+def _failing_words(image):
+    raise RuntimeError("ocr failed")
+
+
+def _picky_words(image):
+    # fails on a 99 image, every other image takes a while
+    if int(image.flat[0]) == 99:
+        raise RuntimeError("ocr failed")
+    time.sleep(0.3)
+    return _echo_words(image)
+
+
+def _label(text):
+    import cv2
+    img = np.full((40, 24 * len(text) + 16, 3), 240, dtype=np.uint8)
+    cv2.putText(img, text, (8, 28), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+    return threshold_roi(img)
+
+
+class TestOCRWorkerPoolScheduling(unittest.TestCase):
+    """Pool lifecycle with fake OCR tasks (no tesseract needed)."""
+
+    def images(self, count):
+        return [np.full((10, 20 + i), i, dtype=np.uint8) for i in range(count)]
+
+    def test_lazy_start_order_and_idle_recycle(self):
+        pool = OCRWorkerPool(workers=2, idle_timeout=0.3, task=_echo_words)
+        try:
+            self.assertFalse(pool.running)
+            results = pool.words(self.images(6))
+            self.assertTrue(pool.running)
+            self.assertEqual([r[0].text for r in results], [str(i) for i in range(6)])
+            self.assertEqual(results[5][0].width, 25)
+
+            deadline = time.monotonic() + 5
+            while pool.running and time.monotonic() < deadline:
+                time.sleep(0.05)
+            self.assertFalse(pool.running)
+
+            # the next call restarts the pool transparently
+            self.assertEqual(pool.words(self.images(1))[0][0].text, "0")
+            self.assertTrue(pool.running)
+        finally:
+            pool.shutdown()
+        with self.assertRaises(RuntimeError):
+            pool.words(self.images(1))
+
+    def test_timeout_recycles_the_pool(self):
+        pool = OCRWorkerPool(workers=1, idle_timeout=0, task=_slow_words)
+        try:
+            started = time.monotonic()
+            self.assertEqual(pool.words(self.images(2), timeout=0.5), [None, None])
+            self.assertLess(time.monotonic() - started, 10)
+            self.assertFalse(pool.running)
+            pool.task = _echo_words
+            self.assertEqual(pool.words(self.images(1))[0][0].text, "0")
+        finally:
+            pool.shutdown()
+
+    def test_failure_leaves_concurrent_calls_their_results(self):
+        pool = OCRWorkerPool(workers=2, idle_timeout=0, task=_picky_words)
+        try:
+            pool.words(self.images(1))  # workers started
+            others = []
+            caller = threading.Thread(target=lambda: others.append(pool.words(self.images(6))))
+            caller.start()
+            time.sleep(0.1)
+            self.assertEqual(pool.words([np.full((10, 20), 99, dtype=np.uint8)]), [None])
+            # the failed executor is retired: new calls get a fresh one right away
+            self.assertFalse(pool.running)
+            caller.join(10)
+            self.assertEqual([r[0].text for r in others[0]], [str(i) for i in range(6)])
+            self.assertEqual(pool._retired, {})
+            self.assertEqual(pool.words(self.images(1))[0][0].text, "0")
+        finally:
+            pool.shutdown()
+
+    def test_failed_task_yields_none(self):
+        pool = OCRWorkerPool(workers=1, idle_timeout=0, task=_failing_words)
+        try:
+            self.assertEqual(pool.words(self.images(1)), [None])
+            self.assertFalse(pool.running)
+        finally:
+            pool.shutdown()
+
+
+@unittest.skipUnless(HAS_ENG, "tesserocr with 'eng' traineddata is required")
+class TestOCRWorkerPool(unittest.TestCase):
+
+    def test_lazy_start_results_and_idle_recycle(self):
+        labels = ["File", "Edit", "View", "Help"] * 4
+        pool = OCRWorkerPool(lang="eng", workers=2, idle_timeout=0.5)
+        try:
+            self.assertFalse(pool.running)
+            texts = MosaicOCR(lang="eng", pool=pool).recognize([_label(t) for t in labels])
+            self.assertTrue(pool.running)
+            self.assertEqual(texts, labels)
+
+            time.sleep(1.0)
+            self.assertFalse(pool.running)
+
+            words = pool.words([_label("Save")])
+            self.assertEqual([w.text for w in words[0]], ["Save"])
+        finally:
+            pool.shutdown()
+
+    def test_timeout_returns_none_and_recycles(self):
+        pool = OCRWorkerPool(lang="eng", workers=1)
+        try:
+            self.assertEqual(pool.words([_label("Slow")], timeout=0.0), [None])
+            self.assertFalse(pool.running)
+        finally:
+            pool.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
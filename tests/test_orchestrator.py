@@ -0,0 +1,215 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from src.agent.executor.executor_core import ExecutorCore
+from src.agent.utils import tracing
+from src.agent.utils.screen_capture import CaptureBackend
+from src.orchestrator import SETTLE_SECONDS, iterate_steps, run_orchestrator, run_orchestrator_async
+
+
+class _StaticCaptureBackend(CaptureBackend):
+    def grab(self):
+        return Image.new("RGB", (32, 32))
+
+
+class _GatedCaptureBackend(_StaticCaptureBackend):
+    """Signals every grab; grabs after the first wait for `release`."""
+
+    def __init__(self):
+        self.grabs = 0
+        self.grabbed = threading.Event()
+        self.release = threading.Event()
+
+    def grab(self):
+        self.grabs += 1
+        if self.grabs > 1:
+            self.grabbed.set()
+            self.release.wait(5)
+        return super().grab()
+
+
+class _ScriptedClient:
+    """ollama.Client stand-in: replies from REPLIES in order (summaries get plain text)."""
+
+    REPLIES = [
+        {"thought": "bekle", "tool_call": {"action": "wait", "parameters": {"seconds": 0}}},
+        {"thought": "bitti", "final_response": "tamam"},
+    ]
+
+    def __init__(self, host=None):
+        self.calls = 0
+
+    def chat(self, model, messages, format=None, stream=False):
+        if not messages:
+            return {"message": {"content": ""}}   # warm_up
+        if self.calls >= len(self.REPLIES):
+            return {"message": {"content": "özet"}}
+        reply = self.REPLIES[self.calls]
+        self.calls += 1
+        return {"message": {"content": json.dumps(reply)}}
+
+
+class _BatchClient(_ScriptedClient):
+    REPLIES = [
+        {"thought": "formu doldur", "tool_calls": [
+            {"action": "mouse_click", "parameters": {"x": 5, "y": 5, "button": "left"}},
+            {"action": "keyboard_type", "parameters": {"text": "ali"}},
+            {"action": "keyboard_press", "parameters": {"text": "ENTER"}},
+        ]},
+        {"thought": "bitti", "final_response": "tamam"},
+    ]
+
+
+class _StreamingClient:
+    """Streaming ollama.Client stand-in: every planner reply is TEXT in small chunks."""
+
+    TEXT = json.dumps({"thought": "bekle", "tool_call": {"action": "wait", "parameters": {"seconds": 0}}})
+    summaries = []
+
+    def __init__(self, host=None):
+        pass
+
+    def chat(self, model, messages, format=None, stream=False):
+        if not stream:
+            type(self).summaries.append(messages)
+            return {"message": {"content": "özet"}}
+        return iter([{"message": {"content": self.TEXT[i:i + 7]}} for i in range(0, len(self.TEXT), 7)])
+
+
+class _BrokenTailClient(_StreamingClient):
+    # the tool_call object closes, then the outer JSON is invalid
+    TEXT = '{"thought": "bekle", "tool_call": {"action": "wait", "parameters": {"seconds": 0}}, "x": }'
+    summaries = []
+
+
+class TestOrchestratorTiming(unittest.TestCase):
+
+    def test_timing_steps_and_chrome_trace(self):
+        executor = ExecutorCore(dispatch_map={"wait": lambda seconds: float(seconds)})
+        with tempfile.TemporaryDirectory() as tmp, \
+                mock.patch("src.agent.planner.planner_client.ollama.Client", _ScriptedClient):
+            steps = list(run_orchestrator("görev", capture_backend=_StaticCaptureBackend(),
+                                          executor=executor, trace_dir=tmp))
+            traces = list(Path(tmp).glob("*.trace.json"))
+            self.assertEqual(len(traces), 1)
+            events = json.loads(traces[0].read_text(encoding="utf-8"))["traceEvents"]
+
+        types = [s["type"] for s in steps]
+        self.assertEqual(types, ["user_prompt", "thought", "tool_result", "timing", "thought", "timing", "assistant"])
+        first = {span["name"] for span in steps[3]["content"]["spans"]}
+        self.assertTrue({"capture", "encode", "request_build", "llm", "parse", "policy", "execute", "step"} <= first)
+        self.assertEqual(steps[5]["content"]["step"], 1)
+        self.assertIn("summarize", {e["name"] for e in events})
+        self.assertIsNone(tracing.get_tracer())
+
+
+class TestOrchestratorBatch(unittest.TestCase):
+
+    def test_tool_calls_run_as_one_step(self):
+        calls = []
+        executor = ExecutorCore(dispatch_map={
+            name: (lambda name: lambda **p: calls.append(name) or name)(name)
+            for name in ("mouse_click", "keyboard_type", "keyboard_press")
+        })
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _BatchClient):
+            steps = list(run_orchestrator("form", capture_backend=_StaticCaptureBackend(), executor=executor))
+
+        results = [s["content"] for s in steps if s["type"] == "tool_result"]
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["completed"], 3)
+        self.assertEqual(calls, ["mouse_click", "keyboard_type", "keyboard_press"])
+        self.assertEqual(steps[-1], {"type": "assistant", "content": "tamam"})
+
+
+class TestOrchestratorEarlyDispatch(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+    def runs(self, client):
+        """Steps of run_orchestrator and run_orchestrator_async (stream=True) with `client`."""
+        kwargs = lambda: dict(capture_backend=_StaticCaptureBackend(), stream=True, settle_seconds=0,
+                              executor=ExecutorCore(dispatch_map={"wait": lambda seconds: self.calls.append(seconds) or "ok"}))
+        for run in (lambda: run_orchestrator("görev", **kwargs()),
+                    lambda: iterate_steps(run_orchestrator_async("görev", **kwargs()))):
+            self.calls.clear()
+            with mock.patch("src.agent.planner.planner_client.ollama.Client", client):
+                yield list(run())
+
+    def test_dispatched_action_is_reported_when_the_response_breaks(self):
+        for steps in self.runs(_BrokenTailClient):
+            self.assertEqual(self.calls, [0])
+            results = [s["content"] for s in steps if s["type"] == "tool_result"]
+            self.assertEqual(results, [{"status": "success", "result": "ok"}])
+            self.assertIn("error", steps[-1]["content"])
+            # the summary of the task still sees the action and its result
+            last = json.loads(_BrokenTailClient.summaries.pop()[-1]["content"])
+            self.assertEqual(last["tool_call"]["action"], "wait")
+            self.assertEqual(last["result"], "ok")
+
+    def test_step_cap_applies_before_early_dispatch(self):
+        with mock.patch("src.orchestrator.MAX_STEPS", 2):
+            for steps in self.runs(_StreamingClient):
+                self.assertEqual(len(self.calls), 2)
+                self.assertIn({"type": "tool_result", "content": {"status": "error", "error": "too-many-steps"}}, steps)
+
+
+class TestOrchestratorAsync(unittest.TestCase):
+
+    def run_both(self, kwargs):
+        results = []
+        for run in (lambda: run_orchestrator("görev", **kwargs()),
+                    lambda: iterate_steps(run_orchestrator_async("görev", **kwargs()))):
+            with mock.patch("src.agent.planner.planner_client.ollama.Client", _ScriptedClient):
+                results.append(list(run()))
+        return results
+
+    def test_same_steps_as_run_orchestrator(self):
+        kwargs = lambda: dict(capture_backend=_StaticCaptureBackend(), settle_seconds=0,
+                              executor=ExecutorCore(dispatch_map={"wait": lambda seconds: float(seconds)}))
+        sync_steps, async_steps = self.run_both(kwargs)
+        strip = lambda steps: [(s["type"], s["content"]) for s in steps if s["type"] not in ("timing", "thought")]
+        self.assertEqual([s["type"] for s in async_steps], [s["type"] for s in sync_steps])
+        self.assertEqual(strip(async_steps), strip(sync_steps))
+        self.assertEqual(async_steps[-1], {"type": "assistant", "content": "tamam"})
+        self.assertIsNone(tracing.get_tracer())
+
+    def test_both_paths_settle_before_the_next_capture(self):
+        kwargs = lambda: dict(capture_backend=_StaticCaptureBackend(),
+                              executor=ExecutorCore(dispatch_map={"wait": lambda seconds: float(seconds)}))
+        with mock.patch("src.orchestrator.time.sleep") as sleep:
+            self.run_both(kwargs)
+        self.assertEqual([c.args for c in sleep.call_args_list], [(SETTLE_SECONDS,), (SETTLE_SECONDS,)])
+
+    def test_next_frame_is_captured_while_the_result_is_consumed(self):
+        backend = _GatedCaptureBackend()
+        executor = ExecutorCore(dispatch_map={"wait": lambda seconds: float(seconds)})
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _ScriptedClient):
+            steps = iterate_steps(run_orchestrator_async("görev", capture_backend=backend, executor=executor,
+                                                         settle_seconds=0))
+            for step in steps:
+                if step["type"] == "tool_result":
+                    # the post-action capture already started, before the consumer asked for more
+                    self.assertTrue(backend.grabbed.wait(5))
+                    backend.release.set()
+            # one capture per planner call: the pipelined frame is reused, not grabbed again
+            self.assertEqual(backend.grabs, 2)
+        self.assertEqual(step, {"type": "assistant", "content": "tamam"})
+
+    def test_closing_iterate_steps_early_cleans_up(self):
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _ScriptedClient):
+            steps = iterate_steps(run_orchestrator_async("görev", capture_backend=_StaticCaptureBackend()))
+            self.assertEqual(next(steps)["type"], "user_prompt")
+            self.assertIsNotNone(tracing.get_tracer())
+            steps.close()
+        self.assertIsNone(tracing.get_tracer())
+
+
+if __name__ == '__main__':
+    unittest.main()
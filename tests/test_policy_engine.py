@@ -0,0 +1,133 @@
+import ntpath
+import os
+import tempfile
+import time
+import unittest
+import unittest.mock
+from pathlib import Path
+
+from src.agent.executor.executor_core import ExecutorCore
+from src.agent.security.policy_engine import DEFAULT_POLICY_FILES, PolicyConfig, PolicyEngine, command_name
+
+
+class TestPolicyEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.config = self.root / "policies.yaml"
+        self.write_config(f"""
+allowed_paths:
+  - "{self.root / 'docs'}"
+  - "{self.root / 'users' / '*' / 'Desktop'}"
+  - "{self.root / 'shared' / '*'}"
+allowed_file_types: [".txt", "*.tar.gz"]
+disallowed_file_types: [".exe"]
+disallowed_commands: [shutdown, format]
+""")
+        self.engine = PolicyEngine(files=[self.config], base_roots=())
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_config(self, text):
+        self.config.write_text(text, encoding="utf-8")
+
+    def test_path_trie(self):
+        allowed = lambda p: self.engine.check_path(str(p)).allowed
+        self.assertTrue(allowed(self.root / "docs"))
+        self.assertTrue(allowed(self.root / "docs" / "a" / "b.txt"))
+        self.assertFalse(allowed(self.root / "docs-fake" / "b.txt"))
+        self.assertFalse(allowed(self.root / "docs" / ".." / ".." / "etc"))
+        self.assertTrue(allowed(self.root / "users" / "ayse" / "Desktop" / "x.txt"))
+        self.assertFalse(allowed(self.root / "users" / "ayse" / "Documents"))
+        self.assertFalse(allowed(self.root / "shared"))
+        self.assertTrue(allowed(self.root / "shared" / "ortak"))
+        self.assertFalse(self.engine.check_path("").allowed)
+
+    def test_file_types_and_commands(self):
+        self.assertTrue(self.engine.check_file_type("not.txt").allowed)
+        self.assertTrue(self.engine.check_file_type("yedek.tar.gz").allowed)
+        self.assertTrue(self.engine.check_file_type("klasor").allowed)
+        self.assertFalse(self.engine.check_file_type("resim.png").allowed)
+        self.assertFalse(self.engine.check_file_type("kurulum.exe").allowed)
+        self.assertEqual(command_name('"C:\\Windows\\System32\\shutdown.EXE" /s /t 0'), "shutdown")
+        self.assertFalse(self.engine.check_command("shutdown /s").allowed)
+        self.assertTrue(self.engine.check_command("notepad").allowed)
+
+    def test_decisions_are_cached(self):
+        path = str(self.root / "docs" / "a.txt")
+        for _ in range(5):
+            self.assertTrue(self.engine.check_path(path).allowed)
+        self.assertEqual((self.engine.misses, self.engine.hits), (1, 4))
+
+    def test_cache_follows_environment_variables(self):
+        path = "$POLICY_TEST_ROOT/a.txt"
+        with unittest.mock.patch.dict(os.environ, {"POLICY_TEST_ROOT": str(self.root / "docs")}):
+            self.assertTrue(self.engine.check_path(path).allowed)
+        with unittest.mock.patch.dict(os.environ, {"POLICY_TEST_ROOT": str(self.root / "etc")}):
+            self.assertFalse(self.engine.check_path(path).allowed)
+        self.assertEqual((self.engine.misses, self.engine.hits), (2, 0))
+
+    def test_executor_whitelist_comes_from_the_engine(self):
+        engine = PolicyEngine(config=PolicyConfig(allowed_executables=["calc.exe"]), base_roots=())
+        executor = ExecutorCore(dispatch_map={"start_application_safe": lambda app_name: app_name},
+                                policy_engine=engine)
+        run = lambda app: executor.execute_command({"action": "start_application_safe",
+                                                    "parameters": {"app_name": app}})
+        self.assertEqual(run("calc.exe")["status"], "success")
+        denied = run("notepad.exe")
+        self.assertEqual(denied["status"], "error")
+        self.assertIn("PermissionError", denied["error"])
+
+    def test_hot_reload_on_mtime_change(self):
+        path = str(self.root / "other" / "a.txt")
+        self.assertFalse(self.engine.check_path(path).allowed)
+        self.write_config(f'allowed_paths: ["{self.root / "other"}"]\n')
+        stamp = time.time() + 5
+        os.utime(self.config, (stamp, stamp))
+        self.engine._next_check = 0.0
+        self.assertTrue(self.engine.check_path(path).allowed)
+        self.assertFalse(self.engine.check_path(str(self.root / "docs")).allowed)
+
+    def test_executor_uses_the_engine(self):
+        executor = ExecutorCore(dispatch_map={"read_file": lambda path: path}, policy_engine=self.engine)
+        ok = executor.execute_command({"action": "read_file", "parameters": {"path": str(self.root / "docs" / "a.txt")}})
+        self.assertEqual(ok["status"], "success")
+        denied = executor.execute_command({"action": "read_file", "parameters": {"path": str(self.root / "a.txt")}})
+        self.assertEqual(denied["status"], "error")
+        self.assertIn("PermissionError", denied["error"])
+
+    def test_windows_policy_stays_inside_home(self):
+        # the shipped config files, evaluated with Windows path rules
+        engine = PolicyEngine(files=DEFAULT_POLICY_FILES, base_roots=("C:\\Users\\ayse",), path_module=ntpath)
+        self.assertEqual(engine.policy.skipped_roots, [])
+        allowed = lambda p: engine.check_path(p).allowed
+        self.assertTrue(allowed("C:\\Users\\ayse\\Documents\\rapor.docx"))
+        # allowed_file_types is opt-in: files of any type inside the home directory pass
+        self.assertTrue(engine.check_file_type("rapor.docx").allowed)
+        self.assertTrue(engine.check_file_type("C:\\Users\\ayse\\foto.png").allowed)
+        self.assertFalse(allowed("C:\\Windows\\System32\\drivers\\etc\\hosts"))
+        self.assertFalse(allowed("C:\\Program Files\\App\\app.exe"))
+        self.assertFalse(allowed("C:\\Users\\mehmet\\notes.txt"))
+        self.assertFalse(allowed("C:\\Users\\ayse\\..\\mehmet\\notes.txt"))
+        self.assertFalse(allowed("C:\\Users\\ayse-fake\\notes.txt"))
+        self.assertTrue(engine.check_executable("C:\\Windows\\notepad.EXE").allowed)
+        self.assertFalse(engine.check_executable("powershell.exe").allowed)
+        with self.assertRaises(PermissionError):
+            engine.enforce("start_application_safe", {"app_name": "powershell.exe"})
+
+        # broader roots only when passed explicitly
+        wide = PolicyEngine(config=PolicyConfig(allowed_paths=["C:\\Program Files\\*"]),
+                            base_roots=("C:\\Users\\ayse", "C:\\Program Files"), path_module=ntpath)
+        self.assertTrue(wide.check_path("C:\\Program Files\\App\\app.exe").allowed)
+        self.assertFalse(wide.check_path("C:\\Users\\ayse\\notes.txt").allowed)
+
+    def test_disabled_security_allows_everything(self):
+        engine = PolicyEngine(config=PolicyConfig(enabled=False, disallowed_commands=["format"]))
+        self.assertTrue(engine.check_path("/").allowed)
+        self.assertTrue(engine.check_command("format c:").allowed)
+
+
+if __name__ == "__main__":
+    unittest.main()
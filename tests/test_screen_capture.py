@@ -0,0 +1,54 @@
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from src.agent.utils.screen_capture import CaptureSettings, FileCaptureBackend, encode_image
+
+
+class TestScreenCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self.tmp.name)
+        for i, color in enumerate([(255, 0, 0), (0, 255, 0)]):
+            Image.new("RGB", (400, 200), color).save(self.dir / f"frame_{i}.png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_encode_formats(self):
+        img = Image.new("RGBA", (64, 32), (10, 20, 30, 255))
+        for fmt in ("PNG", "JPEG", "WEBP"):
+            data, size = encode_image(img, CaptureSettings(image_format=fmt, quality=70))
+            self.assertEqual(size, (64, 32))
+            self.assertEqual(Image.open(io.BytesIO(data)).format, fmt)
+
+    def test_max_dimension_keeps_aspect_ratio(self):
+        img = Image.new("RGB", (2560, 1440))
+        _, size = encode_image(img, CaptureSettings(max_dimension=1280))
+        self.assertEqual(size, (1280, 720))
+
+    def test_invalid_settings(self):
+        with self.assertRaises(ValueError):
+            CaptureSettings(image_format="gif")
+        with self.assertRaises(ValueError):
+            CaptureSettings(quality=0)
+
+    def test_file_backend_replays_directory(self):
+        backend = FileCaptureBackend(self.dir)
+        colors = [backend.capture().image.getpixel((0, 0)) for _ in range(3)]
+        self.assertEqual(colors, [(255, 0, 0), (0, 255, 0), (255, 0, 0)])
+
+    def test_file_backend_without_loop_repeats_last_frame(self):
+        backend = FileCaptureBackend(self.dir, loop=False)
+        frames = [backend.capture(CaptureSettings(image_format="JPEG")) for _ in range(3)]
+        self.assertEqual(frames[-1].image.getpixel((0, 0)), (0, 255, 0))
+        self.assertEqual(frames[-1].source_size, (400, 200))
+        self.assertTrue(frames[-1].data.startswith(b"\xff\xd8"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import unittest
+
+from PIL import Image
+
+from src.agent.executor import tools
+from src.agent.utils.screen_settle import ScreenWatcher, parse_region, set_frame_source
+
+
+class _FakeScreen:
+    """
+    Simulated clock + screen: frame content is a function of the simulated time.
+    """
+
+    def __init__(self, content_at):
+        self.now = 0.0
+        self.content_at = content_at
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+    def grab(self):
+        img = Image.new("RGB", (320, 200), (30, 30, 30))
+        box = self.content_at(self.now)
+        if box is not None:
+            img.paste((250, 250, 250), box)
+        return img
+
+    def watcher(self):
+        return ScreenWatcher(self.grab, clock=self.clock, sleep=self.sleep)
+
+
+def _animation_until(t_end):
+    # a bar that grows until t_end, then stays put
+    return lambda t: (0, 0, 20 + int(min(t, t_end) * 200), 40)
+
+
+class TestScreenSettle(unittest.TestCase):
+
+    def test_stable_returns_shortly_after_the_animation_stops(self):
+        screen = _FakeScreen(_animation_until(0.5))
+        result = screen.watcher().wait_until_stable(timeout=5.0)
+        self.assertTrue(result.settled)
+        self.assertGreaterEqual(result.elapsed, 0.5)
+        self.assertLess(result.elapsed, 0.9)
+
+    def test_stable_times_out_on_a_screen_that_keeps_changing(self):
+        screen = _FakeScreen(lambda t: (0, 0, 20 + int(t * 100) % 300, 40))
+        result = screen.watcher().wait_until_stable(timeout=1.0)
+        self.assertFalse(result.settled)
+        self.assertAlmostEqual(result.elapsed, 1.0, places=2)
+
+    def test_region_ignores_changes_elsewhere(self):
+        screen = _FakeScreen(_animation_until(3.0))
+        result = screen.watcher().wait_until_stable(timeout=5.0, region=(0, 100, 320, 100))
+        self.assertTrue(result.settled)
+        self.assertLess(result.elapsed, 0.2)
+
+    def test_changed_backs_off_and_returns_on_first_change(self):
+        screen = _FakeScreen(lambda t: (100, 100, 200, 150) if t >= 1.0 else None)
+        result = screen.watcher().wait_until_changed(timeout=5.0)
+        self.assertTrue(result.settled)
+        self.assertGreaterEqual(result.elapsed, 1.0)
+        self.assertLess(result.elapsed, 1.3)
+        self.assertEqual(screen.sleeps[:4], [0.02, 0.04, 0.08, 0.16])
+        self.assertLessEqual(max(screen.sleeps), 0.25)
+
+    def test_tool_reports_the_elapsed_time(self):
+        previous = set_frame_source(lambda: Image.new("RGB", (64, 64)))
+        try:
+            self.assertRegex(tools.wait_until_stable(timeout=2, region=[0, 0, 32, 32]), r"^screen-stable:0\.\d\ds$")
+            self.assertEqual(tools.wait_until_changed(timeout=0), "screen-unchanged:0.00s")
+        finally:
+            set_frame_source(previous)
+
+    def test_region_is_grabbed_without_a_full_frame(self):
+        screen = _FakeScreen(_animation_until(3.0))
+        regions = []
+
+        def grab_region(region):
+            regions.append(region)
+            x, y, w, h = region
+            return screen.grab().crop((x, y, x + w, y + h))
+
+        full = lambda: self.fail("full frame grabbed for a region")
+        previous = set_frame_source(full, grab_region)
+        try:
+            watcher = ScreenWatcher(full, clock=screen.clock, sleep=screen.sleep, region_source=grab_region)
+            self.assertTrue(watcher.wait_until_stable(timeout=5.0, region=(0, 100, 320, 100)).settled)
+            self.assertTrue(tools.wait_until_stable(timeout=2, region=[0, 100, 320, 100]).startswith("screen-stable"))
+        finally:
+            set_frame_source(previous)
+        self.assertTrue(regions and all(r == (0, 100, 320, 100) for r in regions))
+
+    def test_parse_region(self):
+        self.assertIsNone(parse_region(None))
+        self.assertEqual(parse_region(["1", 2, 3.0, 4]), (1, 2, 3, 4))
+        with self.assertRaises(ValueError):
+            parse_region([0, 0, 0, 10])
+        with self.assertRaises(ValueError):
+            parse_region([1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
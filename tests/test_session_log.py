@@ -0,0 +1,205 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from PIL import Image
+
+from src.agent.executor.executor_core import ExecutorCore
+from src.agent.executor.input_backend import RecordingBackend, set_input_backend
+from src.agent.utils.screen_capture import CaptureBackend
+from src.agent.utils.session_log import SessionReader, SessionWriter
+from src.orchestrator import iterate_steps, run_orchestrator, run_orchestrator_async
+from src.session_replay import SessionReplayer
+
+ELEMENTS = [{"id": 7, "type": "button", "content": "Tamam", "bbox": {"x": 100, "y": 200, "w": 40, "h": 20}}]
+
+
+class _StaticCaptureBackend(CaptureBackend):
+    def grab(self):
+        return Image.new("RGB", (32, 32), (40, 80, 120))
+
+
+class _StaticParser:
+    def parse(self, image):
+        return ELEMENTS
+
+
+class _ScriptedClient:
+    """ollama.Client stand-in: replies from REPLIES in order (summaries get plain text)."""
+
+    REPLIES = [
+        {"thought": "bekle", "tool_call": {"action": "wait", "parameters": {"seconds": 0}}},
+        {"thought": "tıkla ve yaz", "tool_calls": [
+            {"action": "click_element", "parameters": {"element_id": 7}},
+            {"action": "keyboard_type", "parameters": {"text": "ali"}},
+        ]},
+        {"thought": "bitti", "final_response": "tamam"},
+    ]
+
+    def __init__(self, host=None):
+        self.calls = 0
+
+    def chat(self, model, messages, format=None, stream=False):
+        if not messages:  # warm_up
+            return {"message": {"content": ""}}
+        if self.calls >= len(self.REPLIES):
+            return {"message": {"content": "özet"}}
+        reply = self.REPLIES[self.calls]
+        self.calls += 1
+        return {"message": {"content": "Yanıt:\n" + json.dumps(reply, ensure_ascii=False)}}
+
+
+class _BrokenTailClient:
+    """Streaming ollama.Client stand-in: the tool_call completes, then the outer JSON breaks."""
+
+    TEXT = '{"thought": "bekle", "tool_call": {"action": "wait", "parameters": {"seconds": 0}}, "x": }'
+
+    def __init__(self, host=None):
+        pass
+
+    def chat(self, model, messages, format=None, stream=False):
+        if not stream:
+            return {"message": {"content": "özet"}}
+        return iter([{"message": {"content": self.TEXT[i:i + 7]}} for i in range(0, len(self.TEXT), 7)])
+
+
+class TestSessionLog(unittest.TestCase):
+
+    def test_roundtrip_rotation_and_truncated_tail(self):
+        frame = bytes(range(256)) * 16
+        with tempfile.TemporaryDirectory() as tmp:
+            with SessionWriter(tmp, segment_bytes=8192, compress_min=64) as writer:
+                for step in range(6):
+                    writer.append("frame", step, {"size": [32, 32]}, frame)
+                    writer.append("response", step, {"text": "x" * 200, "step": step})
+            segments = sorted(Path(tmp).glob("segment_*.wlog"))
+            self.assertGreater(len(segments), 1)
+
+            with SessionReader(tmp) as reader:
+                records = list(reader)
+                self.assertEqual([r.kind for r in records], ["frame", "response"] * 6)
+                self.assertEqual(bytes(records[4].blob), frame)
+                self.assertEqual(records[5].meta, {"text": "x" * 200, "step": 2})
+                self.assertFalse(reader.truncated)
+                del records
+
+            # a crash mid-record: the cut record and everything after it in that segment is dropped
+            data = segments[-1].read_bytes()
+            segments[-1].write_bytes(data[:-10])
+            with SessionReader(tmp) as reader:
+                kept = [r.step for r in reader.records("response")]
+                self.assertTrue(reader.truncated)
+            self.assertEqual(kept, list(range(5)))
+
+
+class TestSessionReplay(unittest.TestCase):
+
+    def record(self, tmp, orchestrator=run_orchestrator):
+        backend = RecordingBackend()
+        previous = set_input_backend(backend)
+        try:
+            with mock.patch("src.agent.planner.planner_client.ollama.Client", _ScriptedClient):
+                steps = orchestrator("görev", capture_backend=_StaticCaptureBackend(),
+                                     screen_parser=_StaticParser(), executor=ExecutorCore(),
+                                     session_dir=tmp)
+                if orchestrator is run_orchestrator_async:
+                    steps = iterate_steps(steps)
+                steps = list(steps)
+        finally:
+            set_input_backend(previous)
+        self.assertEqual(steps[-1], {"type": "assistant", "content": "tamam"})
+        sessions = list(Path(tmp).glob("session_*"))
+        self.assertEqual(len(sessions), 1)
+        return sessions[0], backend
+
+    def test_orchestrator_session_is_recorded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            session, _ = self.record(tmp)
+            with SessionReader(session) as reader:
+                kinds = [r.kind for r in reader]
+                tools = [r.meta for r in reader.records("tool")]
+                request = reader.records("request")[0].meta
+        self.assertEqual(kinds[0], "task")
+        self.assertEqual(kinds[-1], "end")
+        self.assertEqual(kinds.count("response"), 3)
+        self.assertEqual(kinds.count("timing"), 3)
+        self.assertGreaterEqual(kinds.count("frame"), 1)
+        self.assertEqual(tools[1]["result"]["completed"], 2)
+        self.assertEqual(json.loads(request["ui_elements"])[0]["id"], 7)
+
+    def test_async_orchestrator_session_is_recorded(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            session, live = self.record(tmp, orchestrator=run_orchestrator_async)
+            with SessionReader(session) as reader:
+                kinds = [r.kind for r in reader]
+            report = SessionReplayer(str(session), decode_frames=True).replay()
+        self.assertEqual((kinds[0], kinds[-1]), ("task", "end"))
+        self.assertEqual(kinds.count("response"), 3)
+        self.assertEqual(kinds.count("timing"), 3)
+        self.assertEqual(len(report.steps), 3)
+        self.assertEqual(report.mismatches, [])
+
+    def test_steps_are_flushed_before_the_session_ends(self):
+        backend = RecordingBackend()
+        previous = set_input_backend(backend)
+        try:
+            with tempfile.TemporaryDirectory() as tmp, \
+                    mock.patch("src.agent.planner.planner_client.ollama.Client", _ScriptedClient):
+                steps = run_orchestrator("görev", capture_backend=_StaticCaptureBackend(),
+                                         screen_parser=_StaticParser(), executor=ExecutorCore(),
+                                         session_dir=tmp)
+                next(step for step in steps if step["type"] == "timing")
+                session = next(Path(tmp).glob("session_*"))
+                with SessionReader(session) as reader:
+                    kinds = [r.kind for r in reader]
+                steps.close()
+        finally:
+            set_input_backend(previous)
+        self.assertEqual(kinds[0], "task")
+        self.assertIn("response", kinds)
+        self.assertIn("timing", kinds)
+        self.assertNotIn("end", kinds)
+
+    def test_replay_attaches_an_early_dispatched_tool_to_the_failed_step(self):
+        for orchestrator in (run_orchestrator, run_orchestrator_async):
+            with tempfile.TemporaryDirectory() as tmp:
+                with mock.patch("src.agent.planner.planner_client.ollama.Client", _BrokenTailClient):
+                    steps = orchestrator("görev", capture_backend=_StaticCaptureBackend(), stream=True,
+                                         settle_seconds=0, session_dir=tmp,
+                                         executor=ExecutorCore(dispatch_map={"wait": lambda seconds: "ok"}))
+                    list(iterate_steps(steps) if orchestrator is run_orchestrator_async else steps)
+                session = next(Path(tmp).glob("session_*"))
+                with SessionReader(session) as reader:
+                    kinds = [r.kind for r in reader]
+                report = SessionReplayer(str(session)).replay()
+            self.assertEqual(kinds[kinds.index("error") + 1], "tool")
+            self.assertEqual(len(report.steps), 1)
+            self.assertEqual(report.mismatches, [])
+            self.assertEqual((report.steps[0].recorded_status, report.steps[0].replayed_status), ("success", "success"))
+            self.assertIsNotNone(report.steps[0].error)
+
+    def test_replay_reproduces_the_session(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            session, live = self.record(tmp)
+            replayer = SessionReplayer(str(session), decode_frames=True)
+            report = replayer.replay()
+        self.assertEqual(len(report.steps), 3)
+        self.assertEqual(report.mismatches, [])
+        self.assertFalse(report.truncated)
+        self.assertEqual(replayer.backend.events, live.events)
+
+    def test_replay_reports_a_changed_executor(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            session, _ = self.record(tmp)
+            # click_element no longer exists: the batch step now fails
+            executor = ExecutorCore(dispatch_map={"wait": lambda seconds: float(seconds),
+                                                  "keyboard_type": lambda text: text})
+            report = SessionReplayer(str(session), executor=executor).replay()
+        self.assertEqual([(m.step, m.recorded_status, m.replayed_status) for m in report.mismatches],
+                         [(1, "success", "error")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import io
+import unittest
+from unittest import mock
+
+import numpy as np
+from PIL import Image
+
+from src.agent.planner.planner_client import PlannerClient
+from src.agent.utils import tracing
+from src.agent.utils.frame_transform import FrameTransform
+from src.agent.utils.screen_capture import CaptureBackend, CaptureSettings
+from src.agent.utils.som_overlay import MarkRenderer, label_patch
+from src.orchestrator import REACT_PROMPT, SUMMARIZER_PROMPT
+
+
+class _GrayBackend(CaptureBackend):
+    def grab(self):
+        return Image.new("RGB", (1920, 1080), (128, 128, 128))
+
+
+class _NoClient:
+    def __init__(self, host=None):
+        pass
+
+
+def element(i, x, y, w, h):
+    return {"id": i, "type": "button", "content": "", "bbox": {"x": x, "y": y, "w": w, "h": h}}
+
+
+def overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+class TestMarkRenderer(unittest.TestCase):
+
+    def test_labels_avoid_each_other_and_leave_the_source_alone(self):
+        frame = np.full((400, 600, 3), 128, dtype=np.uint8)
+        # a row of touching boxes: every "above" slot collides with the previous label
+        marks = [(i, (40 + 12 * i, 100, 12, 30)) for i in range(12)] + [(99, (590, 390, 30, 30))]
+        placed = MarkRenderer().draw(frame, marks)
+        self.assertEqual(len(placed), len(marks))
+        for i, a in enumerate(placed):
+            self.assertTrue(0 <= a[0] <= 600 - a[2] and 0 <= a[1] <= 400 - a[3])
+            for b in placed[i + 1:]:
+                self.assertFalse(overlaps(a, b), (a, b))
+
+        source = Image.new("RGB", (1280, 720), (128, 128, 128))
+        marked = MarkRenderer().render(source, [element(7, 100, 100, 80, 30)])
+        self.assertEqual(source.getpixel((100, 100)), (128, 128, 128))
+        self.assertNotEqual(marked.getpixel((100, 100)), (128, 128, 128))
+        patch = label_patch("7", 14)
+        label = np.asarray(marked)[100 - patch.shape[0]:100, 100:100 + patch.shape[1]]
+        self.assertTrue((label[patch] == 255).all())
+
+    def test_elements_are_mapped_into_the_scaled_image(self):
+        transform = FrameTransform((1920, 1080), (960, 540), 0.5, 0.5)
+        marked = np.asarray(MarkRenderer().render(Image.new("RGB", (960, 540)), [element(0, 400, 400, 200, 100)], transform))
+        self.assertTrue(marked[200, 250].any())    # outline at screen (500, 400)
+        self.assertFalse(marked[250, 250].any())   # box interior untouched
+
+    def test_planner_sends_the_marked_frame_with_the_table(self):
+        settings = CaptureSettings(image_format="PNG", max_dimension=1280)
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _NoClient):
+            planner = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT, _GrayBackend(), settings, set_of_marks=True)
+        tracer = tracing.Tracer()
+        previous = tracing.set_tracer(tracer)
+        try:
+            plain = planner.screen_capture()
+            planner.set_ui_elements([element(3, 300, 300, 150, 60)])
+        finally:
+            tracing.set_tracer(previous)
+        frame = planner.last_frame
+        self.assertTrue(frame.marked)
+        self.assertFalse(plain.marked)
+        # the changed frame waits for its marks and is encoded once
+        self.assertEqual(plain.data, b"")
+        self.assertEqual(tracer.stage_stats()["encode"]["count"], 1)
+        self.assertGreater(frame.encode_seconds, 0)
+        sent = Image.open(io.BytesIO(frame.data))
+        self.assertEqual(sent.size, (1280, 720))
+        self.assertNotEqual(sent.getpixel((200, 200)), (128, 128, 128))
+        content = planner._build_screen_message(frame, None)["content"]
+        self.assertIn("Numbered labels on the image", content)
+        self.assertIn('"id":3', content)
+
+        # unchanged screen: the new capture is marked without a re-parse
+        self.assertTrue(planner.screen_capture().marked)
+
+    def test_unscaled_settings_are_downscaled_for_marks(self):
+        with mock.patch("src.agent.planner.planner_client.ollama.Client", _NoClient):
+            planner = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT, _GrayBackend(), CaptureSettings(), set_of_marks=True)
+            plain = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT, _GrayBackend(), CaptureSettings())
+            fitted = PlannerClient(REACT_PROMPT, SUMMARIZER_PROMPT, _GrayBackend(),
+                                   CaptureSettings(model_resolution=(896, 896)), set_of_marks=True)
+        planner.screen_capture()
+        planner.set_ui_elements([element(3, 300, 300, 150, 60)])
+        self.assertEqual(planner.last_frame.model_image.size, (1280, 720))
+        self.assertEqual(Image.open(io.BytesIO(planner.last_frame.data)).size, (1280, 720))
+        self.assertIsNone(plain.capture_settings.max_dimension)
+        self.assertEqual((fitted.capture_settings.model_resolution, fitted.capture_settings.max_dimension), ((896, 896), None))
+
+
+if __name__ == "__main__":
+    unittest.main()
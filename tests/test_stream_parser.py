@@ -0,0 +1,96 @@
+import json
+import unittest
+
+from PIL import Image
+
+from src.agent.planner.planner_client import PlannerClient
+from src.agent.planner.stream_parser import StreamingJSONParser
+from src.agent.utils.screen_capture import CaptureBackend
+
+
+RESPONSE = {
+    "thought": "Başlat menüsünü açıyorum: \"Not Defteri\" \\ C:\\Windows 😀",
+    "tool_call": {"action": "mouse_click", "parameters": {"x": 12, "y": 700, "button": "left"}},
+}
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class _StaticCaptureBackend(CaptureBackend):
+    def grab(self):
+        return Image.new("RGB", (32, 32))
+
+
+class _FakeStreamingClient:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.consumed = 0
+        self.closed = False
+
+    def chat(self, model, messages, format=None, stream=False):
+        def gen():
+            try:
+                for piece in self.pieces:
+                    self.consumed += 1
+                    yield {"message": {"content": piece}}
+            finally:
+                self.closed = True
+        return gen()
+
+
+class TestStreamingJSONParser(unittest.TestCase):
+
+    def test_any_chunking_gives_same_events(self):
+        for ensure_ascii in (True, False):
+            text = json.dumps(RESPONSE, ensure_ascii=ensure_ascii)
+            for size in (1, 2, 3, 7, len(text)):
+                parser = StreamingJSONParser()
+                events = [e for chunk in _chunks(text, size) for e in parser.feed(chunk)]
+                thought = "".join(v for kind, v in events if kind == "thought_delta")
+                fields = [v for kind, v in events if kind == "field"]
+                self.assertEqual(thought, RESPONSE["thought"])
+                self.assertEqual(fields, list(RESPONSE.items()))
+                self.assertEqual(events[-1], ("done", RESPONSE))
+
+    def test_tool_call_emitted_when_object_closes(self):
+        text = json.dumps(RESPONSE)
+        cut = len(text) - 1                # end of the tool_call object, outer '}' still missing
+        parser = StreamingJSONParser()
+        events = parser.feed(text[:cut])
+        self.assertIn(("field", ("tool_call", RESPONSE["tool_call"])), events)
+        self.assertFalse(parser.done)
+
+    def test_primitives_and_noise(self):
+        parser = StreamingJSONParser()
+        events = parser.feed('noise {"final_response": "bitti", "n": 3, "ok": true, "z": null} \n\n')
+        self.assertEqual(parser.result, {"final_response": "bitti", "n": 3, "ok": True, "z": None})
+        self.assertEqual(events[-1][0], "done")
+
+
+class TestPlannerStreaming(unittest.TestCase):
+
+    def test_events_metrics_and_early_stop(self):
+        text = json.dumps(RESPONSE, ensure_ascii=False)
+        client = _FakeStreamingClient(_chunks(text, 5) + ["\n"] * 50)
+        planner = PlannerClient("missing_react.txt", "missing_summary.txt",
+                                capture_backend=_StaticCaptureBackend(), stream=True)
+        planner.client = client
+        seen = []
+        parsed = planner.get_next_step("görev", on_event=lambda kind, value: seen.append(kind))
+
+        self.assertEqual(parsed, RESPONSE)
+        self.assertEqual(seen[-1], "tool_call")
+        self.assertTrue(all(kind == "thought_delta" for kind in seen[:-2]))
+        # trailing whitespace padding is never read
+        self.assertEqual(client.consumed, len(_chunks(text, 5)))
+        self.assertTrue(client.closed)
+        metrics = planner.last_step_metrics
+        self.assertTrue(metrics["streamed"])
+        self.assertLessEqual(metrics["ttft_s"], metrics["time_to_action_s"])
+        self.assertLessEqual(metrics["time_to_action_s"], metrics["total_s"])
+
+
+if __name__ == '__main__':
+    unittest.main()
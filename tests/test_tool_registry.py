@@ -0,0 +1,80 @@
+import importlib.util
+import unittest
+from pathlib import Path
+from typing import List, Literal, Optional
+
+from src.agent.executor.executor_core import TOOL_REGISTRY, ExecutorCore
+from src.agent.executor.input_backend import RecordingBackend, set_input_backend
+from src.agent.executor.tool_registry import ToolCallError, ToolRegistry
+
+
+def drag(x: int, y: int, button: Literal["left", "right"] = "left", path: Optional[List[int]] = None, *, index):
+    return (x, y, button, path, index)
+
+
+class TestToolRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = ToolRegistry({"drag": drag, "free": lambda **kw: kw})
+
+    def test_coercion_and_enum(self):
+        self.assertEqual(self.registry.bind("drag", {"x": "640", "y": 400.6, "button": "RIGHT", "path": ["1", 2.0]}),
+                         {"x": 640, "y": 401, "button": "right", "path": [1, 2]})
+        self.assertEqual(self.registry.bind("drag", {"x": 1, "y": 2}), {"x": 1, "y": 2})
+
+    def test_malformed_calls_are_rejected(self):
+        for params, fragment in (
+            ({"x": 1}, "eksik parametre: y"),
+            ({"x": 1, "y": 2, "z": 3}, "bilinmeyen parametre 'z'"),
+            ({"x": "sol", "y": 2}, "'x'"),
+            ({"x": True, "y": 2}, "'x'"),
+            ({"x": 1, "y": 2, "button": "middle"}, "'button'"),
+            ({"x": 1, "y": 2, "index": 0}, "bilinmeyen parametre 'index'"),
+        ):
+            with self.assertRaises(ToolCallError) as ctx:
+                self.registry.bind("drag", params)
+            self.assertIn(fragment, str(ctx.exception))
+        self.assertEqual(self.registry.bind("free", {"anything": 1}), {"anything": 1})
+
+    def test_injected_parameters_are_hidden_from_the_prompt(self):
+        spec = self.registry.get("drag")
+        self.assertEqual(spec.injected, ("index",))
+        self.assertEqual(spec.render(), 'drag(x: int, y: int, button: "left"|"right" = "left", path: [int, ...] = null)')
+
+    def test_prompt_lists_every_executor_tool(self):
+        prompt = TOOL_REGISTRY.render_prompt("{{TOOL_LIST}}\n[{{TOOL_NAMES}}]")
+        for name in TOOL_REGISTRY:
+            self.assertIn(f"- {name}(", prompt)
+        self.assertIn('mouse_click(x: int, y: int, button: "left"|"right"|"middle" = "left")', prompt)
+        self.assertNotIn("index", prompt)
+
+    def test_executor_rejects_before_any_input(self):
+        backend = RecordingBackend()
+        previous = set_input_backend(backend)
+        try:
+            executor = ExecutorCore()
+            bad = executor.execute_command({"action": "mouse_click", "parameters": {"x": 10, "y": 20, "button": "sol"}})
+            ok = executor.execute_command({"action": "mouse_click", "parameters": {"x": "10", "y": "20"}})
+        finally:
+            set_input_backend(previous)
+        self.assertEqual(bad["status"], "error")
+        self.assertIn("button", bad["error"])
+        self.assertEqual(ok, {"status": "success", "result": "clicked:10,20:left"})
+        self.assertEqual(backend.kinds(), ["click"])
+
+
+    def test_modelfiles_match_the_registry(self):
+        path = Path(__file__).resolve().parents[1] / "scripts" / "render_modelfiles.py"
+        spec = importlib.util.spec_from_file_location("render_modelfiles", path)
+        script = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(script)
+        # run `python scripts/render_modelfiles.py` after changing the tools or the react prompt
+        self.assertEqual(script.stale_modelfiles(), [])
+        for modelfile in script.MODELFILE_DIR.glob("*Modelfile*"):
+            text = modelfile.read_text(encoding="utf-8")
+            self.assertIn("type_into_element(element_id: int, text: str)", text)
+            self.assertNotIn("[list of allowed tools]", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+from src.agent.utils import tracing
+
+
+class TestTracing(unittest.TestCase):
+
+    def tearDown(self):
+        tracing.set_tracer(None)
+
+    def test_spans_recorded_only_with_active_tracer(self):
+        with tracing.span("capture"):
+            pass
+        tracer = tracing.Tracer()
+        self.assertIsNone(tracing.set_tracer(tracer))
+        with tracing.span("llm", model="m"):
+            pass
+        tracing.record("encode", 1.0, 0.25)
+        self.assertEqual([s.name for s in tracer.spans], ["llm", "encode"])
+        self.assertEqual(tracer.spans[0].args, {"model": "m"})
+
+    def test_stage_stats_percentiles(self):
+        tracer = tracing.Tracer()
+        for ms in range(1, 101):
+            tracer.record("execute", 0.0, ms / 1000.0)
+        stats = tracer.stage_stats()["execute"]
+        self.assertEqual(stats["count"], 100)
+        self.assertAlmostEqual(stats["p50_ms"], 50.5)
+        self.assertAlmostEqual(stats["p95_ms"], 95.05)
+        self.assertEqual(tracing.percentile([3.0], 95), 3.0)
+
+    def test_parent_forwarding_and_chrome_trace(self):
+        parent = tracing.Tracer()
+        child = tracing.Tracer(parent=parent)
+        child.record("llm", child.origin + 0.5, 0.25, step=1)
+        self.assertEqual([s.name for s in parent.spans], ["llm"])
+        event = child.to_chrome_trace()["traceEvents"][-1]
+        self.assertEqual((event["ph"], event["ts"], event["dur"], event["args"]), ("X", 500000.0, 250000.0, {"step": 1}))
+
+
+if __name__ == '__main__':
+    unittest.main()
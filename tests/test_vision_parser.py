@@ -0,0 +1,272 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import cv2
+import numpy as np
+
+from src.agent.executor.vision_parser import ScreenParser
+from src.agent.utils import tracing
+
+
+class _Tensorish(list):
+    """Mimics the indexable tensors on ultralytics Boxes (box.xyxy[0], box.cls[0], ...)."""
+
+
+class _Box:
+    def __init__(self, xyxy, cls_id, conf):
+        self.xyxy = _Tensorish([xyxy])
+        self.cls = _Tensorish([cls_id])
+        self.conf = _Tensorish([conf])
+
+
+class _Result:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+class FakeDetector:
+    """Boxes shift right by frame[0, 0] // 40 px, so each result can be traced back to its frame."""
+    names = {0: "button", 1: "textbox"}
+
+    def __init__(self, boxes):
+        self.boxes = boxes
+        self.calls = 0
+        self.batch_sizes = []
+
+    def __call__(self, img, conf=0.25, **kwargs):
+        # like YOLO: one result per image, a list of images is one batched call
+        self.calls += 1
+        images = img if isinstance(img, list) else [img]
+        self.batch_sizes.append(len(images))
+        return [_Result([_Box(self._shifted(xyxy, int(image[0, 0, 0]) // 40), cls_id, conf)
+                         for xyxy, cls_id, conf in self.boxes]) for image in images]
+
+    @staticmethod
+    def _shifted(xyxy, dx):
+        x1, y1, x2, y2 = xyxy
+        return (x1 + dx, y1, x2 + dx, y2)
+
+
+class BlobDetector:
+    """Detects every bright rectangle of the frame (connected components), like a tiny UI detector."""
+    names = {0: "button"}
+
+    def __init__(self):
+        self.shapes = []
+
+    def __call__(self, img, conf=0.25, **kwargs):
+        images = img if isinstance(img, list) else [img]
+        results = []
+        for image in images:
+            self.shapes.append(image.shape[:2])
+            mask = (image.max(axis=2) > 0).astype(np.uint8)
+            count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+            results.append(_Result([_Box((x, y, x + w, y + h), 0, 0.9) for x, y, w, h, _ in stats[1:count]]))
+        return results
+
+
+class ShapeOCR:
+    """Text depends only on the box content, not on its position in the batch."""
+    def recognize(self, rois):
+        return [f"{int(r.sum()) // 255}" for r in rois]
+
+
+class FakeOCR:
+    def recognize(self, rois):
+        return [f"text{i}" for i in range(len(rois))]
+
+
+def make_parser(boxes):
+    parser = ScreenParser(model=FakeDetector(boxes), ocr_workers=0, ocr_cache_size=0)
+    parser.ocr = FakeOCR()
+    return parser
+
+
+class TestScreenParser(unittest.TestCase):
+
+    def setUp(self):
+        self.frame = np.zeros((120, 200, 3), dtype=np.uint8)
+        self.boxes = [((10, 10, 60, 40), 0, 0.91), ((80, 50, 190, 80), 1, 0.5)]
+
+    def test_parse_returns_elements_without_touching_frame(self):
+        before = self.frame.copy()
+        elements = make_parser(self.boxes).parse(self.frame)
+        self.assertEqual(elements[0], {
+            "type": "button", "id": 0, "class_id": 0, "confidence": 0.91,
+            "bbox": {"x": 10, "y": 10, "w": 50, "h": 30}, "content": "text0",
+        })
+        self.assertEqual((elements[1]["type"], elements[1]["id"], elements[1]["class_id"]), ("textbox", 1, 1))
+        np.testing.assert_array_equal(self.frame, before)
+
+    def test_render_debug_draws_on_a_copy(self):
+        parser = make_parser(self.boxes)
+        elements = parser.parse(self.frame)
+        debug = parser.render_debug(elements, self.frame)
+        self.assertIsNot(debug, self.frame)
+        self.assertEqual(int(self.frame.sum()), 0)
+        self.assertGreater(int(debug.sum()), 0)
+        np.testing.assert_array_equal(parser.render_debug_async(elements, self.frame).result(), debug)
+        parser.close()
+
+    def test_parse_and_visualize_compat(self):
+        parser = make_parser(self.boxes)
+        self.assertEqual(len(parser.parse_and_visualize(self.frame)), 2)
+        elements, debug = parser.parse_and_visualize(self.frame, visualize=True)
+        self.assertEqual(len(elements), 2)
+        self.assertEqual(debug.shape, self.frame.shape)
+
+
+class TestParseBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.boxes = [((10, 10, 60, 40), 0, 0.91), ((80, 50, 190, 80), 1, 0.5)]
+        self.frames = [np.full((120, 200, 3), i * 40, dtype=np.uint8) for i in range(5)]
+
+    def test_batches_match_single_frame_parse(self):
+        expected = [make_parser(self.boxes).parse(f) for f in self.frames]
+        for prefetch in (0, 2):
+            parser = make_parser(self.boxes)
+            parsed = parser.parse_batch(self.frames, batch_size=2, prefetch=prefetch)
+            self.assertEqual(parsed, expected)
+            self.assertEqual([frame[1]["bbox"]["x"] for frame in parsed], [80, 81, 82, 83, 84])
+            self.assertEqual(parser.model.batch_sizes, [2, 2, 1])
+
+    def test_paths_are_decoded_in_order_with_stage_spans(self):
+        tracer = tracing.Tracer()
+        previous = tracing.set_tracer(tracer)
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                paths = []
+                for i, frame in enumerate(self.frames):
+                    paths.append(os.path.join(tmp, f"{i}.png"))
+                    cv2.imwrite(paths[-1], frame)
+                parser = make_parser(self.boxes)
+                elements = parser.parse_batch(paths, batch_size=3, prefetch=1)
+                with self.assertRaises(ValueError):
+                    parser.parse_batch(paths[:2] + [os.path.join(tmp, "yok.png")], batch_size=1)
+        finally:
+            tracing.set_tracer(previous)
+        self.assertEqual([frame[0]["bbox"]["x"] for frame in elements], [10, 11, 12, 13, 14])
+        self.assertEqual(elements[4][1]["content"], "text1")
+        stats = tracer.stage_stats()
+        self.assertTrue({"decode", "decode_wait", "detect", "ocr", "postprocess"} <= set(stats))
+        self.assertEqual(stats["ocr"]["count"], 5 + 2)
+
+
+class _FakeMSS:
+    monitors = [
+        {"left": -1920, "top": 0, "width": 3840, "height": 1080},
+        {"left": 0, "top": 0, "width": 1920, "height": 1080},
+        {"left": -1920, "top": 200, "width": 1920, "height": 1080},
+    ]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TestParseMonitors(unittest.TestCase):
+
+    def setUp(self):
+        self.boxes = [((10, 10, 60, 40), 0, 0.91)]
+        self.primary = {"index": 1, "left": 0, "top": 0, "width": 200, "height": 120}
+        self.left = {"index": 2, "left": -200, "top": 30, "width": 200, "height": 120}
+        self.frames = [(self.primary, np.zeros((120, 200, 3), dtype=np.uint8)),
+                       (self.left, np.full((120, 200, 3), 90, dtype=np.uint8))]
+
+    def test_monitors_use_virtual_desktop_coordinates(self):
+        with mock.patch("src.agent.executor.vision_parser.mss.mss", _FakeMSS):
+            self.assertEqual(ScreenParser.monitors([2]),
+                             [{"index": 2, "left": -1920, "top": 200, "width": 1920, "height": 1080}])
+            self.assertEqual([m["index"] for m in ScreenParser.monitors()], [1, 2])
+            with self.assertRaises(ValueError):
+                ScreenParser.monitors([3])
+
+    def test_elements_are_offset_and_renumbered(self):
+        parser = make_parser(self.boxes)
+        elements = parser.parse_monitors(frames=self.frames)
+        self.assertEqual(parser.model.batch_sizes, [2])
+        self.assertEqual([(e["id"], e["monitor"]) for e in elements], [(0, 1), (1, 2)])
+        self.assertEqual(elements[0]["bbox"], {"x": 10, "y": 10, "w": 50, "h": 30})
+        # the left monitor's frame (value 90) shifts its box by 2 px before the -200 offset
+        self.assertEqual(elements[1]["bbox"], {"x": -188, "y": 40, "w": 50, "h": 30})
+        parser.close()
+
+    def test_static_monitor_is_not_reparsed(self):
+        parser = make_parser(self.boxes)
+        first = parser.parse_monitors(frames=self.frames)
+        self.assertEqual(parser.parse_monitors(frames=self.frames), first)
+        self.assertEqual(parser.model.batch_sizes, [2])
+
+        changed = self.frames[0][1].copy()
+        changed[50:60, 50:60] = 255
+        again = parser.parse_monitors(frames=[(self.primary, changed), self.frames[1]])
+        self.assertEqual(parser.model.batch_sizes, [2, 1])
+        self.assertEqual(again, first)
+        parser.parse_monitors(frames=self.frames, use_cache=False)
+        self.assertEqual(parser.model.batch_sizes, [2, 1, 2])
+        parser.close()
+
+
+class TestIncrementalParse(unittest.TestCase):
+
+    def scene(self, rects):
+        frame = np.zeros((1080, 1920, 3), dtype=np.uint8)
+        for x, y, w, h in rects:
+            frame[y:y + h, x:x + w] = 200
+        return frame
+
+    def make(self, **kwargs):
+        parser = ScreenParser(model=BlobDetector(), ocr_workers=0, ocr_cache_size=0, incremental=True, **kwargs)
+        parser.ocr = ShapeOCR()
+        return parser
+
+    def full(self, frame):
+        parser = self.make()
+        parser.incremental = False
+        return sorted((e["bbox"]["x"], e["bbox"]["y"], e["bbox"]["w"], e["bbox"]["h"], e["content"])
+                      for e in parser.parse(frame))
+
+    def test_matches_full_parse_and_only_detects_dirty_crops(self):
+        base = [(100, 100, 200, 40), (100, 300, 200, 40), (1500, 900, 120, 60), (800, 500, 300, 30)]
+        parser = self.make()
+        parser.parse(self.scene(base))
+        self.assertEqual(parser.model.shapes, [(1080, 1920)])
+
+        # a dropdown opens under the second field, the wide box grows, one button disappears
+        steps = [
+            base + [(100, 350, 200, 120)],
+            [(100, 100, 200, 40), (100, 300, 200, 40), (100, 350, 200, 120), (800, 500, 420, 30)],
+            [(100, 100, 200, 40), (100, 300, 200, 40), (800, 500, 420, 30)],
+        ]
+        for rects in steps:
+            frame = self.scene(rects)
+            parser.model.shapes.clear()
+            elements = parser.parse(frame)
+            self.assertEqual(sorted((e["bbox"]["x"], e["bbox"]["y"], e["bbox"]["w"], e["bbox"]["h"], e["content"])
+                                    for e in elements), self.full(frame))
+            self.assertEqual([e["id"] for e in elements], list(range(len(rects))))
+            crop_area = sum(h * w for h, w in parser.model.shapes)
+            self.assertLess(crop_area, 0.1 * 1080 * 1920)
+
+        parser.model.shapes.clear()
+        self.assertEqual(len(parser.parse(frame)), 3)
+        self.assertEqual(parser.model.shapes, [])
+
+    def test_large_change_falls_back_to_full_parse(self):
+        parser = self.make(max_dirty_ratio=0.2)
+        parser.parse(self.scene([(100, 100, 200, 40)]))
+        parser.model.shapes.clear()
+        parser.parse(self.scene([(0, 0, 1900, 1000)]))
+        self.assertEqual(parser.model.shapes, [(1080, 1920)])
+        parser.reset_incremental()
+        parser.parse(self.scene([(0, 0, 1900, 1000)]))
+        self.assertEqual(parser.model.shapes, [(1080, 1920)] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()